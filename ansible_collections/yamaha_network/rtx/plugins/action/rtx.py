@@ -20,17 +20,36 @@
 from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
 
+import os
 import re
 import sys
 import copy
 
 from ansible.module_utils._text import to_text
 from ansible.module_utils.connection import Connection, ConnectionError
+from ansible.module_utils.six import string_types
 from ansible.utils.display import Display
+from ansible.utils.unsafe_proxy import wrap_var
 from ansible_collections.ansible.netcommon.plugins.action.network import ActionModule as ActionNetworkModule
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.lock import CONSOLE_STATE_ENV, LOCK_FILE_ENV, LOCK_TIMEOUT_ENV
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.lock import DeviceLock, LockTimeout, get_console_state_path, get_lock_path
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.profiling import PROFILE_DIR_ENV, PROFILE_HOST_ENV, PROFILE_TASK_ENV
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.tracing import TRACE_FILE_ENV, Tracer
 
 display = Display()
 
+# modules which only read from the device
+READ_ONLY_MODULES = frozenset(['rtx_log', 'rtx_stats'])
+
+DEFAULT_LOCK_TIMEOUT = 300
+
+# the options of the modules naming a file on the controller
+CONTROLLER_PATHS = {
+    'rtx_command': ('output_file',),
+    'rtx_log': ('cursor_file', 'dest'),
+    'rtx_stats': ('state_file',),
+}
+
 
 class ActionModule(ActionNetworkModule):
 
@@ -52,5 +71,106 @@ class ActionModule(ActionNetworkModule):
         else:
             return {'failed': True, 'msg': 'Connection type %s is not valid for this module' % self._play_context.connection}
 
-        result = super(ActionModule, self).run(task_vars=task_vars)
+        self._resolve_controller_paths(module_name)
+        self._set_profile_environment(task_vars or dict())
+
+        lock = self._get_device_lock(module_name, task_vars or dict())
+        if lock is None:
+            return super(ActionModule, self).run(task_vars=task_vars)
+
+        try:
+            with self._get_tracer(task_vars or dict()).span('lock', shared=lock.shared):
+                lock.acquire()
+        except LockTimeout as exc:
+            return {'failed': True, 'msg': to_text(exc)}
+
+        try:
+            self._set_lock_environment(lock)
+            result = super(ActionModule, self).run(task_vars=task_vars)
+        finally:
+            lock.release()
         return result
+
+    def _is_read_only(self, module_name):
+        if self._play_context.check_mode or module_name in READ_ONLY_MODULES:
+            return True
+        if module_name != 'rtx_command':
+            return False
+
+        commands = self._task.args.get('commands')
+        if not isinstance(commands, list):
+            commands = [commands]
+        for item in commands:
+            if isinstance(item, dict):
+                item = item.get('command')
+            if not isinstance(item, string_types) or not item.strip().startswith('show'):
+                return False
+        return True
+
+    def _get_device_lock(self, module_name, task_vars):
+        """ return the lock of the device the task runs on, shared when the
+        task only reads from the device, or None when locking is disabled
+        """
+        lock_dir = task_vars.get('ansible_rtx_lock_dir')
+        if not lock_dir:
+            return None
+
+        host = self._play_context.remote_addr or task_vars.get('inventory_hostname')
+        path = get_lock_path(self._templar.template(lock_dir), host, self._play_context.port)
+        timeout = task_vars.get('ansible_rtx_lock_timeout', DEFAULT_LOCK_TIMEOUT)
+        return DeviceLock(path, shared=self._is_read_only(module_name),
+                          timeout=float(self._templar.template(timeout)))
+
+    def _resolve_controller_paths(self, module_name):
+        """ make relative paths of files on the controller relative to the
+        playbook, not to the directory the module runs in
+        """
+        for option in CONTROLLER_PATHS.get(module_name, ()):
+            path = self._task.args.get(option)
+            if path and not os.path.isabs(os.path.expanduser(path)):
+                self._task.args[option] = self._loader.path_dwim(path)
+
+    def _add_environment(self, variables):
+        environment = self._task.environment or list()
+        if not isinstance(environment, list):
+            environment = [environment]
+        # the values are not templated again
+        self._task.environment = environment + [dict((name, wrap_var(value)) for name, value in variables.items())]
+
+    def _set_profile_environment(self, task_vars):
+        """ name the host and the task to the module, which profiles itself
+        into a file named after them
+        """
+        if not os.environ.get(PROFILE_DIR_ENV):
+            return
+
+        self._add_environment({
+            PROFILE_HOST_ENV: task_vars.get('inventory_hostname') or self._play_context.remote_addr,
+            PROFILE_TASK_ENV: self._task.get_name(),
+        })
+
+    def _set_lock_environment(self, lock):
+        """ name the lock held to the module.  Shared tasks count
+        themselves in the console state file so that only the last of them
+        puts the console settings back; an exclusive task runs alone and
+        drops the count a failed shared task may have left
+        """
+        variables = {LOCK_FILE_ENV: lock.path, LOCK_TIMEOUT_ENV: str(lock.timeout)}
+        state_path = get_console_state_path(lock.path)
+        if lock.shared:
+            variables[CONSOLE_STATE_ENV] = state_path
+        else:
+            try:
+                os.remove(state_path)
+            except OSError:
+                pass
+        self._add_environment(variables)
+
+    def _get_tracer(self, task_vars):
+        path = task_vars.get('ansible_rtx_trace_file') or os.environ.get(TRACE_FILE_ENV)
+        return Tracer(self._templar.template(path) if path else None, process='controller',
+                      host=task_vars.get('inventory_hostname'), task=self._task._uuid)
+
+    def _handle_backup_option(self, result, task_vars):
+        with self._get_tracer(task_vars).span('backup'):
+            return super(ActionModule, self)._handle_backup_option(result, task_vars)
@@ -0,0 +1,186 @@
+# Copyright (C) Yamaha Corporation.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <https://www.gnu.org/licenses/gpl-3.0.txt>.
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+import os
+import re
+import tempfile
+
+from ansible.errors import AnsibleError
+from ansible.module_utils._text import to_bytes, to_text
+from ansible.module_utils.parsing.convert_bool import boolean
+from ansible.plugins.action import ActionBase
+from ansible.utils.multiprocessing import context as multiprocessing_context
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.abbreviation import expand_abbreviations
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.config import filter_config, get_config_diff
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.defaults import get_config_model
+
+BACKUP_RE = re.compile(r'^(?P<host>.+)_config\.(?P<timestamp>.+)$')
+
+STATUSES = ('in_sync', 'drift', 'no_backup', 'error')
+
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        return to_text(f.read(), errors='surrogate_then_replace')
+
+
+def host_drift(job):
+    """ compare the backup of a host with its intended config, run in the
+    worker processes
+    """
+    host, intended_path, backup_path, match, replace, ignore_lines, defaults = job
+    report = {'backup': backup_path}
+    if backup_path is None:
+        report['status'] = 'no_backup'
+        return host, report
+
+    try:
+        # the lines to ignore are left out of both configs, which are
+        # then compared in full both ways
+        intended = filter_config(expand_abbreviations(read_file(intended_path)), ignore_lines)
+        backup = read_file(backup_path).strip()
+        model = get_config_model(backup)
+        backup = filter_config(backup, ignore_lines)
+        # lines to be sent to the device, as rtx_config would, and lines
+        # on the device which the intended config does not have
+        missing = get_config_diff(intended, backup, diff_match=match, diff_replace=replace, model=model,
+                                  diff_defaults=defaults)
+        extra = get_config_diff(backup, intended, diff_match=match, diff_replace=replace, model=model,
+                                diff_defaults=defaults)
+    except Exception as exc:
+        report.update(status='error', msg=to_text(exc))
+        return host, report
+
+    report['missing'] = missing.split('\n') if missing else []
+    report['extra'] = extra.split('\n') if extra else []
+    report['status'] = 'drift' if missing or extra else 'in_sync'
+    return host, report
+
+
+class ActionModule(ActionBase):
+
+    TRANSFERS_FILES = False
+    _VALID_ARGS = frozenset(('backup_dir', 'intended_dir', 'intended_suffix', 'hosts', 'dest', 'match', 'replace',
+                             'diff_ignore_lines', 'diff_defaults', 'workers'))
+
+    def _get_backups(self, backup_dir):
+        backups = dict()
+        for name in sorted(os.listdir(backup_dir)):
+            match = BACKUP_RE.match(name)
+            if match:
+                # timestamps sort in time order, the newest backup wins
+                backups[match.group('host')] = os.path.join(backup_dir, name)
+        return backups
+
+    def _get_jobs(self, args):
+        intended_dir = args['intended_dir']
+        suffix = args.get('intended_suffix', '.cfg')
+
+        hosts = args.get('hosts')
+        if not hosts:
+            hosts = sorted(name[:len(name) - len(suffix)] for name in os.listdir(intended_dir)
+                           if name.endswith(suffix) and len(name) > len(suffix))
+
+        backups = self._get_backups(args['backup_dir'])
+        match = args.get('match', 'line')
+        replace = args.get('replace', 'line')
+        ignore_lines = args.get('diff_ignore_lines') or None
+        defaults = boolean(args.get('diff_defaults', True), strict=False)
+        return [(host, os.path.join(intended_dir, host + suffix), backups.get(host), match, replace, ignore_lines, defaults)
+                for host in hosts]
+
+    def _run_jobs(self, jobs, workers):
+        if workers == 1 or len(jobs) < 2:
+            return [host_drift(job) for job in jobs]
+
+        # fork the workers, spawned ones could not import host_drift
+        pool = multiprocessing_context.Pool(min(workers, len(jobs)))
+        try:
+            return pool.map(host_drift, jobs)
+        finally:
+            pool.close()
+            pool.join()
+
+    def _write_report(self, dest, content):
+        try:
+            with open(dest, 'rb') as f:
+                if f.read() == content:
+                    return False
+        except (IOError, OSError):
+            pass
+
+        dest_dir = os.path.dirname(dest) or '.'
+        if not os.path.isdir(dest_dir):
+            os.makedirs(dest_dir)
+        fd, tmp = tempfile.mkstemp(dir=dest_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.rename(tmp, dest)
+        except Exception:
+            os.remove(tmp)
+            raise
+        return True
+
+    def run(self, tmp=None, task_vars=None):
+        del tmp  # tmp no longer has any effect
+
+        result = super(ActionModule, self).run(task_vars=task_vars)
+
+        args = dict(self._task.args)
+        for key in ('backup_dir', 'intended_dir', 'dest'):
+            if not args.get(key):
+                return {'failed': True, 'msg': 'missing required arguments: %s' % key}
+            args[key] = os.path.expanduser(args[key])
+
+        if args.get('match', 'line') not in ('line', 'strict', 'exact'):
+            return {'failed': True, 'msg': "value of match must be one of: line, strict, exact"}
+        if args.get('replace', 'line') not in ('line', 'block'):
+            return {'failed': True, 'msg': "value of replace must be one of: line, block"}
+
+        try:
+            workers = int(args.get('workers') or multiprocessing_context.cpu_count())
+            jobs = self._get_jobs(args)
+            hosts = dict(self._run_jobs(jobs, workers))
+        except (AnsibleError, EnvironmentError, ValueError) as exc:
+            return {'failed': True, 'msg': to_text(exc)}
+
+        summary = dict((status, 0) for status in STATUSES)
+        for report in hosts.values():
+            summary[report['status']] += 1
+
+        report = {'summary': summary, 'hosts': hosts}
+        content = to_bytes(json.dumps(report, indent=2, sort_keys=True) + '\n')
+
+        changed = True
+        if not self._play_context.check_mode:
+            try:
+                changed = self._write_report(args['dest'], content)
+            except EnvironmentError as exc:
+                return {'failed': True, 'msg': 'unable to write %s: %s' % (args['dest'], to_text(exc))}
+
+        result.update({
+            'changed': changed,
+            'dest': args['dest'],
+            'summary': summary,
+            'drifted': sorted(host for host, report in hosts.items() if report['status'] == 'drift'),
+        })
+        return result
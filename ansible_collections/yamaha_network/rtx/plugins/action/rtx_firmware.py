@@ -0,0 +1,52 @@
+# Copyright (C) Yamaha Corporation.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <https://www.gnu.org/licenses/gpl-3.0.txt>.
+#
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible import constants as C
+from ansible.errors import AnsibleError
+from ansible.module_utils._text import to_text
+from ansible_collections.yamaha_network.rtx.plugins.action.rtx import ActionModule as ActionRtxModule
+
+
+class ActionModule(ActionRtxModule):
+
+    def run(self, tmp=None, task_vars=None):
+        del tmp  # tmp no longer has any effect
+
+        args = self._task.args
+        if args.get('src'):
+            try:
+                args['src'] = self._find_needle('files', args['src'])
+            except AnsibleError as exc:
+                return {'failed': True, 'msg': to_text(exc)}
+
+        # the SFTP session logs in as the network_cli connection does
+        defaults = {
+            'host': self._play_context.remote_addr,
+            'port': self._play_context.port,
+            'username': self._play_context.remote_user,
+            'password': self._play_context.password,
+            'ssh_keyfile': self._play_context.private_key_file,
+            'host_key_checking': C.HOST_KEY_CHECKING,
+        }
+        for key, value in defaults.items():
+            if args.get(key) is None and value is not None:
+                args[key] = value
+
+        return super(ActionModule, self).run(task_vars=task_vars)
@@ -30,25 +30,237 @@ description:
   - This rtx plugin provides low level abstraction apis for
     sending and receiving CLI commands from Yamaha RTX/NVR/FWX/vRX devices.
 version_added: "2.10"
+options:
+  keep_administrator:
+    type: boolean
+    default: false
+    description:
+      - Keep the persistent connection in administrator mode once it has
+        been entered, instead of leaving it with C(exit) when a task runs
+        without privilege escalation.  Later tasks that need administrator
+        mode then do not have to send C(administrator) and the password again.
+    env:
+      - name: ANSIBLE_RTX_KEEP_ADMINISTRATOR
+    vars:
+      - name: ansible_rtx_keep_administrator
+  show_cache_ttl:
+    type: int
+    default: 0
+    description:
+      - The number of seconds the output of read-only C(show) commands is
+        cached in the persistent connection.  Repeated C(show) commands
+        within this time return the cached output without contacting the
+        device.  Any configuration change made through the connection
+        invalidates the cache.  The commands of C(rtx_command) with
+        I(wait_for) and of C(rtx_stats) always read the device.  C(0)
+        disables the cache.
+    env:
+      - name: ANSIBLE_RTX_SHOW_CACHE_TTL
+    vars:
+      - name: ansible_rtx_show_cache_ttl
+  show_cache_size:
+    type: int
+    default: 64
+    description:
+      - The maximum number of C(show) command outputs kept in the cache.
+        The least recently used output is dropped first.
+    env:
+      - name: ANSIBLE_RTX_SHOW_CACHE_SIZE
+    vars:
+      - name: ansible_rtx_show_cache_size
+  profile_dir:
+    type: path
+    description:
+      - Profile the C(get_config), C(get_diff), C(edit_config) and
+        C(run_commands) calls made to the persistent connection with
+        cProfile and write the stats to this directory.  One file named
+        after the host and the task is written per task.
+    env:
+      - name: ANSIBLE_RTX_PROFILE_DIR
+    vars:
+      - name: ansible_rtx_profile_dir
+  trace_file:
+    type: path
+    description:
+      - Append trace spans for the C(get_config), C(get_diff),
+        C(edit_config) and C(run_commands) calls, the diff computation and
+        every command sent to the device to this file.  Each line is a
+        complete event of the Trace Event Format carrying the host and the
+        task uuid.
+    env:
+      - name: ANSIBLE_RTX_TRACE_FILE
+    vars:
+      - name: ansible_rtx_trace_file
 """
 
 import re
 import time
 import json
 
+from collections import OrderedDict
+from functools import wraps
 from itertools import chain
 
 from ansible.errors import AnsibleConnectionFailure
-from ansible.module_utils._text import to_text
+from ansible.module_utils._text import to_bytes, to_text
 from ansible.module_utils.common._collections_compat import Mapping
 from ansible.module_utils.six import iteritems
 from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.config import NetworkConfig, dumps
 from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.utils import to_list
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.config import filter_config, get_config_diff
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.profiling import dump_profile, profile_path
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.rtx import get_config_handle
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.tracing import Tracer, redact_command
 from ansible.plugins.cliconf import CliconfBase, enable_mode
 
 
+# number of fetched configs kept so that get_diff can refer to them by handle
+CONFIG_HANDLES = 4
+
+
+def instrumented(func):
+    """ trace the rpc method and run it under the profiler of the current
+    task, when the trace_file and profile_dir options are set
+    """
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with self._get_tracer().span('rpc', method=func.__name__):
+            profiler = self._get_profiler()
+            if profiler is None:
+                return func(self, *args, **kwargs)
+
+            self._profiling = True
+            try:
+                return profiler.runcall(func, self, *args, **kwargs)
+            finally:
+                self._profiling = False
+                dump_profile(profiler, self._profile[0])
+
+    return wrapper
+
+
 class Cliconf(CliconfBase):
 
+    def __init__(self, *args, **kwargs):
+        super(Cliconf, self).__init__(*args, **kwargs)
+        self._config_generation = 0
+        self._show_cache = OrderedDict()
+        self._running_object = None
+        self._configs = OrderedDict()
+        self._profile = None
+        self._profiling = False
+        self._model = None
+        self._save_pending = False
+        self._save_lock = None
+
+    def _get_option(self, option, default=None):
+        try:
+            return self.get_option(option)
+        except (KeyError, AttributeError):
+            return default
+
+    def _get_task(self):
+        # the task uuid of the connection is only updated by the first
+        # command of a task, a pending one is held in _check_prompt
+        task = getattr(self._connection, '_check_prompt', None) or getattr(self._connection, '_task_uuid', None)
+        host = getattr(getattr(self._connection, '_play_context', None), 'remote_addr', None)
+        return host or 'localhost', task or 'task'
+
+    def _get_tracer(self):
+        path = self._get_option('trace_file')
+        if not path:
+            return Tracer()
+        host, task = self._get_task()
+        return Tracer(path, process='connection', host=host, task=task)
+
+    def _get_profiler(self):
+        directory = self._get_option('profile_dir')
+        if not directory or self._profiling:
+            return None
+
+        path = profile_path(directory, *self._get_task())
+        if self._profile is None or self._profile[0] != path:
+            import cProfile
+            self._profile = (path, cProfile.Profile())
+        return self._profile[1]
+
+    def send_command(self, command=None, **kwargs):
+        tracer = self._get_tracer()
+        if not tracer.path:
+            return super(Cliconf, self).send_command(command, **kwargs)
+
+        with tracer.span('send_command', command=redact_command(command), bytes_out=len(to_bytes(command))) as span:
+            response = super(Cliconf, self).send_command(command, **kwargs)
+            span['bytes_in'] = len(to_bytes(response))
+        return response
+
+    def invalidate_show_cache(self):
+        self._config_generation += 1
+        self._show_cache.clear()
+
+    def _is_show_command(self, cmd):
+        if cmd.get('prompt') or cmd.get('answer') or cmd.get('sendonly') or cmd.get('newline') is False:
+            return False
+        return to_text(cmd['command']).startswith('show')
+
+    def _send_show_command(self, command):
+        ttl = self._get_option('show_cache_ttl', 0)
+        if not ttl:
+            return self.send_command(command)
+
+        now = time.time()
+        key = (command, self._config_generation)
+        entry = self._show_cache.pop(key, None)
+        if entry is None or now - entry[0] > ttl:
+            entry = (now, self.send_command(command))
+
+        # re-insert to keep the most recently used entry last
+        self._show_cache[key] = entry
+        size = self._get_option('show_cache_size', 64)
+        while len(self._show_cache) > size:
+            self._show_cache.popitem(last=False)
+
+        return entry[1]
+
+    def _get_model(self):
+        # the model does not change during the connection
+        if self._model is None:
+            self._model = self.get_device_info().get('network_os_model', '')
+        return self._model
+
+    def _get_default_config(self):
+        out = to_text(self._send_show_command('show environment'), errors='surrogate_then_replace')
+        match = re.search(r'Default config\. file:\s+config(\S+)', out)
+        if not match:
+            raise ValueError('unable to find the default config file in show environment')
+        return match.group(1)
+
+    def _get_running_object(self, running, ignore_lines=None):
+        # keep the last parsed running config so that tasks diffing
+        # against the same config do not parse it again
+        key = (running, tuple(ignore_lines or ()))
+        if self._running_object is None or self._running_object[0] != key:
+            contents = filter_config(running, ignore_lines)
+            self._running_object = (key, NetworkConfig(indent=1, contents=contents))
+        return self._running_object[1]
+
+    def _store_config(self, out):
+        # remember the config under the handle the modules compute from
+        # the text they received, see get_config_handle
+        config = to_text(out, errors='surrogate_then_replace').strip()
+        handle = get_config_handle(config)
+        self._configs.pop(handle, None)
+        self._configs[handle] = config
+        while len(self._configs) > CONFIG_HANDLES:
+            self._configs.popitem(last=False)
+
+    def _get_stored_config(self, handle):
+        try:
+            return self._configs[handle]
+        except KeyError:
+            raise ValueError("unknown running config handle %s" % handle)
+
+    @instrumented
     @enable_mode
     def get_config(self, source='running', flags=None, format=None):
         if source not in ('running', 'startup'):
@@ -61,13 +273,20 @@ class Cliconf(CliconfBase):
             flags = []
 
         cmd = 'show config '
+        if source == 'startup':
+            # the startup config is the config file the device boots with
+            cmd += self._get_default_config() + ' '
 
         cmd += ' '.join(to_list(flags))
         cmd = cmd.strip()
 
-        return self.send_command(cmd)
+        out = self._send_show_command(cmd)
+        self._store_config(out)
+        return out
 
-    def get_diff(self, candidate=None, running=None, diff_match='line', diff_ignore_lines=None, path=None, diff_replace='line'):
+    @instrumented
+    def get_diff(self, candidate=None, running=None, diff_match='line', diff_ignore_lines=None, path=None, diff_replace='line',
+                 running_handle=None, diff_defaults=True):
         """
         Generate diff between candidate and running configuration. If the
         remote host supports onbox diff capabilities ie. supports_onbox_diff in that case
@@ -95,6 +314,11 @@ class Cliconf(CliconfBase):
                         pushed to the device in configuration mode.  If the replace argument is
                         set to I(block) then the entire command block is pushed to the device in
                         configuration mode if any line is not correct.
+        :param running_handle: The handle of a configuration previously returned by get_config
+                               on this connection, used as the running configuration instead
+                               of sending it again.
+        :param diff_defaults: Leave out the candidate lines setting a command to its default value
+                              which show config does not list.
         :return: Configuration diff in  json format.
                {
                    'config_diff': '',
@@ -114,27 +338,35 @@ class Cliconf(CliconfBase):
         if diff_replace not in option_values['diff_replace']:
             raise ValueError("'replace' value %s in invalid, valid values are %s" % (diff_replace, ', '.join(option_values['diff_replace'])))
 
-        # prepare candidate configuration
-        candidate_obj = NetworkConfig(indent=1)
-        candidate_obj.load(candidate)
-
-        if running and diff_match != 'none':
-            # running configuration
-            running_obj = NetworkConfig(indent=1, contents=running, ignore_lines=diff_ignore_lines)
-            configdiffobjs = candidate_obj.difference(running_obj, path=path, match=diff_match, replace=diff_replace)
+        if running_handle:
+            running = self._get_stored_config(running_handle)
 
-        else:
-            configdiffobjs = candidate_obj.items
+        with self._get_tracer().span('diff', match=diff_match, replace=diff_replace):
+            model = None
+            if running and diff_match != 'none':
+                # running configuration
+                running = self._get_running_object(running, diff_ignore_lines)
+                # show config leaves out the commands set to their defaults
+                model = self._get_model()
 
-        diff['config_diff'] = dumps(configdiffobjs, 'commands') if configdiffobjs else ''
+            diff['config_diff'] = get_config_diff(candidate, running, diff_match=diff_match, path=path, diff_replace=diff_replace,
+                                                  model=model, diff_defaults=diff_defaults)
         return diff
 
+    @instrumented
     @enable_mode
-    def edit_config(self, candidate=None, commit=True, replace=None, comment=None):
+    def edit_config(self, candidate=None, commit=True, replace=None, comment=None, response='full'):
         resp = {}
         operations = self.get_device_operations()
         self.check_edit_config_capability(operations, candidate, commit, replace, comment)
 
+        option_values = self.get_option_values()
+        if response not in option_values['edit_config_response']:
+            raise ValueError("'response' value %s in invalid, valid values are %s"
+                             % (response, ', '.join(option_values['edit_config_response'])))
+
+        self.invalidate_show_cache()
+
         results = []
         requests = []
         if commit:
@@ -150,8 +382,16 @@ class Cliconf(CliconfBase):
         else:
             raise ValueError('check mode is not supported')
 
-        resp['request'] = requests
-        resp['response'] = results
+        # the device prints nothing for a command it accepted, so only the
+        # non-empty responses carry warnings or errors
+        if response == 'errors':
+            resp['response'] = [result for result in results if result]
+        elif response == 'summary':
+            resp['commands'] = len(requests)
+            resp['messages'] = len([result for result in results if result])
+        else:
+            resp['request'] = requests
+            resp['response'] = results
         return resp
 
     def edit_macro(self, candidate=None, commit=True, replace=None, comment=None):
@@ -159,6 +399,8 @@ class Cliconf(CliconfBase):
         operations = self.get_device_operations()
         self.check_edit_config_capability(operations, candidate, commit, replace, comment)
 
+        self.invalidate_show_cache()
+
         results = []
         requests = []
         if commit:
@@ -184,6 +426,9 @@ class Cliconf(CliconfBase):
         if output:
             raise ValueError("'output' value %s is not supported for get" % output)
 
+        if not to_text(command).startswith('show'):
+            self.invalidate_show_cache()
+
         return self.send_command(command=command, prompt=prompt, answer=answer, sendonly=sendonly, newline=newline, check_all=check_all)
 
     def get_device_info(self):
@@ -210,6 +455,31 @@ class Cliconf(CliconfBase):
 
         return device_info
 
+    def defer_save(self, lock_path=None, lock_timeout=None):
+        """ remember that the running config is to be saved by flush_save,
+        which the terminal plugin calls when the connection is closed while
+        holding the device lock at lock_path for up to lock_timeout seconds
+        """
+        self._save_pending = True
+        if lock_path:
+            self._save_lock = {'path': lock_path, 'timeout': lock_timeout}
+
+    def has_pending_save(self):
+        return self._save_pending
+
+    def get_save_lock(self):
+        return self._save_lock
+
+    @enable_mode
+    def flush_save(self):
+        """ save the running config if a task deferred saving it """
+        if not self._save_pending:
+            return {'saved': False}
+        # sent as rtx_config save_config sends it
+        self.send_command('save\r')
+        self._save_pending = False
+        return {'saved': True}
+
     def get_device_operations(self):
         return {
             'supports_diff_replace': True,
@@ -230,16 +500,18 @@ class Cliconf(CliconfBase):
             'format': ['text'],
             'diff_match': ['line', 'strict', 'exact', 'none'],
             'diff_replace': ['line', 'block'],
+            'edit_config_response': ['full', 'errors', 'summary'],
             'output': []
         }
 
     def get_capabilities(self):
         result = super(Cliconf, self).get_capabilities()
-        result['rpc'] += ['get_diff', 'run_commands']
+        result['rpc'] += ['get_diff', 'run_commands', 'defer_save', 'has_pending_save', 'flush_save']
         result['device_operations'] = self.get_device_operations()
         result.update(self.get_option_values())
         return json.dumps(result)
 
+    @instrumented
     def run_commands(self, commands=None, check_rc=True):
         if commands is None:
             raise ValueError("'commands' value is required")
@@ -253,8 +525,21 @@ class Cliconf(CliconfBase):
             if output:
                 raise ValueError("'output' value %s is not supported for run_commands" % output)
 
+            # commands reading counters ask for a fresh output
+            use_cache = cmd.pop('cache', True)
+            # the console settings the modules change and restore around
+            # every task do not invalidate the show command cache
+            session = cmd.pop('session', False)
+
             try:
-                out = self.send_command(**cmd)
+                if self._is_show_command(cmd):
+                    out = self._send_show_command(cmd['command']) if use_cache else self.send_command(**cmd)
+                else:
+                    if not session:
+                        self.invalidate_show_cache()
+                    out = self.send_command(**cmd)
+                    if to_text(cmd['command']).strip() == 'save':
+                        self._save_pending = False
             except AnsibleConnectionFailure as e:
                 if check_rc:
                     raise
@@ -0,0 +1,307 @@
+# Copyright (C) Yamaha Corporation.
+#
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import re
+
+from ansible.module_utils._text import to_text
+
+# The keywords of the configuration commands, as written by show config.
+# '*' stands for a parameter, such as an interface name, in front of
+# further keywords.  The keywords following the last one listed for a
+# command are never expanded.
+COMMANDS = (
+    'administrator password',
+    'administrator password encrypted',
+    'bgp use',
+    'bgp autonomous-system',
+    'bgp neighbor',
+    'bgp router id',
+    'bridge member',
+    'console character',
+    'console columns',
+    'console info',
+    'console lines',
+    'console prompt',
+    'description *',
+    'dhcp duplicate check',
+    'dhcp scope',
+    'dhcp scope bind',
+    'dhcp scope lease type',
+    'dhcp scope option',
+    'dhcp server rfc2131 compliant',
+    'dhcp service',
+    'dns domain',
+    'dns host',
+    'dns private address spoof',
+    'dns server',
+    'dns server pp',
+    'dns server select',
+    'dns service',
+    'dns static',
+    'httpd host',
+    'httpd service',
+    'httpd timeout',
+    'ip * address',
+    'ip * dhcp service',
+    'ip * forward filter',
+    'ip * intrusion detection',
+    'ip * mtu',
+    'ip * nat descriptor',
+    'ip * proxyarp',
+    'ip * rip send',
+    'ip * rip receive',
+    'ip * routing process',
+    'ip * secure filter in',
+    'ip * secure filter out',
+    'ip * tcp mss limit',
+    'ip filter',
+    'ip filter directed-broadcast',
+    'ip filter dynamic',
+    'ip filter set',
+    'ip filter source-route',
+    'ip icmp echo-reply send',
+    'ip icmp echo-reply send-only-linkup',
+    'ip route',
+    'ip routing',
+    'ipsec auto refresh',
+    'ipsec ike always-on',
+    'ipsec ike duration ipsec-sa',
+    'ipsec ike duration isakmp-sa',
+    'ipsec ike encryption',
+    'ipsec ike esp-encapsulation',
+    'ipsec ike group',
+    'ipsec ike hash',
+    'ipsec ike keepalive log',
+    'ipsec ike keepalive use',
+    'ipsec ike local address',
+    'ipsec ike local name',
+    'ipsec ike log',
+    'ipsec ike nat-traversal',
+    'ipsec ike payload type',
+    'ipsec ike pfs',
+    'ipsec ike pre-shared-key',
+    'ipsec ike remote address',
+    'ipsec ike remote name',
+    'ipsec ike version',
+    'ipsec ike xauth myname',
+    'ipsec sa policy',
+    'ipsec transport',
+    'ipsec transport template',
+    'ipsec tunnel',
+    'ipv6 * address',
+    'ipv6 * dhcp service',
+    'ipv6 * mtu',
+    'ipv6 * prefix change log',
+    'ipv6 * rtadv send',
+    'ipv6 * secure filter in',
+    'ipv6 * secure filter out',
+    'ipv6 filter',
+    'ipv6 filter dynamic',
+    'ipv6 prefix',
+    'ipv6 route',
+    'ipv6 routing',
+    'l2tp always-on',
+    'l2tp hostname',
+    'l2tp keepalive log',
+    'l2tp keepalive use',
+    'l2tp local router-id',
+    'l2tp remote end-id',
+    'l2tp remote router-id',
+    'l2tp service',
+    'l2tp tunnel auth',
+    'l2tp tunnel disconnect time',
+    'lan keepalive use',
+    'lan link-aggregation static',
+    'lan port-mirroring',
+    'lan shutdown',
+    'lan type',
+    'login password',
+    'login password encrypted',
+    'login timer',
+    'login user',
+    'nat descriptor address inner',
+    'nat descriptor address outer',
+    'nat descriptor masquerade incoming',
+    'nat descriptor masquerade static',
+    'nat descriptor timer',
+    'nat descriptor type',
+    'ntpdate interval',
+    'ntpdate server',
+    'ospf area',
+    'ospf import from',
+    'ospf router id',
+    'ospf use',
+    'pp always-on',
+    'pp auth accept',
+    'pp auth myname',
+    'pp auth request',
+    'pp disable',
+    'pp enable',
+    'pp keepalive interval',
+    'pp keepalive use',
+    'pp select',
+    'ppp ccp type',
+    'ppp ipcp ipaddress',
+    'ppp ipcp msext',
+    'ppp lcp mru',
+    'pppoe auto connect',
+    'pppoe auto disconnect',
+    'pppoe use',
+    'provider filter routing',
+    'schedule at',
+    'security class',
+    'sftpd host',
+    'snmp community read-only',
+    'snmp community read-write',
+    'snmp host',
+    'snmp sysname',
+    'snmp syslocation',
+    'snmp syscontact',
+    'snmp trap host',
+    'snmpv2c community read-only',
+    'snmpv2c host',
+    'snmpv2c trap host',
+    'sshd host',
+    'sshd host key generate',
+    'sshd service',
+    'switch control use',
+    'syslog debug',
+    'syslog facility',
+    'syslog host',
+    'syslog info',
+    'syslog notice',
+    'telnetd host',
+    'telnetd service',
+    'timezone',
+    'tunnel disable',
+    'tunnel enable',
+    'tunnel encapsulation',
+    'tunnel endpoint address',
+    'tunnel endpoint name',
+    'tunnel select',
+    'tunnel template',
+    'vlan * 802.1q vid',
+    'vlan port mapping',
+)
+
+# the negation of any command
+NEGATION = 'no'
+
+WILDCARD = '*'
+
+_TOKEN_RE = re.compile(r'\S+')
+
+_TRIE = None
+
+
+def _prefix_map(keywords):
+    """ map every prefix of keywords to the keyword it abbreviates; the
+    prefixes shared by several keywords map to None
+    """
+    prefixes = dict()
+    for keyword in keywords:
+        for end in range(1, len(keyword) + 1):
+            prefix = keyword[:end]
+            if prefix in prefixes and prefixes[prefix] != keyword:
+                prefixes[prefix] = None
+            else:
+                prefixes[prefix] = keyword
+    # a keyword is never an abbreviation of a longer one
+    for keyword in keywords:
+        prefixes[keyword] = keyword
+    return prefixes
+
+
+def _build(tree):
+    """ turn the nested dicts of keywords into nodes of (prefix map,
+    children, wildcard child)
+    """
+    keywords = [keyword for keyword in tree if keyword != WILDCARD]
+    children = dict((keyword, _build(tree[keyword])) for keyword in keywords)
+    wildcard = _build(tree[WILDCARD]) if WILDCARD in tree else None
+    return _prefix_map(keywords), children, wildcard
+
+
+def get_trie():
+    """ return the prefix trie of COMMANDS, built on first use """
+    global _TRIE
+    if _TRIE is None:
+        tree = dict()
+        for command in COMMANDS:
+            node = tree
+            for keyword in command.split():
+                node = node.setdefault(keyword, dict())
+        _TRIE = _build(tree)
+    return _TRIE
+
+
+def expand_line(line):
+    """ return line with its abbreviated keywords written in full.  The
+    spacing and the parameters of the line are kept as they are
+    """
+    node = get_trie()
+    parts = list()
+    last = 0
+    for index, match in enumerate(_TOKEN_RE.finditer(line)):
+        token = match.group()
+        if index == 0 and token == NEGATION:
+            continue
+
+        prefixes, children, wildcard = node
+        keyword = prefixes.get(token)
+        if keyword:
+            node = children[keyword]
+            if keyword != token:
+                parts.append(line[last:match.start()])
+                parts.append(keyword)
+                last = match.end()
+        elif wildcard and token not in prefixes:
+            node = wildcard
+        else:
+            # an ambiguous abbreviation or the parameters of the command
+            break
+
+        if not node[1] and not node[2]:
+            break
+
+    if not parts:
+        return line
+    parts.append(line[last:])
+    return ''.join(parts)
+
+
+def expand_abbreviations(text):
+    """ expand the abbreviated keywords in every line of the config text,
+    so that it compares equal to the output of show config
+    """
+    if not text:
+        return text
+    return '\n'.join(expand_line(line) for line in to_text(text).split('\n'))
@@ -0,0 +1,136 @@
+# Copyright (C) Yamaha Corporation.
+#
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import re
+
+from ansible.module_utils._text import to_text
+
+# characters that make an ignore line a regular expression rather than a
+# plain line prefix
+_METACHARACTERS = frozenset('.^$*+?{}[]\\|()')
+
+_MATCHERS = {}
+
+
+class IgnoreLines(object):
+    """ matcher for diff_ignore_lines.  Like NetworkConfig, every entry is
+    matched at the start of a line with its indentation stripped; plain
+    strings are checked as prefixes and all regular expressions are
+    combined into a single pattern
+    """
+
+    def __init__(self, patterns):
+        prefixes = list()
+        expressions = list()
+        for pattern in patterns:
+            pattern = to_text(pattern)
+            if _METACHARACTERS.intersection(pattern):
+                expressions.append(pattern)
+            else:
+                prefixes.append(pattern)
+
+        self.prefixes = tuple(prefixes)
+        self.regexes = list()
+        if expressions:
+            try:
+                self.regexes.append(re.compile('|'.join('(?:%s)' % expr for expr in expressions)))
+            except re.error:
+                # patterns with inline flags or back references can not be
+                # combined, match them one by one
+                self.regexes = [re.compile(expr) for expr in expressions]
+
+    def match(self, line):
+        line = line.strip()
+        if self.prefixes and line.startswith(self.prefixes):
+            return True
+        for regex in self.regexes:
+            if regex.match(line):
+                return True
+        return False
+
+    def filter(self, text):
+        """ return text without the lines to be ignored """
+        return '\n'.join(line for line in to_text(text).split('\n') if not self.match(line))
+
+
+def get_ignore_lines(patterns):
+    """ return the IgnoreLines matcher of patterns, compiled once per list """
+    key = tuple(patterns or ())
+    try:
+        return _MATCHERS[key]
+    except KeyError:
+        _MATCHERS[key] = matcher = IgnoreLines(key)
+        return matcher
+
+
+def filter_config(text, patterns=None):
+    """ remove the lines matching any of patterns from the config text """
+    if not patterns or not text:
+        return text
+    return get_ignore_lines(patterns).filter(text)
+
+
+def get_config_diff(candidate, running=None, diff_match='line', diff_ignore_lines=None, path=None, diff_replace='line',
+                    model=None, diff_defaults=True):
+    """ return the commands needed to bring running in line with candidate,
+    as computed by the get_diff method of the rtx cliconf plugin.  Both
+    configs may be given as text or as parsed NetworkConfig objects; the
+    ignore lines are only applied to a running config given as text.
+    Candidates given as text have their abbreviated keywords expanded and
+    the lines setting a default of model dropped, as show config leaves
+    them out unless diff_defaults is false, and are parsed as RtxConfig
+    for a minimal strict diff
+    """
+    from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.config import NetworkConfig, dumps
+    from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.abbreviation import expand_abbreviations
+    from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.defaults import drop_default_lines
+    from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.diff import RtxConfig
+
+    compare = bool(running) and diff_match != 'none'
+    if compare and not isinstance(running, NetworkConfig):
+        running = NetworkConfig(indent=1, contents=filter_config(running, diff_ignore_lines))
+
+    if isinstance(candidate, NetworkConfig):
+        candidate_obj = candidate
+    else:
+        candidate = expand_abbreviations(candidate)
+        if compare and diff_defaults:
+            candidate = drop_default_lines(candidate, running, model)
+        candidate_obj = RtxConfig(indent=1)
+        candidate_obj.load(candidate)
+
+    if compare:
+        configdiffobjs = candidate_obj.difference(running, path=path, match=diff_match, replace=diff_replace)
+
+    else:
+        configdiffobjs = candidate_obj.items
+
+    return dumps(configdiffobjs, 'commands') if configdiffobjs else ''
@@ -0,0 +1,151 @@
+# Copyright (C) Yamaha Corporation.
+#
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import re
+
+from fnmatch import fnmatchcase
+
+from ansible.module_utils._text import to_text
+
+# Commands set to their default value, which show config leaves out.  The
+# last word of an entry is the value; the other words may be patterns
+# such as '*' or 'lan*'.  A candidate line matching a wrong entry is never
+# sent, so only defaults given by the command reference of every model
+# belong here; diff_defaults turns the table off.
+DEFAULTS = (
+    'console columns 80',
+    'console lines 24',
+    'dns service recursive',
+    'httpd service on',
+    'ip filter source-route on',
+    'ip icmp echo-reply send on',
+    'ip lan* mtu 1500',
+    'ip lan* proxyarp off',
+    'ip routing on',
+    'ip * tcp mss limit off',
+    'ipsec auto refresh off',
+    'ipsec ike keepalive use * auto',
+    'ipsec ike nat-traversal * off',
+    'ipsec ike pfs * off',
+    'ipv6 routing on',
+    'login timer 300',
+    'pp always-on off',
+    'pp keepalive use off',
+    'pppoe auto connect on',
+    'pppoe auto disconnect on',
+    'sshd service on',
+    'syslog debug off',
+    'telnetd service on',
+    'tunnel encapsulation ipsec',
+)
+
+# Defaults of single models, in place of the entry of DEFAULTS for the
+# same command
+MODEL_DEFAULTS = {
+    'vRX': (
+        'telnetd service off',
+    ),
+}
+
+# the model named in the header comment of show config
+MODEL_RE = re.compile(r'^#\s*((?:RTX|NVR|FWX)\d{3,5}|vRX)\b', re.M)
+
+_DEFAULTS = {}
+
+
+def _command(entry):
+    words = entry.split()
+    return tuple(words[:-1]), words[-1]
+
+
+def get_config_model(config):
+    """ return the model the config text was read from, or None """
+    match = MODEL_RE.search(to_text(config or ''))
+    return match.group(1) if match else None
+
+
+def get_defaults(model=None):
+    """ return the defaults of model as (command patterns, value) tuples """
+    try:
+        return _DEFAULTS[model]
+    except KeyError:
+        defaults = dict(_command(entry) for entry in DEFAULTS)
+        defaults.update(_command(entry) for entry in MODEL_DEFAULTS.get(model, ()))
+        _DEFAULTS[model] = result = tuple(defaults.items())
+        return result
+
+
+def is_default(words, defaults):
+    """ return whether the words of a line set a command to its default """
+    for patterns, value in defaults:
+        if len(words) == len(patterns) + 1 and words[-1] == value and \
+                all(fnmatchcase(word, pattern) for word, pattern in zip(words, patterns)):
+            return True
+    return False
+
+
+def drop_default_lines(candidate, running, model=None):
+    """ return the candidate config text without the lines that set a
+    default value of a command that running, a parsed NetworkConfig, does
+    not have.  Such lines are left out of show config and would always
+    be found missing
+    """
+    if not candidate:
+        return candidate
+
+    # the command lines of running in each section
+    sections = dict()
+    for item in running.items:
+        sections.setdefault(tuple(item.parents), list()).append(item.text.split())
+
+    defaults = get_defaults(model)
+    lines = list()
+    parents = list()
+    for line in to_text(candidate).split('\n'):
+        words = line.split()
+        if not words:
+            lines.append(line)
+            continue
+
+        indent = len(line) - len(line.lstrip())
+        while parents and parents[-1][0] >= indent:
+            parents.pop()
+        section = tuple(text for level, text in parents)
+        parents.append((indent, ' '.join(words)))
+
+        if is_default(words, defaults):
+            command = words[:-1]
+            if not any(other[:len(command)] == command and len(other) > len(command)
+                       for other in sections.get(section, ())):
+                continue
+        lines.append(line)
+
+    return '\n'.join(lines)
@@ -0,0 +1,126 @@
+# Copyright (C) Yamaha Corporation.
+#
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.config import ConfigLine, NetworkConfig
+
+
+def common_subsequence(a, b):
+    """ return the indices of the items of a in a longest common
+    subsequence of the sequences a and b, found with the O(ND) algorithm
+    of Myers.  The time grows with the number of differences D, so a few
+    moved lines in a long list are cheap to find
+    """
+    n, m = len(a), len(b)
+
+    # the common head and tail need no search
+    head = 0
+    while head < n and head < m and a[head] == b[head]:
+        head += 1
+    end_a, end_b = n, m
+    while end_a > head and end_b > head and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    common = set(range(head))
+    common.update(range(end_a, n))
+
+    # items found in only one of the sequences are never common, leaving
+    # them out keeps D down to the number of moved items
+    shared = set(a[head:end_a]).intersection(b[head:end_b])
+    positions = [index for index in range(head, end_a) if a[index] in shared]
+    a = [a[index] for index in positions]
+    b = [item for item in b[head:end_b] if item in shared]
+    n, m = len(a), len(b)
+    if not n or not m:
+        return common
+
+    # v maps each diagonal k = x - y to the furthest x reached on it; the
+    # state before each round is kept to walk the path back afterwards
+    v = {1: 0}
+    trace = list()
+    for d in range(n + m + 1):
+        trace.append(dict(v))
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[k - 1] < v[k + 1]):
+                x = v[k + 1]
+            else:
+                x = v[k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[k] = x
+            if x >= n and y >= m:
+                break
+        else:
+            continue
+        break
+
+    x, y = n, m
+    for d in range(len(trace) - 1, -1, -1):
+        v = trace[d]
+        k = x - y
+        if k == -d or (k != d and v[k - 1] < v[k + 1]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = v[prev_k]
+        prev_y = prev_x - prev_k
+        while x > prev_x and y > prev_y:
+            x -= 1
+            y -= 1
+            common.add(positions[x])
+        x, y = prev_x, prev_y
+
+    return common
+
+
+class RtxConfig(NetworkConfig):
+    """ NetworkConfig with a minimal strict diff.  Lines out of position
+    are found through the longest common subsequence with the running
+    config, so only the lines moved or added are sent instead of every
+    line following the first difference.  As in NetworkConfig, lines only
+    found in the running config give no deletions.  The device puts a line
+    it already has back in its own place, so lines out of position are
+    found again on every run
+    """
+
+    def _diff_strict(self, other):
+        other = list(other)
+        # a block extracted from other lacks all of its parents but the
+        # last one, as in NetworkConfig
+        if other and other[0].parents:
+            for parent in other[0].parents:
+                other.insert(0, ConfigLine(parent))
+
+        ours = [str(line).strip() for line in self.items]
+        theirs = [str(line).strip() for line in other]
+        common = common_subsequence(ours, theirs)
+        return [line for index, line in enumerate(self.items) if index not in common]
@@ -0,0 +1,152 @@
+# Copyright (C) Yamaha Corporation.
+#
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import errno
+import fcntl
+import json
+import os
+import re
+import time
+
+from contextlib import contextmanager
+
+
+# the characters of a device address kept in the name of its lock file
+UNSAFE_RE = re.compile(r'[^\w.-]')
+
+# the lock file of the device, given to the modules of a locked task
+LOCK_FILE_ENV = 'ANSIBLE_RTX_LOCK_FILE'
+LOCK_TIMEOUT_ENV = 'ANSIBLE_RTX_LOCK_TIMEOUT'
+
+# the file counting the tasks which share the device and keeping the
+# console settings they put back, given to the modules of a shared task
+CONSOLE_STATE_ENV = 'ANSIBLE_RTX_CONSOLE_STATE'
+
+
+class LockTimeout(Exception):
+    pass
+
+
+def get_lock_path(lock_dir, host, port=None):
+    name = UNSAFE_RE.sub('_', '%s_%s' % (host, port) if port else host)
+    return os.path.join(lock_dir, name + '.lock')
+
+
+def get_console_state_path(lock_path):
+    return lock_path + '.console'
+
+
+@contextmanager
+def locked_state(path):
+    """ hold the JSON object in path locked while it is read and updated,
+    it is written back when the block ends without an error
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        with os.fdopen(os.dup(fd), 'r+') as f:
+            try:
+                state = json.load(f)
+            except ValueError:
+                state = dict()
+            if not isinstance(state, dict):
+                state = dict()
+            yield state
+            f.seek(0)
+            f.truncate()
+            json.dump(state, f)
+    finally:
+        # closing the file releases it
+        os.close(fd)
+
+
+class DeviceLock(object):
+    """ a lock on the controller shared by every ansible process working on
+    one device.  Shared holders run concurrently, an exclusive holder runs
+    alone.  A waiting exclusive holder keeps the gate file locked, so that
+    new shared holders queue behind it instead of starving it
+    """
+
+    def __init__(self, path, shared=False, timeout=300, interval=0.1):
+        self.path = path
+        self.shared = shared
+        self.timeout = timeout
+        self.interval = interval
+        self._fd = None
+
+    def _acquire(self, fd, operation, deadline):
+        while True:
+            try:
+                fcntl.flock(fd, operation | fcntl.LOCK_NB)
+                return
+            except (IOError, OSError) as exc:
+                if exc.errno not in (errno.EAGAIN, errno.EACCES):
+                    raise
+            if time.time() >= deadline:
+                raise LockTimeout('timed out after %s seconds waiting for the lock %s'
+                                  % (self.timeout, self.path))
+            time.sleep(self.interval)
+
+    def acquire(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError as exc:
+                if exc.errno != errno.EEXIST:
+                    raise
+
+        deadline = time.time() + self.timeout
+        gate = os.open(self.path + '.gate', os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            self._acquire(gate, fcntl.LOCK_EX, deadline)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                self._acquire(fd, fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX, deadline)
+            except Exception:
+                os.close(fd)
+                raise
+            self._fd = fd
+        finally:
+            # closing the gate releases it
+            os.close(gate)
+
+    def release(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.release()
@@ -0,0 +1,171 @@
+# Copyright (C) Yamaha Corporation.
+#
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import re
+
+# Templates for the output of common show commands.  Every rule is a tuple
+# of (kind, key, pattern, int_groups):
+#   field  - the named groups of the first matching line are stored
+#   record - every matching line is appended as a dict to the list at key
+#   values - every match of the first group is appended to the list at key
+#   sum    - the named groups of every matching line are added up
+# A template may also give a pattern of continuation lines, which are
+# matched with the label of the line above them, such as 'Received:'.
+TEMPLATES = {
+    'show_environment': {
+        'command': r'^show environment$',
+        'rules': [
+            ('field', None, r'^(?P<model>\S+) Rev\.(?P<revision>\S+)', ()),
+            ('field', None, r'serial=(?P<serial>\S+)', ()),
+            ('values', 'mac_addresses', r'MAC-Address=(\S+)', ()),
+            ('field', None, r'^CPU:\s+(?P<cpu_5sec>\d+)%\(5sec\)\s+(?P<cpu_1min>\d+)%\(1min\)\s+(?P<cpu_5min>\d+)%\(5min\)'
+                            r'\s+Memory:\s+(?P<memory>\d+)% used', ('cpu_5sec', 'cpu_1min', 'cpu_5min', 'memory')),
+            ('field', None, r'^Firmware:\s+(?P<firmware>\S+)\s+Config\. file:\s+(?P<config_file>\S+)', ()),
+            ('field', None, r'^Default firmware:\s+(?P<default_firmware>\S+)\s+Default config\. file:\s+(?P<default_config_file>\S+)', ()),
+            ('field', None, r'^Boot time:\s+(?P<boot_time>.+)$', ()),
+            ('field', None, r'^Current time:\s+(?P<current_time>.+)$', ()),
+            ('field', None, r'^Elapsed time from boot:\s+(?P<elapsed_time>.+)$', ()),
+            ('field', None, r'^Inside Temperature\(C\.\):\s+(?P<temperature>\d+)', ('temperature',)),
+        ],
+    },
+    'show_status': {
+        'command': r'^show status (lan\d+|pp \d+|tunnel \d+)$',
+        # tunnels count IPv4 and IPv6 on a line each
+        'continuation': r'^\(IPv\d\)',
+        'rules': [
+            ('field', None, r'^(?P<interface>LAN\d+|PP\[\d+\]|TUNNEL\[\d+\]):?$', ()),
+            ('field', None, r'^Description:\s*(?P<description>.*)$', ()),
+            ('field', None, r'^IP Address:\s+(?P<ip_address>\S+)', ()),
+            ('field', None, r'^Ethernet address:\s+(?P<mac_address>\S+)', ()),
+            ('field', None, r'^(?:Link status|Operation mode setting):\s+(?P<link_status>.+)$', ()),
+            ('field', None, r'^Maximum Transmission Unit\(MTU\):\s+(?P<mtu>\d+)', ('mtu',)),
+            ('field', None, r'^(?:PPPoE session status|Current status is):?\s+(?P<status>[^.]+)', ()),
+            ('sum', None, r'^Transmitted:.*?(?P<tx_packets>\d+) packets?\s*[(\[](?P<tx_octets>\d+) octets?[)\]]',
+             ('tx_packets', 'tx_octets')),
+            ('sum', None, r'^Received:.*?(?P<rx_packets>\d+) packets?\s*[(\[](?P<rx_octets>\d+) octets?[)\]]',
+             ('rx_packets', 'rx_octets')),
+        ],
+    },
+    'show_ipsec_sa': {
+        'command': r'^show ipsec sa$',
+        'rules': [
+            ('field', None, r'^Total:\s+isakmp:(?P<isakmp>\d+)\s+send:(?P<send>\d+)\s+recv:(?P<recv>\d+)',
+             ('isakmp', 'send', 'recv')),
+            ('record', 'sa', r'^(?P<sa>\d+)\s+(?P<sgw>\d+)\s+(?P<isakmp>\S+)\s+(?P<connection>\S+)\s+(?P<direction>\S+)'
+                             r'\s+(?P<life>\d+)\s+(?P<remote_id>\S+)', ('sa', 'sgw', 'life')),
+        ],
+    },
+}
+
+# the label of a line, kept for the continuation lines below it
+LABEL_RE = re.compile(r'^[^:]+:\s*')
+
+_COMPILED = {}
+
+
+def get_template(name):
+    """ return the template name with its patterns compiled; templates
+    are compiled on first use and cached for the life of the process
+    """
+    try:
+        return _COMPILED[name]
+    except KeyError:
+        template = TEMPLATES[name]
+        rules = [(kind, key, re.compile(pattern), int_groups) for kind, key, pattern, int_groups in template['rules']]
+        continuation = template.get('continuation')
+        _COMPILED[name] = compiled = (re.compile(template['command']), rules,
+                                      re.compile(continuation) if continuation else None)
+        return compiled
+
+
+def find_template(command):
+    # ignore any output pipeline such as '| grep' when looking for a template
+    command = ' '.join(command.split('|')[0].split())
+    for name in TEMPLATES:
+        if get_template(name)[0].match(command):
+            return name
+
+
+def iter_lines(text):
+    """ yield the lines of text one at a time without building a list """
+    start = 0
+    length = len(text)
+    while start < length:
+        end = text.find('\n', start)
+        if end == -1:
+            end = length
+        yield text[start:end].strip()
+        start = end + 1
+
+
+def _convert(values, int_groups):
+    for key in int_groups:
+        if values.get(key) is not None:
+            values[key] = int(values[key])
+    return values
+
+
+def parse_output(name, text):
+    """ parse the output of a show command with the template name and
+    return the result as a dict
+    """
+    rules, continuation = get_template(name)[1:]
+    parsed = dict()
+    label = ''
+    for line in iter_lines(text):
+        if not line:
+            continue
+        if continuation:
+            if continuation.match(line):
+                line = label + line
+            else:
+                match = LABEL_RE.match(line)
+                label = match.group(0) if match else ''
+        for kind, key, regex, int_groups in rules:
+            if kind == 'field':
+                match = regex.search(line)
+                if match:
+                    for field, value in _convert(match.groupdict(), int_groups).items():
+                        parsed.setdefault(field, value)
+            elif kind == 'record':
+                match = regex.match(line)
+                if match:
+                    parsed.setdefault(key, list()).append(_convert(match.groupdict(), int_groups))
+            elif kind == 'sum':
+                match = regex.search(line)
+                if match:
+                    for field, value in _convert(match.groupdict(), int_groups).items():
+                        parsed[field] = parsed.get(field, 0) + value
+            elif kind == 'values':
+                values = regex.findall(line)
+                if values:
+                    parsed.setdefault(key, list()).extend(values)
+    return parsed
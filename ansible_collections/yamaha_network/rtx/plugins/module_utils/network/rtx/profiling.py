@@ -0,0 +1,80 @@
+# Copyright (C) Yamaha Corporation.
+#
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+import re
+import time
+
+from functools import wraps
+
+# modules are profiled when this environment variable names a directory
+PROFILE_DIR_ENV = 'ANSIBLE_RTX_PROFILE_DIR'
+
+# the inventory host and the task of the module, set by the action plugin
+PROFILE_HOST_ENV = 'ANSIBLE_RTX_PROFILE_HOST'
+PROFILE_TASK_ENV = 'ANSIBLE_RTX_PROFILE_TASK'
+
+
+def profile_path(directory, *parts):
+    """ return the path of a pstats file in directory named after parts """
+    name = '-'.join(re.sub(r'[^\w.-]', '_', str(part)) for part in parts if part)
+    return os.path.join(os.path.expanduser(directory), name + '.pstats')
+
+
+def dump_profile(profiler, path):
+    directory = os.path.dirname(path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    profiler.dump_stats(path)
+
+
+def profile_main(main):
+    """ decorator for the main function of a module.  If PROFILE_DIR_ENV is
+    set, main is run under cProfile and the stats are written to that
+    directory, even when the module exits with exit_json or fail_json.
+    The file is named after the host and the task, then the module
+    """
+    @wraps(main)
+    def wrapper(*args, **kwargs):
+        directory = os.environ.get(PROFILE_DIR_ENV)
+        if not directory:
+            return main(*args, **kwargs)
+
+        import cProfile
+        profiler = cProfile.Profile()
+        name = main.__module__.split('.')[-1]
+        try:
+            return profiler.runcall(main, *args, **kwargs)
+        finally:
+            dump_profile(profiler, profile_path(directory, os.environ.get(PROFILE_HOST_ENV), os.environ.get(PROFILE_TASK_ENV),
+                                                name, time.strftime('%Y%m%d%H%M%S'), os.getpid()))
+
+    return wrapper
@@ -0,0 +1,140 @@
+# Copyright (C) Yamaha Corporation.
+#
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.rtx import load_config
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.rtx import get_console_info, set_console_info
+
+
+STATES = ['merged', 'replaced', 'overridden', 'deleted']
+
+
+def get_resource_module(entry_spec):
+    """ return the AnsibleModule of a resource module managing a list of
+    entries described by entry_spec
+    """
+    argument_spec = dict(
+        config=dict(type='list', elements='dict', options=entry_spec),
+        state=dict(choices=STATES, default='merged'),
+        batch_size=dict(type='int', default=100),
+    )
+    required_if = [('state', 'merged', ['config']),
+                   ('state', 'replaced', ['config'])]
+
+    module = AnsibleModule(argument_spec=argument_spec,
+                           required_if=required_if,
+                           supports_check_mode=True)
+
+    if module.params['batch_size'] < 1:
+        module.fail_json(msg='batch_size must be a positive number')
+
+    return module
+
+
+def get_want(module, get_key, attribute, normalize, describe):
+    """ return the entries of config keyed by get_key, with attribute
+    normalized.  attribute may only be left out when state is deleted
+    """
+    want = dict()
+    for entry in module.params['config'] or list():
+        value = entry[attribute]
+        if value is None:
+            if module.params['state'] != 'deleted':
+                module.fail_json(msg='%s is required for %s unless state is deleted' % (attribute, describe(entry)))
+        else:
+            value = normalize(value)
+        want[get_key(entry)] = value
+    return want
+
+
+def diff_table(want, have, state):
+    """ compute the keys to remove and the entries to set in one pass over
+    the wanted and the current tables
+    """
+    if state == 'deleted':
+        if want:
+            remove = [key for key in want if key in have]
+        else:
+            remove = list(have)
+        return sorted(remove), dict()
+
+    update = dict((key, value) for key, value in want.items() if have.get(key) != value)
+
+    remove = list()
+    if state == 'overridden':
+        remove = [key for key in have if key not in want]
+
+    return sorted(remove), update
+
+
+def apply_table(have, remove, update):
+    after = dict(have)
+    for key in remove:
+        del after[key]
+    after.update(update)
+    return after
+
+
+def run_resource(module, get_have, get_changes, to_entries):
+    """ read the current entries with get_have, push the commands returned
+    by get_changes and exit.  get_changes returns the commands to push in
+    a single request first, the commands to push in batches of batch_size
+    and the entries expected afterwards
+    """
+    result = {'changed': False}
+
+    warnings = list()
+    result['warnings'] = warnings
+
+    console_info = get_console_info(module)
+    set_console_info(module)
+
+    have = get_have(module)
+    removals, updates, after = get_changes(have, module.params['state'])
+    commands = removals + updates
+
+    result['before'] = to_entries(have)
+    result['commands'] = commands
+
+    if commands:
+        if not module.check_mode:
+            if removals:
+                load_config(module, removals, response='summary')
+            if updates:
+                load_config(module, updates, batch_size=module.params['batch_size'], response='summary')
+
+        result['after'] = to_entries(after)
+        result['changed'] = True
+
+    set_console_info(module, console_info)
+
+    module.exit_json(**result)
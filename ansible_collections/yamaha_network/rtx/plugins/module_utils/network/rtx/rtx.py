@@ -31,16 +31,38 @@
 from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
+import hashlib
 import json
+import os
 import re
 
-from ansible.module_utils._text import to_text
+from ansible.module_utils._text import to_bytes, to_text
 from ansible.module_utils.basic import env_fallback
-from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.utils import to_list
-from ansible.module_utils.connection import Connection, ConnectionError
+from ansible.module_utils.six import string_types
+from ansible.module_utils.connection import ConnectionError
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.lock import CONSOLE_STATE_ENV, locked_state
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.tracing import TracedConnection
 
 _DEVICE_CONFIGS = {}
 
+def to_list(val):
+    # same as to_list of netcommon, which is not imported here as loading
+    # its utils costs every module run more than the rest of this file
+    if isinstance(val, (list, tuple, set)):
+        return list(val)
+    elif val is not None:
+        return [val]
+    else:
+        return list()
+
+
+def to_lines(stdout):
+    for item in stdout:
+        if isinstance(item, string_types):
+            item = to_text(item).split('\n')
+        yield item
+
+
 def get_connection(module):
     if hasattr(module, '_rtx_connection'):
         return module._rtx_connection
@@ -48,7 +70,7 @@ def get_connection(module):
     capabilities = get_capabilities(module)
     network_api = capabilities.get('network_api')
     if network_api == 'cliconf':
-        module._rtx_connection = Connection(module._socket_path)
+        module._rtx_connection = TracedConnection(module._socket_path)
     else:
         module.fail_json(msg='Invalid connection type %s' % network_api)
 
@@ -59,7 +81,7 @@ def get_capabilities(module):
     if hasattr(module, '_rtx_capabilities'):
         return module._rtx_capabilities
     try:
-        capabilities = Connection(module._socket_path).get_capabilities()
+        capabilities = TracedConnection(module._socket_path).get_capabilities()
     except ConnectionError as exc:
         module.fail_json(msg=to_text(exc, errors='surrogate_then_replace'))
     module._rtx_capabilities = json.loads(capabilities)
@@ -96,6 +118,13 @@ def get_config(module, flags=None):
         return cfg
 
 
+def get_config_handle(config):
+    """ return the handle by which the persistent connection knows a
+    config it has returned from get_config
+    """
+    return hashlib.sha1(to_bytes(config, errors='surrogate_or_strict')).hexdigest()
+
+
 def run_commands(module, commands, check_rc=True):
     connection = get_connection(module)
     try:
@@ -104,17 +133,44 @@ def run_commands(module, commands, check_rc=True):
         module.fail_json(msg=to_text(exc))
 
 
-def load_config(module, commands):
+def load_config(module, commands, batch_size=None, response='full'):
     connection = get_connection(module)
+    commands = to_list(commands)
+
+    # push large command sets in several edit_config calls so a single
+    # request does not have to carry thousands of lines
+    if not batch_size:
+        batch_size = len(commands) or 1
 
+    responses = list()
     try:
-        resp = connection.edit_config(commands)
-        return resp.get('response')
+        for index in range(0, len(commands), batch_size):
+            resp = connection.edit_config(candidate=commands[index:index + batch_size], response=response)
+            responses.extend(resp.get('response') or [])
     except ConnectionError as exc:
         module.fail_json(msg=to_text(exc))
 
+    return responses
+
 
 def get_console_info(module):
+    """ return the console settings to put back after the task.  Tasks
+    sharing the device take the settings read by the first of them, which
+    the others may have changed on the device meanwhile
+    """
+    path = os.environ.get(CONSOLE_STATE_ENV)
+    if not path:
+        return read_console_info(module)
+
+    with locked_state(path) as state:
+        if not state.get('count') or not isinstance(state.get('console_info'), dict):
+            state['console_info'] = read_console_info(module)
+            state['count'] = 0
+        state['count'] += 1
+        return dict(state['console_info'])
+
+
+def read_console_info(module):
     console_info = {
         'character': 'no console character',
         'lines': 'no console lines',
@@ -140,27 +196,40 @@ def get_console_info(module):
 
 
 def set_console_info(module, console_info=None):
+    path = os.environ.get(CONSOLE_STATE_ENV)
+    if console_info and path:
+        # the last of the tasks sharing the device puts the settings back
+        with locked_state(path) as state:
+            state['count'] = state.get('count', 1) - 1
+            if state['count'] <= 0:
+                write_console_info(module, state.get('console_info') or console_info)
+        return
+
+    write_console_info(module, console_info)
+
+
+def write_console_info(module, console_info=None):
     try:
         if console_info:
-            run_commands(module, console_info['character'])
+            run_commands(module, {'command': console_info['character'], 'session': True})
         else:
-            run_commands(module, 'console character ascii')
+            run_commands(module, {'command': 'console character ascii', 'session': True})
     except ConnectionError as exc:
         module.fail_json(msg=to_text(exc, errors='unable to set console character'))
 
     try:
         if console_info:
-            run_commands(module, console_info['lines'])
+            run_commands(module, {'command': console_info['lines'], 'session': True})
         else:
-            run_commands(module, 'console lines infinity')
+            run_commands(module, {'command': 'console lines infinity', 'session': True})
     except ConnectionError as exshc:
         module.fail_json(msg=to_text(exc, errors='unable to set console lines'))
 
     try:
         if console_info:
-            run_commands(module, console_info['columns'])
+            run_commands(module, {'command': console_info['columns'], 'session': True})
         else:
-            run_commands(module, 'console columns 200')
+            run_commands(module, {'command': 'console columns 200', 'session': True})
     except ConnectionError as exc:
         module.fail_json(msg=to_text(exc, errors='unable to set console columns'))
 
@@ -0,0 +1,148 @@
+# Copyright (C) Yamaha Corporation.
+#
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import json
+import os
+import re
+import time
+
+from contextlib import contextmanager
+from functools import wraps
+
+from ansible.module_utils._text import to_bytes, to_text
+from ansible.module_utils.connection import Connection
+
+# spans are appended to the file named by this environment variable
+TRACE_FILE_ENV = 'ANSIBLE_RTX_TRACE_FILE'
+
+# the commands carrying a secret, the first match applies.  The part of the
+# command in the group is traced, the rest of the line is not
+SECRET_RES = tuple(re.compile(pattern) for pattern in (
+    r'\b(login\s+user\s+\S+)\s.*$',
+    r'\b(pp\s+auth\s+(?:username|myname)\s+\S+)\s.*$',
+    r'\b(ipsec\s+ike\s+xauth\s+myname\s+\S+)\s.*$',
+    r'\b(auth\s+user\s+\d+\s+\S+)\s.*$',
+    r'\b(ddns\s+server\s+user\s+\S+)\s.*$',
+    r'\b(l2tp\s+tunnel\s+auth\s+on)\s.*$',
+    r'\b(snmpv3\s+usm\s+user\s+\d+\s+\S+)\s.*$',
+    r'\b(password|pre-shared-key|secret|community)\s.*$',
+))
+
+
+class Tracer(object):
+    """ writes spans as JSON Lines in the Trace Event Format, one complete
+    ('X') event per line.  Every span carries the attributes given here in
+    addition to its own.  Without a path spans are not recorded at all
+    """
+
+    def __init__(self, path=None, **attributes):
+        self.path = path
+        self.attributes = attributes
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """ time the block as span name.  The attributes are yielded so that
+        the block can add to them
+        """
+        if not self.path:
+            yield attributes
+            return
+
+        start = time.time()
+        try:
+            yield attributes
+        finally:
+            self.emit(name, start, time.time() - start, attributes)
+
+    def emit(self, name, start, duration, attributes):
+        args = dict(self.attributes)
+        args.update(attributes)
+        event = {
+            'name': name,
+            'ph': 'X',
+            'ts': int(start * 1000000),
+            'dur': int(duration * 1000000),
+            'pid': os.getpid(),
+            'tid': 0,
+            'args': args,
+        }
+        line = to_bytes(json.dumps(event, sort_keys=True) + '\n')
+
+        path = os.path.expanduser(self.path)
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        # a single write to a file opened for appending keeps the lines of
+        # concurrent processes intact
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+
+def redact_command(command):
+    command = to_text(command, errors='surrogate_then_replace')
+    for regex in SECRET_RES:
+        redacted, count = regex.subn(r'\1 ********', command)
+        if count:
+            return redacted
+    return command
+
+
+_TRACER = None
+
+
+def get_tracer():
+    """ return the tracer of the module process, configured by TRACE_FILE_ENV """
+    global _TRACER
+    path = os.environ.get(TRACE_FILE_ENV)
+    if _TRACER is None or _TRACER.path != path:
+        _TRACER = Tracer(path, process='module')
+    return _TRACER
+
+
+def trace_main(main):
+    """ decorator for the main function of a module, traces the module run """
+    @wraps(main)
+    def wrapper(*args, **kwargs):
+        with get_tracer().span('module', module=main.__module__.split('.')[-1]):
+            return main(*args, **kwargs)
+
+    return wrapper
+
+
+class TracedConnection(Connection):
+    """ Connection tracing every JSON-RPC call made to the persistent connection """
+
+    def __rpc__(self, name, *args, **kwargs):
+        with get_tracer().span('rpc', method=name):
+            return super(TracedConnection, self).__rpc__(name, *args, **kwargs)
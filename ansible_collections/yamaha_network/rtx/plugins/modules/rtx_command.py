@@ -46,6 +46,11 @@ options:
         expired. If a command sent to the device requires answering a
         prompt, it is possible to pass a dict containing I(command),
         I(answer) and I(prompt).
+      - A dict may also contain I(filter) to filter the output on the
+        device with the C(grep) command, so that only the matching lines
+        are transferred.  The value is passed to C(grep) as is, so options
+        such as C(-v) or C(-i) may be given and patterns containing spaces
+        must be quoted.
     required: true
     type: list
     elements: raw
@@ -86,6 +91,29 @@ options:
         trying the command again.
     default: 1
     type: int
+  parser:
+    description:
+      - Parses the output of each command with one of the built-in
+        templates and returns the result in I(parsed).  If the value is
+        set to C(auto) then the template is chosen by the command, and
+        commands without a template are returned as C(null).
+    choices: ['auto', 'show_environment', 'show_status', 'show_ipsec_sa']
+    type: str
+  output_file:
+    description:
+      - Write the output of the commands to this file on the controller
+        instead of returning it in I(stdout) and I(stdout_lines).  The
+        commands are run one at a time.  The output of each command is
+        still received whole from the persistent connection, then written
+        to the file, followed by a newline, before the next command is
+        run.  So only one output is held in memory at a time, and large
+        outputs such as C(show tech-info) are left out of the result.
+        Only the position, size and SHA1 hash of each output are returned
+        in I(outputs).
+      - A relative path is relative to the directory of the playbook.
+      - The file is overwritten.  This option can not be used with
+        I(wait_for).
+    type: path
 """
 
 EXAMPLES = r"""
@@ -114,6 +142,27 @@ tasks:
         - result[0] contains RTX
         - result[1] contains address
 
+  - name: run show log and only return the lines about PPPoE
+    rtx_command:
+      commands:
+        - command: show log
+          filter: PPPoE
+
+  - name: run show commands and return the parsed output
+    rtx_command:
+      commands:
+        - show environment
+        - show status lan1
+        - show ipsec sa
+      parser: auto
+
+  - name: save diagnostics to a file on the controller
+    rtx_command:
+      commands:
+        - show tech-info
+        - show log
+      output_file: "diag/{{ inventory_hostname }}.txt"
+
   - name: run commands that require answering a prompt
     rtx_command:
       commands:
@@ -133,22 +182,70 @@ stdout_lines:
   returned: always apart from low level errors (such as action plugin)
   type: list
   sample: [['...', '...'], ['...'], ['...']]
+parsed:
+  description: The output of each command parsed with the built-in templates
+  returned: when parser is set
+  type: list
+  sample: [{'model': 'RTX1210', 'revision': '14.01.28', 'cpu_5sec': 7}]
+outputs:
+  description: The command, position in I(output_file), size in bytes and SHA1 hash
+    of the output of each command
+  returned: when output_file is set
+  type: list
+  sample: [{'command': 'show log', 'offset': 0, 'size': 1024, 'sha1': '...'}]
 failed_conditions:
   description: The list of conditionals that have failed
   returned: failed
   type: list
   sample: ['...', '...']
 """
+import hashlib
 import time
 
-from ansible.module_utils._text import to_text
+from ansible.module_utils._text import to_bytes, to_text
 from ansible.module_utils.basic import AnsibleModule
-from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.parsing import Conditional
-from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.utils import transform_commands, to_lines
-from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.rtx import run_commands
+from ansible.module_utils.six import string_types
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.rtx import run_commands, to_lines
 from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.rtx import check_args
 from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.rtx import get_console_info, set_console_info
 from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.rtx import update_console_info
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.profiling import profile_main
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.tracing import trace_main
+
+
+# the values EntityCollection gives a command passed as a plain string
+COMMAND_DEFAULTS = dict(output=None, prompt=None, answer=None, newline=True, sendonly=False, check_all=False, filter=None)
+
+
+def transform_commands(module):
+    commands = module.params['commands']
+    if all(isinstance(item, string_types) for item in commands):
+        # plain commands need no validation, skip loading EntityCollection
+        commands = [dict(COMMAND_DEFAULTS, command=item) for item in commands]
+    else:
+        from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.utils import EntityCollection
+        transform = EntityCollection(
+            module,
+            dict(
+                command=dict(key=True),
+                output=dict(),
+                prompt=dict(type='list'),
+                answer=dict(type='list'),
+                newline=dict(type='bool', default=True),
+                sendonly=dict(type='bool', default=False),
+                check_all=dict(type='bool', default=False),
+                filter=dict(),
+            ),
+        )
+        commands = transform(commands)
+
+    for item in commands:
+        # filter the output on the device instead of the controller
+        pattern = item.pop('filter')
+        if pattern:
+            item['command'] = '%s | grep %s' % (item['command'], pattern)
+
+    return commands
 
 
 def parse_commands(module, warnings):
@@ -165,6 +262,48 @@ def parse_commands(module, warnings):
     return commands
 
 
+def parse_responses(commands, responses, parser):
+    from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.parsers import find_template, parse_output
+
+    parsed = list()
+    for item, response in zip(commands, responses):
+        name = parser
+        if parser == 'auto':
+            name = find_template(item['command'])
+        parsed.append(parse_output(name, response) if name else None)
+    return parsed
+
+
+def write_outputs(module, commands, path, parser=None):
+    """ run the commands one at a time and write each output to path
+    before the next command is run; only the metadata of the outputs is
+    kept
+    """
+    outputs = list()
+    parsed = list()
+    offset = 0
+    try:
+        with open(path, 'wb') as f:
+            for item in commands:
+                response = run_commands(module, [item])[0]
+                if parser:
+                    parsed.extend(parse_responses([item], [response], parser))
+
+                data = to_bytes(response, errors='surrogate_then_replace')
+                f.write(data)
+                f.write(b'\n')
+                outputs.append(dict(command=item['command'], offset=offset, size=len(data),
+                                    sha1=hashlib.sha1(data).hexdigest()))
+                offset += len(data) + 1
+                del response, data
+    except (IOError, OSError) as exc:
+        module.fail_json(msg='unable to write %s: %s' % (path, to_text(exc)))
+
+    return outputs, parsed
+
+
+@trace_main
+@profile_main
 def main():
     """main entry point for module execution
     """
@@ -173,10 +312,12 @@ def main():
         wait_for=dict(type='list', elements="str", aliases=['waitfor']),
         match=dict(default='all', choices=['all', 'any']),
         retries=dict(default=10, type='int'),
-        interval=dict(default=1, type='int')
+        interval=dict(default=1, type='int'),
+        parser=dict(choices=['auto', 'show_environment', 'show_status', 'show_ipsec_sa']),
+        output_file=dict(type='path'),
     )
     module = AnsibleModule(
-        argument_spec=argument_spec, supports_check_mode=True
+        argument_spec=argument_spec, mutually_exclusive=[('output_file', 'wait_for')], supports_check_mode=True
     )
 
     warnings = list()
@@ -185,18 +326,33 @@ def main():
     commands = parse_commands(module, warnings)
     wait_for = module.params['wait_for'] or list()
 
-    try:
-        conditionals = [Conditional(c) for c in wait_for]
-    except AttributeError as exc:
-        module.fail_json(msg=to_text(exc))
+    conditionals = list()
+    if wait_for:
+        from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.parsing import Conditional
+        try:
+            conditionals = [Conditional(c) for c in wait_for]
+        except AttributeError as exc:
+            module.fail_json(msg=to_text(exc))
 
     retries = module.params['retries']
     interval = module.params['interval']
     match = module.params['match']
 
+    if conditionals:
+        # every pass has to read the device again, not the show command cache
+        commands = [dict(item, cache=False) for item in commands]
+
     console_info = get_console_info(module)
     set_console_info(module)
 
+    if module.params['output_file']:
+        outputs, parsed = write_outputs(module, commands, module.params['output_file'], module.params['parser'])
+        set_console_info(module, update_console_info(module.params['commands'], console_info))
+        result.update({'output_file': module.params['output_file'], 'outputs': outputs})
+        if module.params['parser']:
+            result['parsed'] = parsed
+        module.exit_json(**result)
+
     while retries > 0:
         responses = run_commands(module, commands)
 
@@ -226,6 +382,9 @@ def main():
         'stdout_lines': list(to_lines(responses)),
     })
 
+    if module.params['parser']:
+        result['parsed'] = parse_responses(commands, responses, module.params['parser'])
+
     module.exit_json(**result)
 
 
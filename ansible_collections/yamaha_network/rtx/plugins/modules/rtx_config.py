@@ -37,7 +37,10 @@ description:
   - This module provides an implementation for manage the configuration
     of Yamaha RTX/NVR/FWX/vRX devices in a deterministic way.
 notes:
-  - Abbreviated commands are NOT idempotent, see
+  - Abbreviated keywords in I(lines), I(parents) and I(src) are written in
+    full before the comparison with the running config, as long as the
+    abbreviation is unique.  Commands the module does not know are
+    compared as they are and are NOT idempotent when abbreviated, see
     L(Network FAQ,../network/user_guide/faq.html#why-do-the-config-modules-always-return-changed-true-with-abbreviated-commands).
 options:
   lines:
@@ -89,8 +92,14 @@ options:
         the set of commands against the current device config.  If
         match is set to I(line), commands are matched line by line.  If
         match is set to I(strict), command lines are matched with respect
-        to position.  If match is set to I(exact), command lines
-        must be an equal match.  Finally, if match is set to I(none), the
+        to position and only the lines moved or missing are sent; lines
+        of the running configuration absent from the source are not
+        removed, so any C(no) commands must be part of the source.  The
+        device keeps its own order of the lines it has, so a line sent
+        again for its position stays where it is and strict matching
+        does not converge for reordered lines: they are sent and the task
+        reports a change on every run.  If match is set to I(exact),
+        command lines must be an equal match.  Finally, if match is set to I(none), the
         module will not attempt to compare the source configuration with
         the running configuration on the remote device.
     choices: ['line', 'strict', 'exact', 'none']
@@ -138,9 +147,42 @@ options:
         config will never be copied to the default config.  If the
         argument is set to I(changed), then the running config will only
         be copied to the default config if the task has made a change.
+        If the argument is set to I(modified), then the running config
+        will only be copied to the default config if it differs from the
+        default config, whichever task made the change.  The configs are
+        compared by their SHA1 fingerprints, ignoring I(diff_ignore_lines).
+        If the argument is set to I(deferred) and the task has made a
+        change, the running config is copied to the default config only
+        once, when the persistent connection to the device is closed at
+        the end of the play or by C(meta: reset_connection), however many
+        tasks changed it.  With C(ansible_rtx_lock_dir) the save waits for
+        the lock of the device like a task changing the config.  The save
+        on closing cannot fail the play, its errors such as a lock timeout
+        only reach the log of the persistent connection; a later task with
+        I(save_when) set to I(always) saves the deferred changes at once,
+        reporting any error, and leaves nothing to save on closing.
     default: never
-    choices: ['always', 'never', 'changed']
+    choices: ['always', 'never', 'changed', 'modified', 'deferred']
     type: str
+  slot:
+    description:
+      - Write the configuration given in I(src) as a whole to this config
+        slot of the device instead of changing the running config.  The
+        slot is read back and compared with I(src), then it is made the
+        default config with C(set-default-config), so that the device
+        starts with it on its next restart.
+      - The slot must not be the current default config.  Nothing is
+        changed when the slot already holds I(src) and is the default.
+      - The file transfer uses SFTP; the SFTP server of the device must be
+        enabled.  This argument is mutually exclusive with I(save_when)
+        other than I(never).
+      - C(save) writes the running config to the default config, so any
+        save on this connection after staging, by a later task with
+        I(save_when) or by a deferred save when the connection closes,
+        overwrites the staged config.  The task fails while a deferred
+        save is pending; save it first with I(save_when=always).
+    type: int
+    choices: [0, 1, 2, 3, 4]
   diff_against:
     description:
       - When using the C(ansible-playbook --diff) command line argument
@@ -161,6 +203,14 @@ options:
         a list of regular expressions or exact line matches.
     type: list
     elements: str
+  diff_defaults:
+    description:
+      - Whether lines setting a command to its default value, which
+        C(show config) does not list, count as present when the running
+        config lacks the command.  Turn it off if a change is never sent
+        because the module takes it for a default of the device.
+    type: bool
+    default: yes
   intended_config:
     description:
       - The C(intended_config) provides the master configuration that
@@ -221,6 +271,21 @@ EXAMPLES = """
       - login
     intended_config: "{{ lookup('file', 'master.cfg') }}"
 
+- name: stage a full config in slot 1 and make it the default config
+  rtx_config:
+    src: rtx_template.j2
+    slot: 1
+
+- name: save the changes of several tasks once, when the connection closes
+  rtx_config:
+    lines:
+      - ip lan1 address 192.168.100.1/24
+    save_when: deferred
+
+- name: save the deferred changes now, failing on any error
+  rtx_config:
+    save_when: always
+
 - name: configurable backup path
   rtx_config:
     src: rtx_template.j2
@@ -268,15 +333,22 @@ time:
   sample: "12:24:48"
 """
 import json
+import os
+import re
+import tempfile
 
-from ansible.module_utils._text import to_text
+from ansible.module_utils._text import to_bytes, to_text
 from ansible.module_utils.connection import ConnectionError
 from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.rtx import run_commands, get_config
-from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.rtx import get_connection
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.rtx import get_connection, get_config_handle
 from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.rtx import get_console_info, set_console_info
 from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.rtx import update_console_info
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.config import filter_config, get_config_diff
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.abbreviation import expand_abbreviations, expand_line
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.lock import LOCK_FILE_ENV, LOCK_TIMEOUT_ENV
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.profiling import profile_main
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.tracing import get_tracer, trace_main
 from ansible.module_utils.basic import AnsibleModule
-from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.config import NetworkConfig, dumps
 
 
 def edit_config_or_macro(connection, commands):
@@ -285,7 +357,7 @@ def edit_config_or_macro(connection, commands):
     if commands[0].startswith("macro"):
         connection.edit_macro(candidate=commands)
     else:
-        connection.edit_config(candidate=commands)
+        connection.edit_config(candidate=commands, response='summary')
 
 
 def get_candidate_config(module):
@@ -294,12 +366,32 @@ def get_candidate_config(module):
         candidate = module.params['src']
 
     elif module.params['lines']:
+        from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.config import NetworkConfig, dumps
         candidate_obj = NetworkConfig(indent=1)
         parents = module.params['parents'] or list()
         candidate_obj.add(module.params['lines'], parents=parents)
         candidate = dumps(candidate_obj, 'raw')
 
-    return candidate
+    # abbreviated keywords never match show config and would be sent again
+    return expand_abbreviations(candidate)
+
+
+_CONFIG_OBJECTS = {}
+
+
+def get_config_object(contents, ignore_lines=None):
+    """ return the parsed config object of contents and its sha1.  Each
+    config text is parsed only once, so a running config that did not
+    change is not parsed again for the _diff output
+    """
+    key = (contents, tuple(ignore_lines or ()))
+    try:
+        return _CONFIG_OBJECTS[key]
+    except KeyError:
+        from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.config import NetworkConfig
+        config = NetworkConfig(indent=1, contents=filter_config(contents, ignore_lines))
+        _CONFIG_OBJECTS[key] = (config, config.sha1)
+        return _CONFIG_OBJECTS[key]
 
 
 def get_running_config(module, current_config=None, flags=None):
@@ -313,6 +405,40 @@ def get_running_config(module, current_config=None, flags=None):
     return running
 
 
+# the console settings every task changes for its own session
+CONSOLE_RE = re.compile(r'^console (character|lines|columns) ')
+
+
+def restore_console_lines(config, console_info):
+    """ return config read while the console settings of the task were in
+    effect as it reads once they are put back to console_info
+    """
+    lines = list()
+    for line in to_text(config, errors='surrogate_then_replace').splitlines():
+        match = CONSOLE_RE.match(line)
+        if match:
+            line = console_info[match.group(1)]
+            if line.startswith('no '):
+                continue
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def is_modified(module, connection, running=None):
+    """ return whether the running config differs from the startup config """
+    ignore_lines = module.params['diff_ignore_lines']
+    try:
+        if running is None:
+            running = connection.get_config(source='running')
+        startup = connection.get_config(source='startup')
+    except ConnectionError as exc:
+        module.fail_json(msg=to_text(exc, errors='surrogate_then_replace'))
+
+    running_sha1 = get_config_object(to_text(running, errors='surrogate_then_replace').strip(), ignore_lines)[1]
+    startup_sha1 = get_config_object(to_text(startup, errors='surrogate_then_replace').strip(), ignore_lines)[1]
+    return running_sha1 != startup_sha1
+
+
 def save_config(module, result):
     result['changed'] = True
     if not module.check_mode:
@@ -323,6 +449,94 @@ def save_config(module, result):
                     'non-volatile storage')
 
 
+def get_default_slot(module):
+    from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.parsers import parse_output
+
+    environment = parse_output('show_environment', run_commands(module, 'show environment')[0])
+    match = re.match(r'config(\d+)', environment.get('default_config_file') or '')
+    if not match:
+        module.fail_json(msg='unable to find the default config in show environment')
+    return int(match.group(1))
+
+
+def read_slot(connection, slot):
+    """ return the config stored in slot, None if it cannot be read """
+    fd, path = tempfile.mkstemp()
+    os.close(fd)
+    try:
+        connection.get_file(source='/config%d' % slot, destination=path, proto='sftp')
+        with open(path, 'rb') as f:
+            return to_text(f.read(), errors='surrogate_then_replace')
+    except ConnectionError:
+        return None
+    finally:
+        os.remove(path)
+
+
+def write_slot(connection, slot, config):
+    fd, path = tempfile.mkstemp()
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(to_bytes(config, errors='surrogate_then_replace'))
+        connection.copy_file(source=path, destination='/config%d' % slot, proto='sftp')
+    finally:
+        os.remove(path)
+
+
+def slot_matches(candidate, stored, ignore_lines=None):
+    if stored is None:
+        return False
+    stored = filter_config(stored, ignore_lines)
+    candidate = filter_config(candidate, ignore_lines)
+    return not get_config_diff(candidate, stored) and not get_config_diff(stored, candidate)
+
+
+def stage_config(module, connection, result):
+    """ write src to the config slot, verify it and make it the default """
+    slot = module.params['slot']
+    candidate = module.params['src']
+    ignore_lines = module.params['diff_ignore_lines']
+    tracer = get_tracer()
+
+    # the deferred save would write the running config over the slot
+    try:
+        pending = connection.has_pending_save()
+    except ConnectionError as exc:
+        module.fail_json(msg=to_text(exc, errors='surrogate_then_replace'))
+    if pending:
+        module.fail_json(msg='a deferred save is pending on this connection and would overwrite config%d, '
+                             'save it with save_when=always first' % slot)
+
+    default = get_default_slot(module)
+    with tracer.span('slot_read', slot=slot):
+        stored = read_slot(connection, slot)
+    if slot_matches(candidate, stored, ignore_lines):
+        if default == slot:
+            return
+    elif default == slot:
+        module.fail_json(msg='config%d is the default config, choose another slot' % slot)
+    else:
+        if not module.check_mode:
+            try:
+                with tracer.span('slot_write', slot=slot):
+                    write_slot(connection, slot, candidate)
+                    stored = read_slot(connection, slot)
+            except ConnectionError as exc:
+                module.fail_json(msg=to_text(exc, errors='surrogate_then_replace'))
+            if not slot_matches(candidate, stored, ignore_lines):
+                module.fail_json(msg='config%d read back from the device does not match src' % slot)
+
+    result['commands'] = result['updates'] = ['set-default-config %d' % slot]
+    result['changed'] = True
+    if not module.check_mode:
+        try:
+            connection.edit_config(candidate=result['commands'], response='summary')
+        except ConnectionError as exc:
+            module.fail_json(msg=to_text(exc, errors='surrogate_then_replace'))
+
+
+@trace_main
+@profile_main
 def main():
     """ main entry point for module execution
     """
@@ -347,13 +561,17 @@ def main():
 
         backup=dict(type='bool', default=False),
         backup_options=dict(type='dict', options=backup_spec),
-        save_when=dict(choices=['always', 'never', 'changed'], default='never'),
+        save_when=dict(choices=['always', 'never', 'changed', 'modified', 'deferred'], default='never'),
 
         diff_against=dict(choices=['intended', 'running']),
         diff_ignore_lines=dict(type='list', elements="str"),
+        diff_defaults=dict(type='bool', default=True),
+
+        slot=dict(type='int', choices=[0, 1, 2, 3, 4]),
     )
     mutually_exclusive = [('lines', 'src'),
-                          ('parents', 'src')]
+                          ('parents', 'src'),
+                          ('lines', 'slot')]
 
     required_if = [('match', 'strict', ['lines']),
                    ('match', 'exact', ['lines']),
@@ -363,16 +581,20 @@ def main():
     module = AnsibleModule(argument_spec=argument_spec,
                            mutually_exclusive=mutually_exclusive,
                            required_if=required_if,
+                           required_by=dict(slot=['src']),
                            supports_check_mode=True)
 
+    if module.params['slot'] is not None and module.params['save_when'] != 'never':
+        module.fail_json(msg='save_when must be never when slot is set')
+
     result = {'changed': False}
 
     warnings = list()
     result['warnings'] = warnings
 
     diff_ignore_lines = module.params['diff_ignore_lines']
-    config = None
     contents = None
+    before = None
     flags = []
     connection = get_connection(module)
 
@@ -380,26 +602,43 @@ def main():
     set_console_info(module)
 
     if module.params['backup'] or (module._diff and module.params['diff_against'] == 'running'):
-        contents = get_config(module, flags=flags)
-        config = NetworkConfig(indent=1, contents=contents)
+        contents = before = get_config(module, flags=flags)
         if module.params['backup']:
             result['__backup__'] = contents
 
-    if any((module.params['lines'], module.params['src'])):
+    if module.params['slot'] is not None:
+        stage_config(module, connection, result)
+
+    elif any((module.params['lines'], module.params['src'])):
         match = module.params['match']
         replace = module.params['replace']
         path = module.params['parents']
+        if path:
+            path = [expand_line(parent) for parent in path]
 
         candidate = get_candidate_config(module)
         running = get_running_config(module, contents, flags=flags)
+        if not module.params['running_config']:
+            before = running
         if module.params['lines']:
             console_info = update_console_info(module.params['lines'], console_info)
         elif module.params['src']:
             console_info = update_console_info(module.params['src'], console_info)
 
+        diff_args = dict(candidate=candidate, diff_match=match, diff_ignore_lines=diff_ignore_lines, path=path, diff_replace=replace,
+                         diff_defaults=module.params['diff_defaults'])
         try:
-            response = connection.get_diff(candidate=candidate, running=running, diff_match=match, diff_ignore_lines=diff_ignore_lines, path=path,
-                                           diff_replace=replace)
+            if module.params['running_config']:
+                response = connection.get_diff(running=running, **diff_args)
+            else:
+                # the connection still holds the config it just returned,
+                # refer to it instead of sending it back
+                try:
+                    response = connection.get_diff(running_handle=get_config_handle(running), **diff_args)
+                except ConnectionError as exc:
+                    if 'running config handle' not in to_text(exc):
+                        raise
+                    response = connection.get_diff(running=running, **diff_args)
         except ConnectionError as exc:
             module.fail_json(msg=to_text(exc, errors='surrogate_then_replace'))
 
@@ -426,9 +665,21 @@ def main():
             result['changed'] = True
 
     running_config = module.params['running_config']
-    if not running_config:
-        output = run_commands(module, 'show config')
-        running_config = output[0]
+    if module._diff and not running_config:
+        if before is not None and not (result['changed'] and not module.check_mode):
+            # nothing was sent to the device, reuse the config read before
+            running_config = before
+        else:
+            output = run_commands(module, 'show config')
+            running_config = output[0]
+
+    # the config on the device as it is now, if it has been read already
+    current = None
+    if not module.params['running_config']:
+        if module._diff:
+            current = running_config
+        elif before is not None and not (result['changed'] and not module.check_mode):
+            current = before
 
     set_console_info(module, console_info)
 
@@ -438,30 +689,37 @@ def main():
     elif module.params['save_when'] == 'changed' and result['changed']:
         save_config(module, result)
 
-    if module._diff:
-        contents = running_config
-
-        # recreate the object in order to process diff_ignore_lines
-        running_config = NetworkConfig(indent=1, contents=contents, ignore_lines=diff_ignore_lines)
-
-        if module.params['diff_against'] == 'running':
-            if module.check_mode:
-                module.warn("unable to perform diff against running-config due to check mode")
-                contents = None
-            else:
-                contents = config.config_text
-
-        elif module.params['diff_against'] == 'intended':
-            contents = module.params['intended_config']
+    elif module.params['save_when'] == 'modified' and is_modified(
+            module, connection, current and restore_console_lines(current, console_info)):
+        save_config(module, result)
 
-        if contents is not None:
-            base_config = NetworkConfig(indent=1, contents=contents, ignore_lines=diff_ignore_lines)
+    elif module.params['save_when'] == 'deferred' and result['changed'] and not module.check_mode:
+        lock_timeout = os.environ.get(LOCK_TIMEOUT_ENV)
+        connection.defer_save(lock_path=os.environ.get(LOCK_FILE_ENV),
+                              lock_timeout=float(lock_timeout) if lock_timeout else None)
 
-            if running_config.sha1 != base_config.sha1:
-                result.update({
-                    'changed': True,
-                    'diff': {'before': str(base_config), 'after': str(running_config)}
-                })
+    if module._diff:
+        with get_tracer().span('diff', diff_against=module.params['diff_against']):
+            running_obj, running_sha1 = get_config_object(running_config, diff_ignore_lines)
+            base = None
+
+            if module.params['diff_against'] == 'running':
+                if module.check_mode:
+                    module.warn("unable to perform diff against running-config due to check mode")
+                else:
+                    base = contents
+
+            elif module.params['diff_against'] == 'intended':
+                base = module.params['intended_config']
+
+            if base is not None:
+                base_obj, base_sha1 = get_config_object(base, diff_ignore_lines)
+
+                if running_sha1 != base_sha1:
+                    result.update({
+                        'changed': True,
+                        'diff': {'before': str(base_obj), 'after': str(running_obj)}
+                    })
 
     module.exit_json(**result)
 
@@ -0,0 +1,145 @@
+#!/usr/bin/python
+#
+# Copyright (C) Yamaha Corporation.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <https://www.gnu.org/licenses/gpl-3.0.txt>.
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+
+DOCUMENTATION = """
+---
+module: rtx_drift_report
+version_added: "1.1.0"
+authors:
+  - Yamaha Corporation
+short_description: Report configuration drift of Yamaha RTX/NVR/FWX/vRX devices from backups.
+description:
+  - This module compares the configuration backups of many Yamaha
+    RTX/NVR/FWX/vRX devices with their intended configurations and writes
+    a single report of the differences.
+  - The comparison runs entirely on the controller, no device is contacted.
+    The differences are computed in a pool of worker processes with the
+    same rules as M(rtx_config) uses to decide which lines to send.
+    Abbreviated keywords of the intended configuration are expanded, and
+    its lines setting a default of the model named in the backup are not
+    expected in the backup.
+notes:
+  - This module is implemented as an action plugin and always runs on the
+    controller.  Run it once, for example with C(run_once) or against
+    C(localhost).
+options:
+  backup_dir:
+    description:
+      - The directory containing the configuration backups, as written by
+        the I(backup) option of M(rtx_config).  A backup is expected to be
+        named C(<hostname>_config.<timestamp>); the newest backup of each
+        host is used.
+    type: path
+    required: true
+  intended_dir:
+    description:
+      - The directory containing the intended configuration of each host,
+        named C(<hostname>) followed by I(intended_suffix).
+    type: path
+    required: true
+  intended_suffix:
+    description:
+      - The file name suffix of the intended configurations.
+    type: str
+    default: .cfg
+  hosts:
+    description:
+      - Limit the report to these hosts.  By default every host with an
+        intended configuration is reported.
+    type: list
+    elements: str
+  dest:
+    description:
+      - The file the report is written to, in JSON format.
+    type: path
+    required: true
+  match:
+    description:
+      - How the lines of the intended configuration are matched against
+        the backup, see the I(match) option of M(rtx_config).
+    type: str
+    choices: ['line', 'strict', 'exact']
+    default: line
+  replace:
+    description:
+      - How differing lines within a section are reported, see the
+        I(replace) option of M(rtx_config).
+    type: str
+    choices: ['line', 'block']
+    default: line
+  diff_ignore_lines:
+    description:
+      - Lines to ignore during the comparison, given as regular
+        expressions or plain line prefixes.  They are left out of both the
+        backups and the intended configs.
+    type: list
+    elements: str
+  diff_defaults:
+    description:
+      - Whether intended lines setting a command to its default value,
+        which C(show config) does not list, count as present in a backup
+        lacking the command, as in C(rtx_config).
+    type: bool
+    default: yes
+  workers:
+    description:
+      - The number of worker processes.  Defaults to the number of CPUs of
+        the controller.  C(1) compares all hosts in the controller process.
+    type: int
+"""
+
+EXAMPLES = """
+- name: report drift of all routers from the golden configs
+  rtx_drift_report:
+    backup_dir: backup
+    intended_dir: golden
+    dest: reports/drift.json
+    diff_ignore_lines:
+      - 'ntpdate'
+  run_once: yes
+  delegate_to: localhost
+"""
+
+RETURN = """
+dest:
+  description: The report file
+  returned: always
+  type: str
+  sample: reports/drift.json
+summary:
+  description: The number of hosts per status; a host is I(in_sync), has I(drift),
+    has I(no_backup) or could not be compared because of an I(error)
+  returned: always
+  type: dict
+  sample: {'in_sync': 10, 'drift': 2, 'no_backup': 1, 'error': 0}
+drifted:
+  description: The hosts whose backup differs from the intended configuration
+  returned: always
+  type: list
+  sample: ['rtx1', 'rtx2']
+"""
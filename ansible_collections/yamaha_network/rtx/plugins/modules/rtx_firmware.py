@@ -0,0 +1,346 @@
+#!/usr/bin/python
+#
+# Copyright (C) Yamaha Corporation.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <https://www.gnu.org/licenses/gpl-3.0.txt>.
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+
+DOCUMENTATION = """
+---
+module: rtx_firmware
+version_added: "1.1.0"
+authors:
+  - Yamaha Corporation
+short_description: Update the firmware of Yamaha RTX/NVR/FWX/vRX devices over SFTP.
+description:
+  - This module uploads a firmware image to Yamaha RTX/NVR/FWX/vRX devices
+    over SFTP and applies it with I(apply_command).
+  - Nothing is uploaded when the revision of the device already matches
+    I(version).
+  - The image is uploaded in chunks to I(dest).  An upload interrupted
+    earlier is resumed from the size of the partial file on the device.
+    The uploaded file is read back and its SHA256 checksum compared with
+    the image before it is applied; if a resumed upload does not match, the
+    image is uploaded once more from the start.
+requirements:
+  - paramiko
+notes:
+  - The SFTP server of the device must be enabled, for example with
+    C(sftpd host).
+  - I(host), I(port), I(username), I(password) and I(ssh_keyfile) default
+    to the values of the C(network_cli) connection of the task.
+  - The device keeps running the current firmware until it is restarted.
+options:
+  src:
+    description:
+      - The firmware image on the controller.  A relative path is looked
+        up in the C(files) directory of the role or playbook.
+    type: path
+    required: true
+  version:
+    description:
+      - The revision of the firmware image, such as C(14.01.38).
+    type: str
+    required: true
+  checksum:
+    description:
+      - The expected SHA256 checksum of I(src).  The module fails without
+        contacting the device when the image does not match.
+    type: str
+  dest:
+    description:
+      - The path on the SFTP server of the device the image is uploaded to,
+        for example a file on the external memory.
+    type: str
+    required: true
+  apply_command:
+    description:
+      - The command applying the uploaded image.  C({dest}) is replaced
+        with I(dest).  The confirmation prompt of the device, such as
+        C((Y/N)), is answered with C(y).
+    type: str
+    default: copy exec {dest} 0
+  chunk_size:
+    description:
+      - The size in bytes of each write to the SFTP server.
+    type: int
+    default: 32768
+  host:
+    description:
+      - The address of the SFTP server.
+    type: str
+  port:
+    description:
+      - The port of the SFTP server.
+    type: int
+    default: 22
+  username:
+    description:
+      - The user to log in to the SFTP server with.
+    type: str
+  password:
+    description:
+      - The password to log in to the SFTP server with.
+    type: str
+  ssh_keyfile:
+    description:
+      - The private key to log in to the SFTP server with.
+    type: path
+  host_key_checking:
+    description:
+      - Whether the host key of the device must already be known.
+    type: bool
+    default: true
+"""
+
+EXAMPLES = """
+- name: update the firmware of RTX1210
+  rtx_firmware:
+    src: rtx1210.bin
+    version: 14.01.38
+    checksum: "{{ rtx1210_sha256 }}"
+    dest: /sd1/rtx1210.bin
+"""
+
+RETURN = """
+commands:
+  description: The command sent to the device to apply the image
+  returned: when the image is applied
+  type: list
+  sample: ['copy exec /sd1/rtx1210.bin 0']
+version:
+  description: The revision of the device before the update
+  returned: always
+  type: str
+  sample: 14.01.28
+sha256:
+  description: The SHA256 checksum of the image
+  returned: always
+  type: str
+  sample: 5e884898da28047151d0e56f8dc6292773603d0d6aabbdd62a11ef721d1542d8
+resumed:
+  description: The offset the upload was resumed from, 0 when it started from the beginning
+  returned: when the image is uploaded
+  type: int
+  sample: 1048576
+transferred:
+  description: The number of bytes uploaded
+  returned: when the image is uploaded
+  type: int
+  sample: 3145728
+"""
+import hashlib
+import os
+import re
+import traceback
+
+from ansible.module_utils._text import to_native, to_text
+from ansible.module_utils.basic import AnsibleModule, missing_required_lib
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.rtx import run_commands, get_capabilities
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.profiling import profile_main
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.tracing import get_tracer, trace_main
+
+
+REVISION_RE = re.compile(r'(?:Rev\.)?(\d+(?:\.\d+)+)')
+
+# the confirmation copy exec asks for before it overwrites the firmware
+APPLY_PROMPT = r'\(Y/N\)'
+
+
+def get_revision(version):
+    match = REVISION_RE.search(version or '')
+    return match.group(1) if match else None
+
+
+def file_sha256(f, chunk_size):
+    """ return the SHA256 checksum of the file object f, read in chunks """
+    digest = hashlib.sha256()
+    for data in iter(lambda: f.read(chunk_size), b''):
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def open_sftp(module):
+    """ log in to the SFTP server of the device, paramiko is only
+    required by this module and loaded here
+    """
+    try:
+        import paramiko
+    except ImportError:
+        module.fail_json(msg=missing_required_lib('paramiko'), exception=traceback.format_exc())
+
+    params = module.params
+    client = paramiko.SSHClient()
+    client.load_system_host_keys()
+    if not params['host_key_checking']:
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    try:
+        client.connect(params['host'], port=params['port'], username=params['username'],
+                       password=params['password'], key_filename=params['ssh_keyfile'],
+                       allow_agent=False, look_for_keys=False)
+        return client, client.open_sftp()
+    except (paramiko.SSHException, EnvironmentError) as exc:
+        client.close()
+        module.fail_json(msg='unable to open SFTP session to %s: %s' % (params['host'], to_text(exc)))
+
+
+def remote_size(sftp, path):
+    try:
+        return sftp.stat(path).st_size
+    except IOError:
+        return 0
+
+
+def upload(sftp, src, dest, size, chunk_size, offset=0):
+    """ copy src to dest from offset on, appending to a partial dest """
+    with open(src, 'rb') as local:
+        local.seek(offset)
+        remote = sftp.open(dest, 'ab' if offset else 'wb')
+        try:
+            remote.set_pipelined(True)
+            while offset < size:
+                data = local.read(chunk_size)
+                if not data:
+                    break
+                remote.write(data)
+                offset += len(data)
+        finally:
+            remote.close()
+    return offset
+
+
+def remote_sha256(sftp, path, chunk_size):
+    remote = sftp.open(path, 'rb')
+    try:
+        remote.prefetch()
+        return file_sha256(remote, chunk_size)
+    finally:
+        remote.close()
+
+
+def transfer(module, sftp, size, sha256):
+    """ upload the image to the device, resuming a partial upload, and
+    verify it.  Return the offset resumed from and the bytes sent
+    """
+    src = module.params['src']
+    dest = module.params['dest']
+    chunk_size = module.params['chunk_size']
+    tracer = get_tracer()
+
+    offset = remote_size(sftp, dest)
+    if offset > size:
+        offset = 0
+
+    resumed = offset
+    transferred = 0
+    while True:
+        with tracer.span('upload', offset=offset, size=size):
+            transferred += upload(sftp, src, dest, size, chunk_size, offset) - offset
+        with tracer.span('verify', size=size):
+            verified = remote_sha256(sftp, dest, chunk_size) == sha256
+        if verified:
+            return resumed, transferred
+        if not offset:
+            module.fail_json(msg='checksum of %s on the device does not match %s' % (dest, src),
+                             resumed=resumed, transferred=transferred)
+        # the partial file belonged to another image
+        offset = 0
+
+
+@trace_main
+@profile_main
+def main():
+    """ main entry point for module execution
+    """
+    argument_spec = dict(
+        src=dict(type='path', required=True),
+        version=dict(required=True),
+        checksum=dict(),
+        dest=dict(required=True),
+        apply_command=dict(default='copy exec {dest} 0'),
+        chunk_size=dict(type='int', default=32768),
+        host=dict(),
+        port=dict(type='int', default=22),
+        username=dict(),
+        password=dict(no_log=True),
+        ssh_keyfile=dict(type='path'),
+        host_key_checking=dict(type='bool', default=True),
+    )
+
+    module = AnsibleModule(argument_spec=argument_spec,
+                           supports_check_mode=True)
+
+    result = {'changed': False}
+
+    warnings = list()
+    result['warnings'] = warnings
+
+    src = module.params['src']
+    version = get_revision(module.params['version'])
+    if not version:
+        module.fail_json(msg='invalid version %s' % module.params['version'])
+    if module.params['chunk_size'] < 1:
+        module.fail_json(msg='chunk_size must be a positive number')
+
+    try:
+        size = os.path.getsize(src)
+        with open(src, 'rb') as f:
+            sha256 = file_sha256(f, 1024 * 1024)
+    except (IOError, OSError) as exc:
+        module.fail_json(msg='unable to read %s: %s' % (src, to_text(exc)))
+    result['sha256'] = sha256
+
+    checksum = module.params['checksum']
+    if checksum and checksum.lower() != sha256:
+        module.fail_json(msg='checksum of %s does not match: %s' % (src, sha256), sha256=sha256)
+
+    device_info = get_capabilities(module).get('device_info', {})
+    result['version'] = get_revision(device_info.get('network_os_version'))
+    if result['version'] == version:
+        module.exit_json(**result)
+
+    result['changed'] = True
+    if module.check_mode:
+        module.exit_json(**result)
+
+    if not module.params['host']:
+        module.fail_json(msg='host is required to upload the image')
+
+    client, sftp = open_sftp(module)
+    try:
+        result['resumed'], result['transferred'] = transfer(module, sftp, size, sha256)
+    except (IOError, OSError) as exc:
+        module.fail_json(msg='unable to upload %s: %s' % (src, to_native(exc)), **result)
+    finally:
+        sftp.close()
+        client.close()
+
+    result['commands'] = [module.params['apply_command'].format(dest=module.params['dest'])]
+    run_commands(module, [{'command': result['commands'][0], 'prompt': APPLY_PROMPT, 'answer': 'y'}])
+
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
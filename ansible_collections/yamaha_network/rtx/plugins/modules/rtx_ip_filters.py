@@ -0,0 +1,203 @@
+#!/usr/bin/python
+#
+# Copyright (C) Yamaha Corporation.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <https://www.gnu.org/licenses/gpl-3.0.txt>.
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+
+DOCUMENTATION = """
+---
+module: rtx_ip_filters
+version_added: "1.1.0"
+authors:
+  - Yamaha Corporation
+short_description: Manage IP filters on Yamaha RTX/NVR/FWX/vRX devices.
+description:
+  - This module manages the C(ip filter) and C(ip filter dynamic) entries
+    of Yamaha RTX/NVR/FWX/vRX devices declaratively.
+  - The filter table of the device is read once, the commands required to
+    reach the requested state are computed in a single pass and pushed to
+    the device in batches.
+notes:
+  - Only numbered filters are managed.  Global settings such as
+    C(ip filter source-route) are left untouched.
+options:
+  config:
+    description:
+      - The list of IP filters.
+    type: list
+    elements: dict
+    suboptions:
+      filter_id:
+        description:
+          - The filter number.
+        type: int
+        required: true
+      dynamic:
+        description:
+          - Set to I(yes) to manage the C(ip filter dynamic) entry of
+            I(filter_id) instead of the static C(ip filter) entry.
+        type: bool
+        default: 'no'
+      rule:
+        description:
+          - The filter definition following the filter number, for example
+            C(pass * * tcp * www) or C(* * ftp).  Required unless I(state)
+            is I(deleted).
+        type: str
+  state:
+    description:
+      - The state the filters should be left in.
+      - I(merged) adds the given filters and updates those whose rule differs.
+      - I(replaced) replaces the rule of each given filter.  As every filter
+        is a single line this is the same as I(merged).
+      - I(overridden) makes the given filters the only filters on the device
+        and removes every other numbered filter.
+      - I(deleted) removes the given filters, or every numbered filter if
+        I(config) is omitted.
+    type: str
+    choices: ['merged', 'replaced', 'overridden', 'deleted']
+    default: merged
+  batch_size:
+    description:
+      - The maximum number of commands sent to the device per request,
+        at least 1.
+    type: int
+    default: 100
+"""
+
+EXAMPLES = """
+- name: merge filters
+  rtx_ip_filters:
+    config:
+      - filter_id: 100
+        rule: pass * * tcp * www
+      - filter_id: 100
+        dynamic: yes
+        rule: '* * www'
+
+- name: make the given filters the only filters on the device
+  rtx_ip_filters:
+    config: "{{ acl_filters }}"
+    state: overridden
+
+- name: delete filters
+  rtx_ip_filters:
+    config:
+      - filter_id: 100
+    state: deleted
+"""
+
+RETURN = """
+before:
+  description: The filters on the device prior to module execution
+  returned: always
+  type: list
+  sample: [{'filter_id': 100, 'dynamic': False, 'rule': 'pass * * tcp * www'}]
+after:
+  description: The filters on the device after module execution
+  returned: when changed
+  type: list
+  sample: [{'filter_id': 100, 'dynamic': False, 'rule': 'pass * * tcp * www'}]
+commands:
+  description: The set of commands pushed to the remote device
+  returned: always
+  type: list
+  sample: ['no ip filter 101', 'ip filter 100 pass * * tcp * www']
+"""
+import re
+
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.rtx import get_config
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.resource import get_resource_module, get_want, run_resource
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.resource import diff_table, apply_table
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.profiling import profile_main
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.tracing import trace_main
+
+
+FILTER_RE = re.compile(r'^ip filter (dynamic )?(\d+) (.+)$')
+
+
+def filter_key(entry):
+    return (entry['dynamic'], entry['filter_id'])
+
+
+def filter_command(key, rule=None):
+    dynamic, filter_id = key
+    cmd = 'ip filter dynamic %d' % filter_id if dynamic else 'ip filter %d' % filter_id
+    if rule is None:
+        return 'no %s' % cmd
+    return '%s %s' % (cmd, rule)
+
+
+def normalize_rule(rule):
+    return ' '.join(rule.split())
+
+
+def parse_filters(config):
+    """ parse the filter lines of config into a dict keyed by
+    (dynamic, filter_id)
+    """
+    filters = dict()
+    for line in config.splitlines():
+        match = FILTER_RE.match(line.strip())
+        if match:
+            key = (bool(match.group(1)), int(match.group(2)))
+            filters[key] = normalize_rule(match.group(3))
+    return filters
+
+
+def to_entries(filters):
+    return [dict(filter_id=key[1], dynamic=key[0], rule=filters[key]) for key in sorted(filters)]
+
+
+def get_changes(want, have, state):
+    remove, update = diff_table(want, have, state)
+    commands = [filter_command(key) for key in remove]
+    commands.extend(filter_command(key, update[key]) for key in sorted(update))
+    return list(), commands, apply_table(have, remove, update)
+
+
+@trace_main
+@profile_main
+def main():
+    """ main entry point for module execution
+    """
+    filter_spec = dict(
+        filter_id=dict(type='int', required=True),
+        dynamic=dict(type='bool', default=False),
+        rule=dict(),
+    )
+    module = get_resource_module(filter_spec)
+
+    want = get_want(module, filter_key, 'rule', normalize_rule,
+                    lambda entry: 'filter %d' % entry['filter_id'])
+
+    run_resource(module,
+                 lambda module: parse_filters(get_config(module, flags=['| grep filter'])),
+                 lambda have, state: get_changes(want, have, state),
+                 to_entries)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,279 @@
+#!/usr/bin/python
+#
+# Copyright (C) Yamaha Corporation.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <https://www.gnu.org/licenses/gpl-3.0.txt>.
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+
+DOCUMENTATION = """
+---
+module: rtx_log
+version_added: "1.1.0"
+authors:
+  - Yamaha Corporation
+short_description: Collect new log entries from Yamaha RTX/NVR/FWX/vRX devices.
+description:
+  - This module reads the log of Yamaha RTX/NVR/FWX/vRX devices with
+    C(show log) and returns only the entries added since the previous run.
+  - The position reached is kept in a cursor file on the controller, made
+    of the timestamp and the SHA1 hash of the newest entry returned and
+    the number of identical entries with that timestamp up to it.  The
+    log is scanned backwards from its end and the scan stops at the
+    timestamp of the cursor, so only the new entries are parsed.
+notes:
+  - The whole output of C(show log) is still read from the device on
+    every run, only the parsing is incremental.
+  - If the entry of the cursor has already been dropped from the log
+    buffer of the device, every entry newer than the cursor is returned.
+  - Relative paths are relative to the directory of the playbook.
+options:
+  cursor_file:
+    description:
+      - The file on the controller the cursor of the device is read from
+        and written to.  Use a separate file for each device, for example
+        by including C(inventory_hostname).  Without a cursor file the
+        whole log is returned.
+    type: path
+  dest:
+    description:
+      - Append the new entries to this file on the controller instead of
+        returning them in I(records).
+    type: path
+  dest_format:
+    description:
+      - The format the entries are written to I(dest) in.  I(raw) writes the
+        log lines as they are, I(json) writes one JSON record per line.
+    type: str
+    choices: ['raw', 'json']
+    default: raw
+"""
+
+EXAMPLES = """
+- name: collect the log entries added since the previous run
+  rtx_log:
+    cursor_file: "cursor/{{ inventory_hostname }}.json"
+  register: log
+
+- name: append new entries to a file per device
+  rtx_log:
+    cursor_file: "cursor/{{ inventory_hostname }}.json"
+    dest: "logs/{{ inventory_hostname }}.log"
+"""
+
+RETURN = """
+records:
+  description: The new log entries, oldest first
+  returned: when dest is not set
+  type: list
+  sample: [{'timestamp': '2020/04/01 12:00:00', 'message': 'PP[01] PPPoE Connect'}]
+entries:
+  description: The number of new log entries
+  returned: always
+  type: int
+  sample: 1
+cursor:
+  description: The timestamp and SHA1 hash of the newest log entry returned so far and
+    the number of identical entries with that timestamp up to it
+  returned: when there is a log entry or a cursor
+  type: dict
+  sample: {'timestamp': '2020/04/01 12:00:00', 'sha1': '...', 'count': 1}
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+from ansible.module_utils._text import to_bytes, to_text
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.rtx import run_commands
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.rtx import get_console_info, set_console_info
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.profiling import profile_main
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.tracing import trace_main
+
+
+LOG_RE = re.compile(r'^(\d{4}/\d{2}/\d{2} \d{2}:\d{2}:\d{2}):\s*(.*)$')
+
+
+def line_hash(line):
+    return hashlib.sha1(to_bytes(line, errors='surrogate_then_replace')).hexdigest()
+
+
+def iter_lines_reversed(text):
+    """ yield the lines of text from the last to the first without
+    splitting the whole text
+    """
+    end = len(text)
+    while end > 0:
+        start = text.rfind('\n', 0, end) + 1
+        yield text[start:end].rstrip('\r')
+        end = start - 1
+
+
+def scan_lines(log, cursor=None):
+    """ return the log lines not older than the timestamp of cursor,
+    oldest first
+    """
+    lines = list()
+    for line in iter_lines_reversed(log):
+        match = LOG_RE.match(line)
+        if not match:
+            continue
+        # the timestamps compare in time order as strings
+        if cursor and match.group(1) < cursor['timestamp']:
+            break
+        lines.append(line)
+    lines.reverse()
+    return lines
+
+
+def new_entries(lines, cursor=None):
+    """ return the lines returned by scan_lines which are newer than
+    cursor.  Identical lines are told apart by the count of the cursor
+    """
+    if not cursor:
+        return lines
+
+    positions = [index for index, line in enumerate(lines)
+                 if line.startswith(cursor['timestamp']) and line_hash(line) == cursor['sha1']]
+    if not positions:
+        # the entry of the cursor has been dropped from the log buffer
+        return lines
+
+    count = cursor.get('count')
+    if count and count <= len(positions):
+        return lines[positions[count - 1] + 1:]
+    return lines[positions[-1] + 1:]
+
+
+def iter_records(entries):
+    for line in entries:
+        match = LOG_RE.match(line)
+        yield dict(timestamp=match.group(1), message=match.group(2))
+
+
+def get_cursor(lines):
+    """ return the cursor of the last line of lines, which hold every line
+    with its timestamp
+    """
+    line = lines[-1]
+    return dict(timestamp=LOG_RE.match(line).group(1), sha1=line_hash(line), count=lines.count(line))
+
+
+def read_cursor(path, warnings):
+    try:
+        with open(path, 'r') as f:
+            cursor = json.load(f)
+        if cursor.get('timestamp') and cursor.get('sha1') and isinstance(cursor.get('count', 1), int):
+            return cursor
+    except (IOError, OSError):
+        return None
+    except (ValueError, AttributeError):
+        pass
+    warnings.append('ignoring the invalid cursor file %s' % path)
+    return None
+
+
+def write_cursor(module, path, cursor):
+    directory = os.path.dirname(path) or '.'
+    try:
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        fd, tmp = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(cursor, f)
+        os.rename(tmp, path)
+    except (IOError, OSError) as exc:
+        module.fail_json(msg='unable to write cursor file %s: %s' % (path, to_text(exc)))
+
+
+def write_entries(module, path, entries, dest_format):
+    try:
+        with open(path, 'ab') as f:
+            if dest_format == 'json':
+                lines = (json.dumps(record, sort_keys=True) for record in iter_records(entries))
+            else:
+                lines = iter(entries)
+            for line in lines:
+                f.write(to_bytes(line, errors='surrogate_then_replace') + b'\n')
+    except (IOError, OSError) as exc:
+        module.fail_json(msg='unable to write %s: %s' % (path, to_text(exc)))
+
+
+@trace_main
+@profile_main
+def main():
+    """ main entry point for module execution
+    """
+    argument_spec = dict(
+        cursor_file=dict(type='path'),
+        dest=dict(type='path'),
+        dest_format=dict(choices=['raw', 'json'], default='raw'),
+    )
+
+    module = AnsibleModule(argument_spec=argument_spec,
+                           supports_check_mode=True)
+
+    result = {'changed': False}
+
+    warnings = list()
+    result['warnings'] = warnings
+
+    cursor_file = module.params['cursor_file']
+    dest = module.params['dest']
+    cursor = read_cursor(cursor_file, warnings) if cursor_file else None
+
+    console_info = get_console_info(module)
+    set_console_info(module)
+
+    log = to_text(run_commands(module, 'show log')[0], errors='surrogate_then_replace')
+
+    set_console_info(module, console_info)
+
+    lines = scan_lines(log, cursor)
+    del log
+
+    entries = new_entries(lines, cursor)
+    if entries:
+        cursor = get_cursor(lines)
+        result['changed'] = bool(cursor_file or dest)
+
+    result['entries'] = len(entries)
+    if cursor:
+        result['cursor'] = cursor
+
+    if dest:
+        if entries and not module.check_mode:
+            write_entries(module, dest, entries, module.params['dest_format'])
+    else:
+        result['records'] = list(iter_records(entries))
+
+    if cursor_file and entries and not module.check_mode:
+        write_cursor(module, cursor_file, cursor)
+
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
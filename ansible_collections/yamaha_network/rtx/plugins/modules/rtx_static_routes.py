@@ -0,0 +1,204 @@
+#!/usr/bin/python
+#
+# Copyright (C) Yamaha Corporation.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <https://www.gnu.org/licenses/gpl-3.0.txt>.
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+
+DOCUMENTATION = """
+---
+module: rtx_static_routes
+version_added: "1.1.0"
+authors:
+  - Yamaha Corporation
+short_description: Manage static routes on Yamaha RTX/NVR/FWX/vRX devices.
+description:
+  - This module manages the C(ip route) entries of Yamaha RTX/NVR/FWX/vRX
+    devices declaratively.
+  - The routes of the device are read once into a table keyed by the
+    destination network and the difference to the requested routes is
+    computed with set operations.
+options:
+  config:
+    description:
+      - The list of static routes.
+    type: list
+    elements: dict
+    suboptions:
+      dest:
+        description:
+          - The destination network, for example C(192.168.10.0/24) or
+            C(default).
+        type: str
+        required: true
+      gateways:
+        description:
+          - The gateways of the route.  Each entry is the text following
+            the C(gateway) keyword, for example C(192.168.0.1 metric 2) or
+            C(pp 1).  Required unless I(state) is I(deleted).
+        type: list
+        elements: str
+  state:
+    description:
+      - The state the routes should be left in.
+      - I(merged) adds the given routes and updates those whose gateways differ.
+      - I(replaced) replaces the gateways of each given route.  As every
+        route is a single line this is the same as I(merged).
+      - I(overridden) makes the given routes the only static routes on the
+        device.  Stale routes are removed in a single request.
+      - I(deleted) removes the given routes, or every static route if
+        I(config) is omitted.
+    type: str
+    choices: ['merged', 'replaced', 'overridden', 'deleted']
+    default: merged
+  batch_size:
+    description:
+      - The maximum number of commands sent to the device per request
+        when adding routes, at least 1.
+    type: int
+    default: 100
+"""
+
+EXAMPLES = """
+- name: merge static routes
+  rtx_static_routes:
+    config:
+      - dest: default
+        gateways:
+          - pp 1
+      - dest: 10.0.0.0/8
+        gateways:
+          - 192.168.0.1 metric 2
+          - 192.168.0.2 hide
+
+- name: make the IPAM routes the only static routes on the device
+  rtx_static_routes:
+    config: "{{ ipam_routes }}"
+    state: overridden
+
+- name: delete a static route
+  rtx_static_routes:
+    config:
+      - dest: 10.0.0.0/8
+    state: deleted
+"""
+
+RETURN = """
+before:
+  description: The static routes on the device prior to module execution
+  returned: always
+  type: list
+  sample: [{'dest': 'default', 'gateways': ['pp 1']}]
+after:
+  description: The static routes on the device after module execution
+  returned: when changed
+  type: list
+  sample: [{'dest': 'default', 'gateways': ['pp 1']}]
+commands:
+  description: The set of commands pushed to the remote device
+  returned: always
+  type: list
+  sample: ['no ip route 10.0.0.0/8', 'ip route default gateway pp 1']
+"""
+import re
+
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.rtx import get_config
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.resource import get_resource_module, get_want, run_resource
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.resource import diff_table, apply_table
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.profiling import profile_main
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.tracing import trace_main
+
+
+ROUTE_RE = re.compile(r'^ip route (\S+) gateway (.+)$')
+GATEWAY_SPLIT_RE = re.compile(r'\s+gateway\s+')
+
+
+def normalize_dest(dest):
+    # the device shows the default route and host routes in short form
+    if dest in ('0.0.0.0/0', '0.0.0.0/0.0.0.0'):
+        return 'default'
+    if dest.endswith('/32'):
+        return dest[:-3]
+    return dest
+
+
+def normalize_gateways(gateways):
+    return tuple(' '.join(gateway.split()) for gateway in gateways)
+
+
+def route_command(dest, gateways=None):
+    if gateways is None:
+        return 'no ip route %s' % dest
+    return 'ip route %s %s' % (dest, ' '.join('gateway %s' % gateway for gateway in gateways))
+
+
+def parse_routes(config):
+    """ parse the ip route lines of config into a dict keyed by
+    the destination network
+    """
+    routes = dict()
+    for line in config.splitlines():
+        match = ROUTE_RE.match(line.strip())
+        if match:
+            gateways = GATEWAY_SPLIT_RE.split(match.group(2))
+            routes[normalize_dest(match.group(1))] = normalize_gateways(gateways)
+    return routes
+
+
+def to_entries(routes):
+    return [dict(dest=dest, gateways=list(routes[dest])) for dest in sorted(routes)]
+
+
+def get_changes(want, have, state):
+    """ stale routes are removed in a single request, the other routes
+    are set in batches
+    """
+    remove, update = diff_table(want, have, state)
+    removals = [route_command(dest) for dest in remove]
+    updates = [route_command(dest, update[dest]) for dest in sorted(update)]
+    return removals, updates, apply_table(have, remove, update)
+
+
+@trace_main
+@profile_main
+def main():
+    """ main entry point for module execution
+    """
+    route_spec = dict(
+        dest=dict(required=True),
+        gateways=dict(type='list', elements='str'),
+    )
+    module = get_resource_module(route_spec)
+
+    want = get_want(module, lambda entry: normalize_dest(entry['dest']), 'gateways', normalize_gateways,
+                    lambda entry: 'route %s' % entry['dest'])
+
+    run_resource(module,
+                 lambda module: parse_routes(get_config(module, flags=['| grep route'])),
+                 lambda have, state: get_changes(want, have, state),
+                 to_entries)
+
+
+if __name__ == '__main__':
+    main()
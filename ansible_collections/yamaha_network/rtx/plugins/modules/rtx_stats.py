@@ -0,0 +1,225 @@
+#!/usr/bin/python
+#
+# Copyright (C) Yamaha Corporation.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <https://www.gnu.org/licenses/gpl-3.0.txt>.
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+
+DOCUMENTATION = """
+---
+module: rtx_stats
+version_added: "1.1.0"
+authors:
+  - Yamaha Corporation
+short_description: Collect interface counters from Yamaha RTX/NVR/FWX/vRX devices.
+description:
+  - This module reads the status of LAN, PP and tunnel interfaces of Yamaha
+    RTX/NVR/FWX/vRX devices and returns their packet and octet counters as
+    numbers.  The counters cover IPv4 and IPv6 together; tunnels, which
+    show them on a line each, have the two added up.
+  - The devices have no command showing the counters of several
+    interfaces at once, so one C(show status) command is sent for each
+    interface.  The commands are sent in a single request to the persistent
+    connection and always read fresh counters, bypassing the C(show)
+    command cache of the connection.
+  - With I(state_file) the counters are kept on the controller and the
+    difference to the previous sample is returned along with them.
+notes:
+  - A counter lower than in the previous sample, for example after a
+    restart of the device, is taken to have started again from zero.
+  - Relative paths are relative to the directory of the playbook.
+options:
+  interfaces:
+    description:
+      - The interfaces to read, such as C(lan1), C(pp 1) or C(tunnel 1).
+    type: list
+    elements: str
+    required: true
+  state_file:
+    description:
+      - The file on the controller the previous sample of the device is
+        read from and the current sample is written to.  Use a separate
+        file for each device, for example by including
+        C(inventory_hostname).
+    type: path
+"""
+
+EXAMPLES = """
+- name: poll the counters of the uplink and the tunnels
+  rtx_stats:
+    interfaces:
+      - lan2
+      - pp 1
+      - tunnel 1
+      - tunnel 2
+    state_file: "stats/{{ inventory_hostname }}.json"
+  register: stats
+
+- debug:
+    msg: "{{ stats.interfaces['pp 1'].delta.rx_octets * 8 / stats.interval }} bps"
+  when: stats.interval is defined
+"""
+
+RETURN = """
+interfaces:
+  description: The status of each interface; the counter differences to the
+    previous sample are in I(delta) when there is one
+  returned: always
+  type: dict
+  sample: {'lan2': {'interface': 'LAN2', 'tx_packets': 120345, 'tx_octets': 98765432,
+           'rx_packets': 230456, 'rx_octets': 187654321,
+           'delta': {'tx_packets': 345, 'tx_octets': 65432, 'rx_packets': 456, 'rx_octets': 54321}}}
+interval:
+  description: The seconds elapsed since the previous sample
+  returned: when there is a previous sample
+  type: float
+  sample: 60.02
+"""
+import json
+import os
+import re
+import tempfile
+import time
+
+from ansible.module_utils._text import to_text
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.rtx import run_commands
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.rtx import get_console_info, set_console_info
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.parsers import parse_output
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.profiling import profile_main
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.tracing import trace_main
+
+
+INTERFACE_RE = re.compile(r'^(lan|pp|tunnel)\s*(\d+)$', re.IGNORECASE)
+
+COUNTERS = ('tx_packets', 'tx_octets', 'rx_packets', 'rx_octets')
+
+
+def parse_interfaces(module):
+    """ return the names of the interfaces in a canonical form, dropping
+    duplicates
+    """
+    names = list()
+    for interface in module.params['interfaces']:
+        match = INTERFACE_RE.match(interface.strip())
+        if not match:
+            module.fail_json(msg='unsupported interface %s' % interface)
+        kind, number = match.group(1).lower(), match.group(2)
+        name = kind + number if kind == 'lan' else '%s %s' % (kind, number)
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def get_delta(current, previous):
+    delta = dict()
+    for counter in COUNTERS:
+        if current.get(counter) is None or previous.get(counter) is None:
+            continue
+        value = current[counter] - previous[counter]
+        delta[counter] = value if value >= 0 else current[counter]
+    return delta
+
+
+def read_sample(path, warnings):
+    try:
+        with open(path, 'r') as f:
+            sample = json.load(f)
+        if isinstance(sample.get('timestamp'), (int, float)) and isinstance(sample.get('counters'), dict):
+            return sample
+    except (IOError, OSError):
+        return None
+    except (ValueError, AttributeError):
+        pass
+    warnings.append('ignoring the invalid state file %s' % path)
+    return None
+
+
+def write_sample(module, path, sample):
+    directory = os.path.dirname(path) or '.'
+    try:
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        fd, tmp = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(sample, f)
+        os.rename(tmp, path)
+    except (IOError, OSError) as exc:
+        module.fail_json(msg='unable to write state file %s: %s' % (path, to_text(exc)))
+
+
+@trace_main
+@profile_main
+def main():
+    """ main entry point for module execution
+    """
+    argument_spec = dict(
+        interfaces=dict(type='list', elements='str', required=True),
+        state_file=dict(type='path'),
+    )
+
+    module = AnsibleModule(argument_spec=argument_spec,
+                           supports_check_mode=True)
+
+    result = {'changed': False}
+
+    warnings = list()
+    result['warnings'] = warnings
+
+    names = parse_interfaces(module)
+    state_file = module.params['state_file']
+    previous = read_sample(state_file, warnings) if state_file else None
+
+    console_info = get_console_info(module)
+    set_console_info(module)
+
+    commands = [{'command': 'show status %s' % name, 'cache': False} for name in names]
+    responses = run_commands(module, commands)
+    timestamp = time.time()
+
+    set_console_info(module, console_info)
+
+    interfaces = dict()
+    for name, response in zip(names, responses):
+        interfaces[name] = parse_output('show_status', to_text(response, errors='surrogate_then_replace'))
+
+    counters = dict((name, dict((counter, status.get(counter)) for counter in COUNTERS))
+                    for name, status in interfaces.items())
+
+    if previous:
+        result['interval'] = timestamp - previous['timestamp']
+        for name, status in interfaces.items():
+            if name in previous['counters']:
+                status['delta'] = get_delta(counters[name], previous['counters'][name])
+
+    result['interfaces'] = interfaces
+
+    if state_file and not module.check_mode:
+        write_sample(module, state_file, dict(timestamp=timestamp, counters=counters))
+
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/python
+#
+# Copyright (C) Yamaha Corporation.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <https://www.gnu.org/licenses/gpl-3.0.txt>.
+#
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+
+DOCUMENTATION = """
+---
+module: rtx_tunnels
+version_added: "1.1.0"
+authors:
+  - Yamaha Corporation
+short_description: Manage tunnel interfaces on Yamaha RTX/NVR/FWX/vRX devices.
+description:
+  - This module manages the C(tunnel select) sections of Yamaha
+    RTX/NVR/FWX/vRX devices, such as IPsec or L2TP tunnels, declaratively.
+  - The tunnel sections of the device are read once and indexed by tunnel
+    number.  The changes for every given tunnel are computed in one task
+    and pushed grouped by C(tunnel select) context.
+options:
+  config:
+    description:
+      - The list of tunnels.
+    type: list
+    elements: dict
+    suboptions:
+      tunnel_id:
+        description:
+          - The tunnel number.
+        type: int
+        required: true
+      lines:
+        description:
+          - The ordered set of commands entered after C(tunnel select) for
+            this tunnel.  The commands must be the exact same commands as
+            found in the device config.  Required unless I(state) is
+            I(deleted).
+        type: list
+        elements: str
+  state:
+    description:
+      - The state the tunnels should be left in.
+      - I(merged) adds the given commands to each tunnel.
+      - I(replaced) makes the given commands the only commands of each
+        given tunnel.
+      - I(overridden) replaces the given tunnels and removes the commands
+        of every other tunnel.
+      - I(deleted) removes the commands of the given tunnels, or of every
+        tunnel if I(config) is omitted.
+    type: str
+    choices: ['merged', 'replaced', 'overridden', 'deleted']
+    default: merged
+  batch_size:
+    description:
+      - The maximum number of commands sent to the device per request,
+        at least 1.
+    type: int
+    default: 100
+"""
+
+EXAMPLES = """
+- name: provision IPsec tunnels
+  rtx_tunnels:
+    config:
+      - tunnel_id: 1
+        lines:
+          - ipsec tunnel 101
+          - ipsec sa policy 101 1 esp aes-cbc sha-hmac
+          - ipsec ike remote address 1 203.0.113.1
+          - tunnel enable 1
+      - tunnel_id: 2
+        lines:
+          - tunnel encapsulation l2tpv3
+          - tunnel enable 2
+
+- name: replace the tunnels of a VPN hub
+  rtx_tunnels:
+    config: "{{ hub_tunnels }}"
+    state: replaced
+"""
+
+RETURN = """
+before:
+  description: The tunnels on the device prior to module execution
+  returned: always
+  type: list
+  sample: [{'tunnel_id': 1, 'lines': ['ipsec tunnel 101', 'tunnel enable 1']}]
+after:
+  description: The tunnels on the device after module execution
+  returned: when changed
+  type: list
+  sample: [{'tunnel_id': 1, 'lines': ['ipsec tunnel 101', 'tunnel enable 1']}]
+commands:
+  description: The set of commands pushed to the remote device
+  returned: always
+  type: list
+  sample: ['tunnel select 1', 'ipsec tunnel 101', 'tunnel enable 1', 'tunnel select none']
+"""
+import re
+
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.rtx import get_config
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.resource import get_resource_module, get_want, run_resource
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.profiling import profile_main
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.tracing import trace_main
+
+
+TUNNEL_SELECT_RE = re.compile(r'^tunnel select (\d+)\s*$')
+
+
+def normalize_line(line):
+    return ' '.join(line.split())
+
+
+def parse_tunnels(config):
+    """ parse the tunnel select sections of config into a dict of
+    command lists keyed by tunnel number
+    """
+    tunnels = dict()
+    lines = None
+    for line in config.splitlines():
+        if not line.strip():
+            continue
+        if not line[0].isspace():
+            match = TUNNEL_SELECT_RE.match(line)
+            lines = tunnels.setdefault(int(match.group(1)), list()) if match else None
+        elif lines is not None:
+            lines.append(normalize_line(line))
+    return tunnels
+
+
+def to_entries(tunnels):
+    return [dict(tunnel_id=tunnel_id, lines=list(tunnels[tunnel_id])) for tunnel_id in sorted(tunnels)]
+
+
+def diff_tunnels(want, have, state):
+    """ compute the lines to remove and to add per tunnel number
+    """
+    changes = dict()
+
+    if state == 'deleted':
+        for tunnel_id in (want or have):
+            if have.get(tunnel_id):
+                changes[tunnel_id] = (list(have[tunnel_id]), list())
+        return changes
+
+    for tunnel_id, lines in want.items():
+        current = have.get(tunnel_id, list())
+        existing = set(current)
+        add = [line for line in lines if line not in existing]
+
+        remove = list()
+        if state in ('replaced', 'overridden'):
+            wanted = set(lines)
+            remove = [line for line in current if line not in wanted]
+
+        if add or remove:
+            changes[tunnel_id] = (remove, add)
+
+    if state == 'overridden':
+        for tunnel_id, current in have.items():
+            if tunnel_id not in want and current:
+                changes[tunnel_id] = (list(current), list())
+
+    return changes
+
+
+def tunnel_commands(changes):
+    """ group the changes of every tunnel below its tunnel select
+    command
+    """
+    commands = list()
+    for tunnel_id in sorted(changes):
+        remove, add = changes[tunnel_id]
+        commands.append('tunnel select %d' % tunnel_id)
+        # remove in reverse order so that e.g. tunnel enable goes first
+        commands.extend('no %s' % line for line in reversed(remove))
+        commands.extend(add)
+    if commands:
+        commands.append('tunnel select none')
+    return commands
+
+
+def get_changes(want, have, state):
+    changes = diff_tunnels(want, have, state)
+
+    after = dict(have)
+    for tunnel_id, (remove, add) in changes.items():
+        removed = set(remove)
+        lines = [line for line in after.get(tunnel_id, list()) if line not in removed] + add
+        if lines:
+            after[tunnel_id] = lines
+        else:
+            after.pop(tunnel_id, None)
+
+    return list(), tunnel_commands(changes), after
+
+
+@trace_main
+@profile_main
+def main():
+    """ main entry point for module execution
+    """
+    tunnel_spec = dict(
+        tunnel_id=dict(type='int', required=True),
+        lines=dict(type='list', elements='str'),
+    )
+    module = get_resource_module(tunnel_spec)
+
+    want = get_want(module, lambda entry: entry['tunnel_id'], 'lines',
+                    lambda lines: [normalize_line(line) for line in lines],
+                    lambda entry: 'tunnel %d' % entry['tunnel_id'])
+
+    run_resource(module,
+                 lambda module: parse_tunnels(get_config(module)),
+                 lambda have, state: get_changes(want, have, state),
+                 to_entries)
+
+
+if __name__ == '__main__':
+    main()
@@ -23,10 +23,11 @@ __metaclass__ = type
 import json
 import re
 
-from ansible.errors import AnsibleConnectionFailure
+from ansible.errors import AnsibleConnectionFailure, AnsibleError
 from ansible.module_utils._text import to_text, to_bytes
 from ansible.plugins.terminal import TerminalBase
 from ansible.utils.display import Display
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.lock import DeviceLock, LockTimeout
 
 display = Display()
 
@@ -41,11 +42,55 @@ class TerminalModule(TerminalBase):
         re.compile(br"Error:", re.I),
     ]
 
+    def __init__(self, *args, **kwargs):
+        super(TerminalModule, self).__init__(*args, **kwargs)
+        # privilege level of the session: None until it is known, then
+        # True while in administrator mode and False otherwise
+        self._administrator = None
+
     def on_open_shell(self):
         pass
 
+    def on_close_shell(self):
+        cliconf = getattr(self._connection, 'cliconf', None)
+        if cliconf is not None and cliconf.has_pending_save():
+            # save once for all the tasks which deferred it, holding the
+            # lock as a task changing the config would.  Its errors only
+            # reach the log of the persistent connection
+            save_lock = cliconf.get_save_lock()
+            lock = None
+            if save_lock:
+                lock = DeviceLock(save_lock['path'])
+                if save_lock.get('timeout'):
+                    lock.timeout = save_lock['timeout']
+            try:
+                if lock:
+                    lock.acquire()
+                try:
+                    self.on_become(passwd=self._connection._play_context.become_pass)
+                    cliconf.flush_save()
+                finally:
+                    if lock:
+                        lock.release()
+            except (AnsibleError, LockTimeout) as exc:
+                display.warning('unable to save the running config: %s' % to_text(exc))
+        self._administrator = None
+
+    def _keep_administrator(self):
+        cliconf = getattr(self._connection, 'cliconf', None)
+        if cliconf is None:
+            return False
+        try:
+            return bool(cliconf.get_option('keep_administrator'))
+        except KeyError:
+            return False
+
     def on_become(self, passwd=None):
+        if self._administrator:
+            return
+
         if self._get_prompt().endswith(b'#'):
+            self._administrator = True
             return
 
         cmd = {u'command': u'administrator'}
@@ -57,7 +102,12 @@ class TerminalModule(TerminalBase):
         except AnsibleConnectionFailure:
             raise AnsibleConnectionFailure('unable to elevate privilege to administrator mode')
 
+        self._administrator = True
+
     def on_unbecome(self):
+        if self._administrator is False or self._keep_administrator():
+            return
+
         prompt = self._get_prompt()
         if prompt is None:
             # if prompt is None most likely the terminal is hung up at a prompt
@@ -65,3 +115,5 @@ class TerminalModule(TerminalBase):
 
         if prompt.endswith(b'#'):
             self._exec_cli_command(b'exit')
+
+        self._administrator = False
@@ -23,6 +23,9 @@ __metaclass__ = type
 
 import os
 import json
+import re
+import subprocess
+import sys
 
 from units.modules.utils import AnsibleExitJson, AnsibleFailJson, ModuleTestCase
 
@@ -30,9 +33,13 @@ from units.modules.utils import AnsibleExitJson, AnsibleFailJson, ModuleTestCase
 fixture_path = os.path.join(os.path.dirname(__file__), 'fixtures')
 fixture_data = {}
 
+# characters which may not appear in a file name on every platform, such as
+# the pipe of a show command filtered with grep
+UNSAFE_FIXTURE_RE = re.compile(r'[<>:"\\|?*]')
+
 
 def load_fixture(name):
-    path = os.path.join(fixture_path, name)
+    path = os.path.join(fixture_path, UNSAFE_FIXTURE_RE.sub('_', name))
 
     if path in fixture_data:
         return fixture_data[path]
@@ -49,6 +56,44 @@ def load_fixture(name):
     return data
 
 
+# netcommon module_utils which a module must only load on the code paths
+# that need them
+HEAVY_MODULE_UTILS = (
+    'ansible_collections.ansible.netcommon.plugins.module_utils.network.common.config',
+    'ansible_collections.ansible.netcommon.plugins.module_utils.network.common.parsing',
+    'ansible_collections.ansible.netcommon.plugins.module_utils.network.common.utils',
+)
+
+IMPORT_SCRIPT = """
+import json, sys, time
+from ansible.utils.collection_loader._collection_finder import _AnsibleCollectionFinder
+_AnsibleCollectionFinder(paths=%r)._install()
+import ansible.module_utils.basic
+start = time.time()
+__import__(%r)
+elapsed = time.time() - start
+print(json.dumps({'elapsed': elapsed, 'loaded': [name for name in %r if name in sys.modules]}))
+"""
+
+
+def collection_root(module):
+    path = os.path.abspath(module.__file__)
+    while os.path.basename(path) != 'ansible_collections':
+        path = os.path.dirname(path)
+    return os.path.dirname(path)
+
+
+def import_module(name, *collections):
+    """ import the module name in a fresh interpreter, in which AnsibleModule
+    is already loaded as in AnsiballZ, and return the time the import took
+    and the heavy module_utils it loaded
+    """
+    roots = sorted(set(collection_root(module) for module in collections))
+    script = IMPORT_SCRIPT % (roots, name, HEAVY_MODULE_UTILS)
+    out = subprocess.check_output([sys.executable, '-c', script])
+    return json.loads(out.decode('utf-8').splitlines()[-1])
+
+
 class TestRtxModule(ModuleTestCase):
 
     def execute_module(self, failed=False, changed=False, commands=None, sort=True, defaults=False):
@@ -0,0 +1,313 @@
+# Copyright (C) Yamaha Corporation.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <https://www.gnu.org/licenses/gpl-3.0.txt>.
+
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+import os
+import shutil
+import tempfile
+
+from units.compat import unittest
+from units.compat.mock import patch, MagicMock
+from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.config import NetworkConfig
+from ansible_collections.yamaha_network.rtx.plugins.cliconf.rtx import Cliconf
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.rtx import get_config_handle
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.config import filter_config, get_ignore_lines
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.diff import common_subsequence
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.tracing import redact_command
+
+
+class TestRtxCliconf(unittest.TestCase):
+
+    def setUp(self):
+        self.connection = MagicMock()
+        self.connection.get_prompt.return_value = b'#'
+        self.cliconf = Cliconf(self.connection)
+        self.cliconf.send_command = MagicMock(side_effect=lambda command, **kwargs: 'output of %s' % command)
+
+    def test_rtx_cliconf_show_cache_disabled(self):
+        self.cliconf.run_commands(['show environment', 'show environment'])
+        self.assertEqual(self.cliconf.send_command.call_count, 2)
+
+    def test_rtx_cliconf_show_cache(self):
+        self.cliconf.set_option('show_cache_ttl', 30)
+        self.cliconf.set_option('show_cache_size', 64)
+        responses = self.cliconf.run_commands(['show environment', 'show environment'])
+        self.cliconf.get_config()
+        self.cliconf.get_config()
+        self.assertEqual(responses, ['output of show environment'] * 2)
+        self.assertEqual(self.cliconf.send_command.call_count, 2)
+
+    def test_rtx_cliconf_show_cache_ttl(self):
+        self.cliconf.set_option('show_cache_ttl', 30)
+        self.cliconf.set_option('show_cache_size', 64)
+        with patch('ansible_collections.yamaha_network.rtx.plugins.cliconf.rtx.time.time') as mock_time:
+            mock_time.return_value = 1000
+            self.cliconf.run_commands(['show environment'])
+            mock_time.return_value = 1031
+            self.cliconf.run_commands(['show environment'])
+        self.assertEqual(self.cliconf.send_command.call_count, 2)
+
+    def test_rtx_cliconf_show_cache_size(self):
+        self.cliconf.set_option('show_cache_ttl', 30)
+        self.cliconf.set_option('show_cache_size', 1)
+        self.cliconf.run_commands(['show environment', 'show config', 'show environment'])
+        self.assertEqual(self.cliconf.send_command.call_count, 3)
+
+    def test_rtx_cliconf_show_cache_invalidate(self):
+        self.cliconf.set_option('show_cache_ttl', 30)
+        self.cliconf.set_option('show_cache_size', 64)
+        self.cliconf.run_commands(['show config', {'command': 'console lines infinity', 'session': True}, 'show config'])
+        self.assertEqual(self.cliconf.send_command.call_count, 2)
+
+        # console settings of the user show up in show config
+        self.cliconf.run_commands(['console lines 24', 'show config'])
+        self.assertEqual(self.cliconf.send_command.call_count, 4)
+        self.cliconf.send_command.reset_mock()
+
+        self.cliconf.run_commands(['ip lan1 address 192.168.100.1/24', 'show config'])
+        self.assertEqual(self.cliconf.send_command.call_count, 2)
+
+        self.cliconf.edit_config(['description lan1 test'])
+        self.cliconf.run_commands(['show config'])
+        self.assertEqual(self.cliconf.send_command.call_count, 4)
+
+    def test_rtx_cliconf_show_cache_prompt(self):
+        self.cliconf.set_option('show_cache_ttl', 30)
+        self.cliconf.set_option('show_cache_size', 64)
+        command = {'command': 'show config', 'prompt': 'Password: ', 'answer': 'password'}
+        self.cliconf.run_commands([dict(command), dict(command)])
+        self.assertEqual(self.cliconf.send_command.call_count, 2)
+
+    def test_rtx_cliconf_get_config_startup(self):
+        outputs = {'show environment': 'Default firmware: exec0  Default config. file: config2\n'}
+        self.cliconf.send_command = MagicMock(side_effect=lambda command, **kwargs: outputs.get(command, 'output of %s' % command))
+        self.assertEqual(self.cliconf.get_config(source='startup'), 'output of show config 2')
+        self.assertEqual(self.cliconf.get_config(), 'output of show config')
+
+    def test_rtx_cliconf_show_cache_bypass(self):
+        self.cliconf.set_option('show_cache_ttl', 30)
+        self.cliconf.set_option('show_cache_size', 64)
+        self.cliconf.run_commands(['show status lan1', {'command': 'show status lan1', 'cache': False}, 'show status lan1'])
+        self.assertEqual(self.cliconf.send_command.call_count, 2)
+
+    def test_rtx_cliconf_flush_save(self):
+        self.assertEqual(self.cliconf.flush_save(), {'saved': False})
+        self.cliconf.defer_save(lock_path='/tmp/locks/rtx1.lock', lock_timeout=10.0)
+        self.cliconf.defer_save()
+        self.assertTrue(self.cliconf.has_pending_save())
+        self.assertEqual(self.cliconf.get_save_lock(), {'path': '/tmp/locks/rtx1.lock', 'timeout': 10.0})
+        self.assertEqual(self.cliconf.flush_save(), {'saved': True})
+        self.assertEqual(self.cliconf.flush_save(), {'saved': False})
+        self.cliconf.send_command.assert_called_once_with('save\r')
+
+    def test_rtx_cliconf_save_clears_deferred_save(self):
+        self.cliconf.defer_save()
+        self.cliconf.run_commands(['save\r'])
+        self.assertFalse(self.cliconf.has_pending_save())
+
+    def test_rtx_cliconf_get_diff_reuses_running(self):
+        running = 'description lan1 test\n'
+        with patch('ansible_collections.yamaha_network.rtx.plugins.cliconf.rtx.NetworkConfig',
+                   wraps=NetworkConfig) as network_config:
+            first = self.cliconf.get_diff('description lan1 foo', running)
+            second = self.cliconf.get_diff('description lan1 bar', running)
+        self.assertEqual(first['config_diff'], 'description lan1 foo')
+        self.assertEqual(second['config_diff'], 'description lan1 bar')
+        # the running config is parsed once, candidates are parsed by get_config_diff
+        self.assertEqual(network_config.call_count, 1)
+
+    def test_rtx_cliconf_get_diff_running_handle(self):
+        running = self.cliconf.get_config()
+        diff = self.cliconf.get_diff('description lan1 foo', running_handle=get_config_handle(running))
+        self.assertEqual(diff['config_diff'], 'description lan1 foo')
+        diff = self.cliconf.get_diff('output of show config', running_handle=get_config_handle(running))
+        self.assertEqual(diff['config_diff'], '')
+
+    def test_rtx_cliconf_get_diff_unknown_handle(self):
+        self.assertRaises(ValueError, self.cliconf.get_diff, 'description lan1 foo',
+                          running_handle=get_config_handle('description lan1 test'))
+
+    def test_rtx_cliconf_edit_config_response(self):
+        self.cliconf.send_command = MagicMock(side_effect=['', 'Error: invalid', ''])
+        lines = ['description lan1 foo', 'ip lan1 foo', 'pp select 1']
+        resp = self.cliconf.edit_config(lines, response='errors')
+        self.assertEqual(resp, {'response': ['Error: invalid']})
+
+        self.cliconf.send_command = MagicMock(side_effect=['', 'Error: invalid', ''])
+        resp = self.cliconf.edit_config(lines, response='summary')
+        self.assertEqual(resp, {'commands': 3, 'messages': 1})
+
+        self.assertRaises(ValueError, self.cliconf.edit_config, lines, response='none')
+
+    def test_rtx_cliconf_get_diff_ignore_lines(self):
+        running = 'description lan1 test\nip lan1 address 192.168.100.1/24\nntpdate server 192.168.100.2\n'
+        candidate = 'description lan1 foo\nip lan1 address 192.168.100.10/24\nntpdate server 192.168.100.3'
+        ignore_lines = ['description', r'ip lan\d address']
+        diff = self.cliconf.get_diff(candidate, running, diff_ignore_lines=ignore_lines)
+        self.assertEqual(diff['config_diff'], candidate)
+
+        matcher = get_ignore_lines(ignore_lines)
+        self.assertEqual(matcher.prefixes, ('description',))
+        self.assertEqual(len(matcher.regexes), 1)
+        self.assertIs(get_ignore_lines(ignore_lines), matcher)
+        self.assertEqual(filter_config(running, ignore_lines), 'ntpdate server 192.168.100.2\n')
+
+    def test_rtx_cliconf_filter_config_indented(self):
+        running = ('tunnel select 1\n ipsec tunnel 101\n  ipsec ike pre-shared-key 1 text secret\n'
+                   ' ipsec ike remote address 1 192.0.2.1\n tunnel enable 1\n')
+        expected = 'tunnel select 1\n ipsec tunnel 101\n tunnel enable 1\n'
+        self.assertEqual(filter_config(running, ['ipsec ike pre-shared-key', r'ipsec ike remote \w+']), expected)
+
+        candidate = 'tunnel select 1\n ipsec ike pre-shared-key 1 text other'
+        diff = self.cliconf.get_diff(candidate, running, diff_ignore_lines=['ipsec ike pre-shared-key'])
+        self.assertEqual(diff['config_diff'], 'tunnel select 1\nipsec ike pre-shared-key 1 text other')
+
+    def test_rtx_cliconf_get_diff_strict_moved_line(self):
+        filters = ['ip filter %d pass * * * * *' % number for number in range(1, 501)]
+        running = '\n'.join(filters)
+        candidate = '\n'.join(filters[:10] + filters[11:400] + [filters[10]] + filters[400:])
+        diff = self.cliconf.get_diff(candidate, running, diff_match='strict')
+        self.assertEqual(diff['config_diff'], 'ip filter 11 pass * * * * *')
+
+        candidate = '\n'.join(filters[:200] + ['ip filter 1000 reject * * * * *'] + filters[200:])
+        diff = self.cliconf.get_diff(candidate, running, diff_match='strict')
+        self.assertEqual(diff['config_diff'], 'ip filter 1000 reject * * * * *')
+
+    def test_rtx_cliconf_get_diff_strict_section(self):
+        running = 'tunnel select 1\n ipsec tunnel 1\n ip tunnel secure filter in 1 2\n tunnel enable 1\n'
+        candidate = 'tunnel select 1\n ip tunnel secure filter in 1 2\n ipsec tunnel 1\n tunnel enable 1\n'
+        diff = self.cliconf.get_diff(candidate, running, diff_match='strict', path=['tunnel select 1'])
+        # one of the two swapped lines is sent again, not the rest of the
+        # section; the device keeps its order, so it is sent on every run
+        self.assertEqual(diff['config_diff'], 'tunnel select 1\nip tunnel secure filter in 1 2')
+
+        # lines only found on the device are left alone
+        candidate = 'tunnel select 1\n ipsec tunnel 1\n'
+        diff = self.cliconf.get_diff(candidate, running, diff_match='strict', path=['tunnel select 1'])
+        self.assertEqual(diff['config_diff'], '')
+
+    def test_rtx_cliconf_get_diff_defaults(self):
+        self.cliconf.get_device_info = MagicMock(return_value={'network_os_model': 'RTX1210'})
+        running = 'ip lan1 address 192.168.100.1/24\npp select 1\n pp always-on on\n'
+        candidate = ('ip lan1 address 192.168.100.1/24\nip lan1 mtu 1500\ntelnetd service on\n'
+                     'pp select 1\n pp always-on off\n pppoe auto disconnect on\n')
+        diff = self.cliconf.get_diff(candidate, running)
+        # pp always-on is set on the device and has to be changed back
+        self.assertEqual(diff['config_diff'], 'pp select 1\npp always-on off')
+
+        diff = self.cliconf.get_diff('ip lan1 mtu 1400\n', running)
+        self.assertEqual(diff['config_diff'], 'ip lan1 mtu 1400')
+        self.assertEqual(self.cliconf.get_device_info.call_count, 1)
+
+    def test_rtx_cliconf_get_diff_no_defaults(self):
+        self.cliconf.get_device_info = MagicMock(return_value={'network_os_model': 'RTX1210'})
+        running = 'ip lan1 address 192.168.100.1/24\n'
+        # left to the device only when the table is used
+        diff = self.cliconf.get_diff('ip lan1 mtu 1500\nsyslog info off\n', running)
+        self.assertEqual(diff['config_diff'], 'syslog info off')
+        diff = self.cliconf.get_diff('ip lan1 mtu 1500\nsyslog info off\n', running, diff_defaults=False)
+        self.assertEqual(diff['config_diff'], 'ip lan1 mtu 1500\nsyslog info off')
+
+    def test_rtx_cliconf_get_diff_model_defaults(self):
+        self.cliconf.get_device_info = MagicMock(return_value={'network_os_model': 'vRX'})
+        running = 'ip lan1 address 192.168.100.1/24\n'
+        diff = self.cliconf.get_diff('telnetd service on\ntelnetd service off\n', running)
+        self.assertEqual(diff['config_diff'], 'telnetd service on')
+
+    def test_rtx_cliconf_common_subsequence(self):
+        def lcs_length(a, b):
+            lengths = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+            for i, x in enumerate(a):
+                for j, y in enumerate(b):
+                    lengths[i + 1][j + 1] = lengths[i][j] + 1 if x == y else max(lengths[i][j + 1], lengths[i + 1][j])
+            return lengths[-1][-1]
+
+        for a, b in [('', ''), ('abc', ''), ('', 'abc'), ('abcabba', 'cbabac'), ('abcdef', 'abcdef'),
+                     ('xaxbxc', 'abc'), ('abcd', 'dcba'), ('aaabbb', 'bbbaaa'), ('abxcd', 'abycd')]:
+            common = sorted(common_subsequence(list(a), list(b)))
+            self.assertEqual(len(common), lcs_length(a, b), (a, b))
+            # the indices form a subsequence of b
+            kept = iter(b)
+            self.assertTrue(all(a[index] in kept for index in common), (a, b))
+
+    def test_rtx_cliconf_profile(self):
+        profile_dir = tempfile.mkdtemp()
+        try:
+            self.connection._check_prompt = False
+            self.connection._task_uuid = 'task-1'
+            self.connection._play_context.remote_addr = '192.168.100.1'
+            self.cliconf.set_option('profile_dir', profile_dir)
+            self.cliconf.run_commands(['show environment'])
+            self.cliconf.get_config()
+            self.assertEqual(os.listdir(profile_dir), ['192.168.100.1-task-1.pstats'])
+
+            self.connection._check_prompt = 'task-2'
+            self.cliconf.run_commands(['show environment'])
+            self.assertEqual(sorted(os.listdir(profile_dir)), ['192.168.100.1-task-1.pstats', '192.168.100.1-task-2.pstats'])
+        finally:
+            shutil.rmtree(profile_dir)
+
+    def test_rtx_cliconf_redact_command(self):
+        commands = {
+            'login password secret': 'login password ********',
+            'administrator password encrypted 0123abcd': 'administrator password ********',
+            'login user admin secret': 'login user admin ********',
+            'pp auth username user1 secret': 'pp auth username user1 ********',
+            'pp auth myname user1 secret': 'pp auth myname user1 ********',
+            'pp  auth   myname  user1  secret': 'pp  auth   myname  user1 ********',
+            ' ipsec ike pre-shared-key 1 text secret': ' ipsec ike pre-shared-key ********',
+            ' ipsec ike xauth myname user1 secret': ' ipsec ike xauth myname user1 ********',
+            ' l2tp tunnel auth on secret': ' l2tp tunnel auth on ********',
+            'auth user 1 user1 secret': 'auth user 1 user1 ********',
+            'ddns server user user1 secret': 'ddns server user user1 ********',
+            'radius secret secret': 'radius secret ********',
+            'snmp community read-only public': 'snmp community ********',
+            'snmpv3 usm user 1 user1 group1 sha secret aes-cfb secret': 'snmpv3 usm user 1 user1 ********',
+            'show config': 'show config',
+        }
+        for command, redacted in commands.items():
+            self.assertEqual(redact_command(command), redacted)
+
+    def test_rtx_cliconf_trace(self):
+        trace_dir = tempfile.mkdtemp()
+        try:
+            trace_file = os.path.join(trace_dir, 'trace.jsonl')
+            del self.cliconf.send_command
+            self.connection.send.return_value = b'output'
+            self.connection._check_prompt = False
+            self.connection._task_uuid = 'task-1'
+            self.connection._play_context.remote_addr = '192.168.100.1'
+            self.cliconf.set_option('trace_file', trace_file)
+            self.cliconf.run_commands(['show environment', 'login password secret'])
+
+            with open(trace_file) as f:
+                events = [json.loads(line) for line in f]
+            self.assertEqual([event['name'] for event in events], ['send_command', 'send_command', 'rpc'])
+            self.assertEqual(events[0]['args']['command'], 'show environment')
+            self.assertEqual(events[0]['args']['bytes_out'], 16)
+            self.assertEqual(events[0]['args']['bytes_in'], 6)
+            self.assertEqual(events[1]['args']['command'], 'login password ********')
+            self.assertEqual(events[2]['args']['method'], 'run_commands')
+            self.assertEqual(events[2]['args']['host'], '192.168.100.1')
+            self.assertEqual(events[2]['args']['task'], 'task-1')
+            self.assertEqual(events[2]['ph'], 'X')
+        finally:
+            shutil.rmtree(trace_dir)
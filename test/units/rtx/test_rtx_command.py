@@ -21,12 +21,17 @@
 from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
 
+import hashlib
 import json
+import os
+import shutil
+import tempfile
 
 from units.compat.mock import patch
 from ansible_collections.yamaha_network.rtx.plugins.modules import rtx_command
 from units.modules.utils import set_module_args
-from units.modules.network.rtx.rtx_module import TestRtxModule, load_fixture
+from ansible_collections.ansible.netcommon.plugins.module_utils.network.common import utils
+from units.modules.network.rtx.rtx_module import TestRtxModule, load_fixture, import_module
 
 
 class TestRtxCommandModule(TestRtxModule):
@@ -97,6 +102,9 @@ class TestRtxCommandModule(TestRtxModule):
         set_module_args(dict(commands=['show environment'], wait_for=wait_for, retries=2))
         self.execute_module(failed=True)
         self.assertEqual(self.run_commands.call_count, 2)
+        # every pass bypasses the show command cache of the connection
+        for call in self.run_commands.call_args_list:
+            self.assertFalse(call[0][1][0]['cache'])
 
     def test_rtx_command_match_any(self):
         wait_for = ['result[0] contains "RTX1210"',
@@ -117,6 +125,43 @@ class TestRtxCommandModule(TestRtxModule):
         set_module_args(dict(commands=commands, wait_for=wait_for, match='all'))
         self.execute_module(failed=True)
 
+    def test_rtx_command_filter(self):
+        set_module_args(dict(commands=[dict(command='show environment', filter='Rev')]))
+        result = self.execute_module()
+        self.assertEqual(self.run_commands.call_args[0][1][0]['command'], 'show environment | grep Rev')
+        self.assertNotIn('filter', self.run_commands.call_args[0][1][0])
+        self.assertEqual(result['stdout'][0].splitlines(), ['RTX1210 Rev.14.01.28 (Tue May 15 18:34:08 2018)'])
+
+    def test_rtx_command_filter_check_mode(self):
+        commands = [dict(command='show environment', filter='Rev'), 'administrator']
+        set_module_args(dict(commands=commands, _ansible_check_mode=True))
+        result = self.execute_module()
+        self.assertEqual(len(result['stdout']), 1)
+        self.assertTrue(result['stdout'][0].startswith('RTX1210 Rev.'))
+
+    def test_rtx_command_parser_auto(self):
+        commands = ['show environment', 'show status lan1', 'show ipsec sa', 'administrator']
+        set_module_args(dict(commands=commands, parser='auto'))
+        result = self.execute_module()
+        environment, status, ipsec_sa, administrator = result['parsed']
+        self.assertEqual(environment['model'], 'RTX1210')
+        self.assertEqual(environment['revision'], '14.01.28')
+        self.assertEqual(environment['cpu_5sec'], 7)
+        self.assertEqual(environment['temperature'], 57)
+        self.assertEqual(len(environment['mac_addresses']), 3)
+        self.assertEqual(status['interface'], 'LAN1')
+        self.assertEqual(status['mtu'], 1500)
+        self.assertEqual(status['tx_octets'], 98765432)
+        self.assertEqual(status['rx_packets'], 230456)
+        self.assertEqual(ipsec_sa['isakmp'], 1)
+        self.assertEqual([sa['direction'] for sa in ipsec_sa['sa']], ['-', 'send', 'recv'])
+        self.assertIsNone(administrator)
+
+    def test_rtx_command_parser_template(self):
+        set_module_args(dict(commands=[dict(command='show environment', filter='Rev')], parser='show_environment'))
+        result = self.execute_module()
+        self.assertEqual(result['parsed'], [{'model': 'RTX1210', 'revision': '14.01.28'}])
+
     def test_rtx_command_configure_check_warning(self):
         commands = ['administrator']
         set_module_args({
@@ -134,3 +179,70 @@ class TestRtxCommandModule(TestRtxModule):
         set_module_args(dict(commands=commands))
         result = self.execute_module()
         self.assertEqual(result['warnings'], [])
+
+    def test_rtx_command_profile(self):
+        profile_dir = tempfile.mkdtemp()
+        try:
+            set_module_args(dict(commands=['show environment']))
+            with patch.dict(os.environ, {'ANSIBLE_RTX_PROFILE_DIR': profile_dir}):
+                self.execute_module()
+            files = os.listdir(profile_dir)
+            self.assertEqual(len(files), 1)
+            self.assertTrue(files[0].startswith('rtx_command-'))
+            self.assertTrue(files[0].endswith('.pstats'))
+
+            environ = {'ANSIBLE_RTX_PROFILE_DIR': profile_dir, 'ANSIBLE_RTX_PROFILE_HOST': 'rtx1',
+                       'ANSIBLE_RTX_PROFILE_TASK': 'show the environment'}
+            with patch.dict(os.environ, environ):
+                self.execute_module()
+            files = [name for name in os.listdir(profile_dir) if name.startswith('rtx1-')]
+            self.assertEqual(len(files), 1)
+            self.assertTrue(files[0].startswith('rtx1-show_the_environment-rtx_command-'))
+        finally:
+            shutil.rmtree(profile_dir)
+
+    def test_rtx_command_trace(self):
+        trace_dir = tempfile.mkdtemp()
+        try:
+            trace_file = os.path.join(trace_dir, 'trace.jsonl')
+            set_module_args(dict(commands=['show environment']))
+            with patch.dict(os.environ, {'ANSIBLE_RTX_TRACE_FILE': trace_file}):
+                self.execute_module()
+            with open(trace_file) as f:
+                events = [json.loads(line) for line in f]
+            self.assertEqual(len(events), 1)
+            self.assertEqual(events[0]['name'], 'module')
+            self.assertEqual(events[0]['args'], {'module': 'rtx_command', 'process': 'module'})
+        finally:
+            shutil.rmtree(trace_dir)
+
+    def test_rtx_command_import_time(self):
+        result = import_module(rtx_command.__name__, rtx_command, utils)
+        self.assertEqual(result['loaded'], [])
+        self.assertLess(result['elapsed'], 0.5)
+
+    def test_rtx_command_output_file(self):
+        output_dir = tempfile.mkdtemp()
+        try:
+            output_file = os.path.join(output_dir, 'output.txt')
+            set_module_args(dict(commands=['show environment', 'show ipsec sa'], output_file=output_file, parser='auto'))
+            result = self.execute_module()
+            self.assertNotIn('stdout', result)
+            self.assertEqual(self.run_commands.call_count, 2)
+            self.assertEqual(result['parsed'][0]['model'], 'RTX1210')
+
+            with open(output_file, 'rb') as f:
+                data = f.read()
+            outputs = result['outputs']
+            self.assertEqual([item['command'] for item in outputs], ['show environment', 'show ipsec sa'])
+            self.assertEqual(outputs[1]['offset'], outputs[0]['size'] + 1)
+            self.assertEqual(len(data), outputs[1]['offset'] + outputs[1]['size'] + 1)
+            environment = data[outputs[0]['offset']:outputs[0]['offset'] + outputs[0]['size']]
+            self.assertEqual(environment.decode('utf-8'), load_fixture('show_environment'))
+            self.assertEqual(outputs[0]['sha1'], hashlib.sha1(environment).hexdigest())
+        finally:
+            shutil.rmtree(output_dir)
+
+    def test_rtx_command_output_file_wait_for(self):
+        set_module_args(dict(commands=['show environment'], output_file='output.txt', wait_for=['result[0] contains RTX']))
+        self.execute_module(failed=True)
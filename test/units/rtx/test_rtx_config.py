@@ -21,11 +21,16 @@
 from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
 
+import os
+
 from units.compat.mock import patch, MagicMock
 from ansible_collections.yamaha_network.rtx.plugins.modules import rtx_config
 from ansible_collections.yamaha_network.rtx.plugins.cliconf.rtx import Cliconf
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.abbreviation import expand_line
+from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.config import NetworkConfig
 from units.modules.utils import set_module_args
-from units.modules.network.rtx.rtx_module import TestRtxModule, load_fixture
+from ansible_collections.ansible.netcommon.plugins.module_utils.network.common import utils
+from units.modules.network.rtx.rtx_module import TestRtxModule, load_fixture, import_module
 
 
 class TestrtxConfigModule(TestRtxModule):
@@ -48,6 +53,7 @@ class TestrtxConfigModule(TestRtxModule):
         self.run_commands = self.mock_run_commands.start()
 
         self.cliconf_obj = Cliconf(MagicMock())
+        rtx_config._CONFIG_OBJECTS.clear()
         self.running_config = load_fixture('rtx_config_config.cfg')
 
         self.mock_get_console_info = patch('ansible_collections.yamaha_network.rtx.plugins.modules.rtx_config.get_console_info')
@@ -104,7 +110,7 @@ class TestrtxConfigModule(TestRtxModule):
         commands = ['description lan1 foo', 'pp select 1', 'pp always-on off']
         self.conn.get_diff = MagicMock(return_value=self.cliconf_obj.get_diff(src, self.running_config))
         self.execute_module(changed=True, commands=commands)
-        self.assertEqual(self.run_commands.call_count, 2)
+        self.assertEqual(self.run_commands.call_count, 1)
         self.assertEqual(self.get_config.call_count, 1)
         self.assertEqual(self.conn.edit_config.call_count, 1)
         args = self.run_commands.call_args[0][1]
@@ -113,20 +119,107 @@ class TestrtxConfigModule(TestRtxModule):
     def test_rtx_config_save_changed_false(self):
         set_module_args(dict(save_when='changed'))
         self.execute_module(changed=False)
-        self.assertEqual(self.run_commands.call_count, 1)
+        self.assertEqual(self.run_commands.call_count, 0)
         self.assertEqual(self.get_config.call_count, 0)
         self.assertEqual(self.conn.edit_config.call_count, 0)
 
+    def test_rtx_config_save_modified(self):
+        configs = {'running': '# RTX1210 Rev.14.01.28\n' + self.running_config, 'startup': 'description lan1 old\n'}
+        self.conn.get_config = MagicMock(side_effect=lambda source: configs[source])
+        set_module_args(dict(save_when='modified'))
+        self.execute_module(changed=True)
+        self.assertEqual(self.run_commands.call_args[0][1], 'save\r')
+
+    def test_rtx_config_save_modified_unmodified(self):
+        # comments and the lines to ignore do not count
+        configs = {'running': '# Reporting Date: Apr 1 12:00:00 2020\n' + self.running_config + 'ntpdate server 192.0.2.1\n',
+                   'startup': self.running_config}
+        self.conn.get_config = MagicMock(side_effect=lambda source: configs[source])
+        set_module_args(dict(save_when='modified', diff_ignore_lines=['ntpdate']))
+        self.execute_module()
+        self.run_commands.assert_not_called()
+
+    def test_rtx_config_save_modified_reuses_running(self):
+        src = load_fixture('rtx_config_config.cfg')
+        self.conn.get_diff = MagicMock(return_value=self.cliconf_obj.get_diff(src, src))
+        self.conn.get_config = MagicMock(return_value=self.running_config)
+        set_module_args(dict(src=src, save_when='modified'))
+        self.execute_module()
+        # nothing was changed, the running config read for the diff is reused
+        self.conn.get_config.assert_called_once_with(source='startup')
+
+    def test_rtx_config_save_modified_console(self):
+        # the running config reused was read with the console settings of
+        # the task, which are not part of the config once restored
+        running = 'console character ascii\nconsole lines infinity\nconsole columns 200\n' + self.running_config
+        self.get_config.side_effect = lambda *args, **kwargs: running
+        self.get_console_info.return_value = {'character': 'console character sjis',
+                                              'lines': 'no console lines',
+                                              'columns': 'no console columns'}
+        self.conn.get_diff = MagicMock(return_value=self.cliconf_obj.get_diff(running, running))
+        self.conn.get_config = MagicMock(return_value='console character sjis\n' + self.running_config)
+        set_module_args(dict(src=running, save_when='modified'))
+        self.execute_module()
+        self.conn.get_config.assert_called_once_with(source='startup')
+        self.run_commands.assert_not_called()
+
+        self.conn.get_config = MagicMock(return_value='console character sjis\nconsole lines 24\n' + self.running_config)
+        self.execute_module(changed=True)
+        self.assertEqual(self.run_commands.call_args[0][1], 'save\r')
+
+    def test_rtx_config_save_deferred(self):
+        src = load_fixture('rtx_config_src.cfg')
+        self.conn.get_diff = MagicMock(return_value=self.cliconf_obj.get_diff(src, self.running_config))
+        set_module_args(dict(src=src, save_when='deferred'))
+        self.execute_module(changed=True)
+        self.conn.defer_save.assert_called_once_with(lock_path=None, lock_timeout=None)
+
+        self.conn.defer_save.reset_mock()
+        with patch.dict(os.environ, {'ANSIBLE_RTX_LOCK_FILE': '/tmp/locks/rtx1.lock', 'ANSIBLE_RTX_LOCK_TIMEOUT': '10.0'}):
+            self.execute_module(changed=True)
+        self.conn.defer_save.assert_called_once_with(lock_path='/tmp/locks/rtx1.lock', lock_timeout=10.0)
+        self.run_commands.assert_not_called()
+
+    def test_rtx_config_save_deferred_unchanged(self):
+        src = load_fixture('rtx_config_config.cfg')
+        self.conn.get_diff = MagicMock(return_value=self.cliconf_obj.get_diff(src, src))
+        set_module_args(dict(src=src, save_when='deferred'))
+        self.execute_module()
+        self.conn.defer_save.assert_not_called()
+
     def test_rtx_config_save_always(self):
         self.run_commands.return_value = "description lan1 test"
         set_module_args(dict(save_when='always'))
         self.execute_module(changed=True)
-        self.assertEqual(self.run_commands.call_count, 2)
+        self.assertEqual(self.run_commands.call_count, 1)
         self.assertEqual(self.get_config.call_count, 0)
         self.assertEqual(self.conn.edit_config.call_count, 0)
         args = self.run_commands.call_args[0][1]
         self.assertIn('save\r', args)
 
+    def test_rtx_config_diff_running_unchanged(self):
+        lines = ['description lan1 test']
+        set_module_args(dict(lines=lines, diff_against='running', _ansible_diff=True))
+        self.conn.get_diff = MagicMock(return_value=self.cliconf_obj.get_diff('\n'.join(lines), self.running_config))
+        with patch('ansible_collections.ansible.netcommon.plugins.module_utils.network.common.config.NetworkConfig',
+                   wraps=NetworkConfig) as network_config:
+            result = self.execute_module()
+        self.assertNotIn('diff', result)
+        self.assertEqual(self.run_commands.call_count, 0)
+        self.assertEqual(self.get_config.call_count, 1)
+        # one object for the candidate and one shared by the before and after configs
+        self.assertEqual(network_config.call_count, 2)
+
+    def test_rtx_config_diff_running_changed(self):
+        lines = ['description lan1 foo']
+        set_module_args(dict(lines=lines, diff_against='running', _ansible_diff=True))
+        self.conn.get_diff = MagicMock(return_value=self.cliconf_obj.get_diff('\n'.join(lines), self.running_config))
+        self.run_commands.return_value = [self.running_config.replace('description lan1 test', 'description lan1 foo')]
+        result = self.execute_module(changed=True, commands=lines)
+        self.assertEqual(self.run_commands.call_count, 1)
+        self.assertIn('description lan1 foo', result['diff']['after'])
+        self.assertIn('description lan1 test', result['diff']['before'])
+
     def test_rtx_config_lines_wo_parents(self):
         lines = ['hostname foo']
         set_module_args(dict(lines=lines))
@@ -224,6 +317,12 @@ class TestrtxConfigModule(TestRtxModule):
         commands = parents + ['pp enable 1']
         self.execute_module(changed=True, commands=commands, sort=False)
 
+    def test_rtx_config_diff_defaults(self):
+        set_module_args(dict(lines=['ip lan1 mtu 1500'], diff_defaults=False))
+        self.conn.get_diff = MagicMock(return_value={'config_diff': 'ip lan1 mtu 1500'})
+        self.execute_module(changed=True, commands=['ip lan1 mtu 1500'])
+        self.assertFalse(self.conn.get_diff.call_args[1]['diff_defaults'])
+
     def test_rtx_config_match_exact(self):
         lines = ['pp always-on on', 'pppoe use lan1',
                  'pp enable 1']
@@ -267,3 +366,148 @@ class TestrtxConfigModule(TestRtxModule):
         args = dict(replace='config')
         set_module_args(args)
         result = self.execute_module(failed=True)
+
+    def test_rtx_config_get_diff_running_handle(self):
+        src = load_fixture('rtx_config_src.cfg')
+        set_module_args(dict(src=src))
+        self.conn.get_diff = MagicMock(return_value=self.cliconf_obj.get_diff(src, self.running_config))
+        self.execute_module(changed=True)
+        kwargs = self.conn.get_diff.call_args[1]
+        self.assertNotIn('running', kwargs)
+        self.assertEqual(kwargs['running_handle'], rtx_config.get_config_handle(self.running_config))
+        self.assertEqual(self.conn.edit_config.call_args[1]['response'], 'summary')
+
+    def test_rtx_config_get_diff_unknown_handle(self):
+        src = load_fixture('rtx_config_src.cfg')
+        set_module_args(dict(src=src))
+        diff = self.cliconf_obj.get_diff(src, self.running_config)
+        self.conn.get_diff = MagicMock(side_effect=[rtx_config.ConnectionError('unknown running config handle'), diff])
+        self.execute_module(changed=True)
+        self.assertEqual(self.conn.get_diff.call_count, 2)
+        self.assertEqual(self.conn.get_diff.call_args[1]['running'], self.running_config)
+
+    def test_rtx_config_get_diff_running_config(self):
+        src = load_fixture('rtx_config_src.cfg')
+        set_module_args(dict(src=src, running_config=self.running_config))
+        self.conn.get_diff = MagicMock(return_value=self.cliconf_obj.get_diff(src, self.running_config))
+        self.execute_module(changed=True)
+        kwargs = self.conn.get_diff.call_args[1]
+        self.assertNotIn('running_handle', kwargs)
+        self.assertEqual(kwargs['running'], self.running_config)
+
+    def test_rtx_config_abbreviations(self):
+        lines = ['desc lan1 test']
+        set_module_args(dict(lines=lines))
+        self.conn.get_diff = MagicMock(side_effect=lambda **kwargs: self.cliconf_obj.get_diff(kwargs['candidate'], self.running_config,
+                                                                                               path=kwargs['path']))
+        self.execute_module()
+        self.assertEqual(self.conn.get_diff.call_args[1]['candidate'], 'description lan1 test')
+
+        set_module_args(dict(lines=['pp alw on'], parents=['pp sel 1']))
+        self.execute_module()
+        self.assertEqual(self.conn.get_diff.call_args[1]['path'], ['pp select 1'])
+
+    def test_rtx_config_expand_line(self):
+        for line, expanded in [
+            ('ip lan1 addr 192.168.100.1/24', 'ip lan1 address 192.168.100.1/24'),
+            (' ip lan1 sec fil in 100 101', ' ip lan1 secure filter in 100 101'),
+            ('no ip lan2 sec filt out', 'no ip lan2 secure filter out'),
+            ('ipsec ike pre 1 text secret', 'ipsec ike pre-shared-key 1 text secret'),
+            ('tun sel 1', 'tunnel select 1'),
+            # ambiguous between tunnel enable and tunnel endpoint
+            ('tun en 1', 'tunnel en 1'),
+            # parameters are never expanded
+            ('description lan1 ip', 'description lan1 ip'),
+            ('ip filter 100 pass * * tcp * www', 'ip filter 100 pass * * tcp * www'),
+            ('ip route default gateway pp 1', 'ip route default gateway pp 1'),
+            ('unknown command', 'unknown command'),
+            ('', ''),
+        ]:
+            self.assertEqual(expand_line(line), expanded)
+
+    def test_rtx_config_import_time(self):
+        result = import_module(rtx_config.__name__, rtx_config, utils)
+        self.assertEqual(result['loaded'], [])
+        self.assertLess(result['elapsed'], 0.5)
+
+    def set_slots(self, slots):
+
+        def copy_file(source, destination, proto):
+            with open(source) as f:
+                slots[destination] = f.read()
+
+        def get_file(source, destination, proto):
+            if source not in slots:
+                raise rtx_config.ConnectionError('No such file')
+            with open(destination, 'w') as f:
+                f.write(slots[source])
+
+        self.conn.copy_file = MagicMock(side_effect=copy_file)
+        self.conn.get_file = MagicMock(side_effect=get_file)
+        self.conn.has_pending_save = MagicMock(return_value=False)
+        self.run_commands.return_value = [load_fixture('show_environment')]
+
+    def test_rtx_config_slot(self):
+        src = load_fixture('rtx_config_src.cfg')
+        slots = {}
+        self.set_slots(slots)
+        set_module_args(dict(src=src, slot=1))
+        self.execute_module(changed=True, commands=['set-default-config 1'])
+        self.assertEqual(slots, {'/config1': src})
+        self.assertEqual(self.conn.get_file.call_count, 2)
+        self.conn.edit_config.assert_called_once_with(candidate=['set-default-config 1'], response='summary')
+
+    def test_rtx_config_slot_stored(self):
+        src = load_fixture('rtx_config_src.cfg')
+        # the device writes the config back in its own layout
+        slots = {'/config1': '# RTX1210 Rev.14.01.28\n' + src.replace('\n', '\r\n')}
+        self.set_slots(slots)
+        set_module_args(dict(src=src, slot=1))
+        self.execute_module(changed=True, commands=['set-default-config 1'])
+        self.conn.copy_file.assert_not_called()
+
+    def test_rtx_config_slot_default(self):
+        src = load_fixture('rtx_config_src.cfg')
+        self.set_slots({'/config2': src})
+        set_module_args(dict(src=src, slot=2))
+        self.execute_module()
+        self.conn.edit_config.assert_not_called()
+
+        self.set_slots({'/config2': self.running_config})
+        result = self.execute_module(failed=True)
+        self.assertEqual(result['msg'], 'config2 is the default config, choose another slot')
+        self.conn.copy_file.assert_not_called()
+
+    def test_rtx_config_slot_verify_failed(self):
+        src = load_fixture('rtx_config_src.cfg')
+        self.set_slots({})
+        self.conn.copy_file = MagicMock()
+        set_module_args(dict(src=src, slot=1))
+        result = self.execute_module(failed=True)
+        self.assertEqual(result['msg'], 'config1 read back from the device does not match src')
+        self.conn.edit_config.assert_not_called()
+
+    def test_rtx_config_slot_check_mode(self):
+        src = load_fixture('rtx_config_src.cfg')
+        self.set_slots({})
+        set_module_args(dict(src=src, slot=1, _ansible_check_mode=True))
+        self.execute_module(changed=True, commands=['set-default-config 1'])
+        self.conn.copy_file.assert_not_called()
+        self.conn.edit_config.assert_not_called()
+
+    def test_rtx_config_slot_pending_save(self):
+        # the deferred save of an earlier task would overwrite the slot
+        src = load_fixture('rtx_config_src.cfg')
+        self.set_slots({})
+        self.conn.has_pending_save.return_value = True
+        set_module_args(dict(src=src, slot=1))
+        result = self.execute_module(failed=True)
+        self.assertEqual(result['msg'], 'a deferred save is pending on this connection and would overwrite config1, '
+                                        'save it with save_when=always first')
+        self.conn.copy_file.assert_not_called()
+        self.conn.edit_config.assert_not_called()
+
+    def test_rtx_config_slot_save_when(self):
+        set_module_args(dict(src='description lan1 foo', slot=1, save_when='changed'))
+        result = self.execute_module(failed=True)
+        self.assertEqual(result['msg'], 'save_when must be never when slot is set')
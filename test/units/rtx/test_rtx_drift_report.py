@@ -0,0 +1,112 @@
+# Copyright (C) Yamaha Corporation.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <https://www.gnu.org/licenses/gpl-3.0.txt>.
+
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+import os
+import shutil
+import tempfile
+
+from units.compat import unittest
+from units.compat.mock import MagicMock
+from ansible_collections.yamaha_network.rtx.plugins.action.rtx_drift_report import ActionModule, multiprocessing_context
+
+
+class TestRtxDriftReport(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.backup_dir = os.path.join(self.tmpdir, 'backup')
+        self.intended_dir = os.path.join(self.tmpdir, 'intended')
+        self.dest = os.path.join(self.tmpdir, 'report', 'drift.json')
+        os.mkdir(self.backup_dir)
+        os.mkdir(self.intended_dir)
+
+        running = 'ip lan1 address 192.168.100.1/24\nntpdate server 192.168.100.2\n'
+        self.write(self.backup_dir, 'rtx1_config.2020-01-01@00:00:00', 'description lan1 old\n')
+        self.write(self.backup_dir, 'rtx1_config.2020-01-02@00:00:00', running)
+        self.write(self.backup_dir, 'rtx2_config.2020-01-02@00:00:00', running + 'description lan1 test\n')
+        self.write(self.intended_dir, 'rtx1.cfg', 'ip lan1 address 192.168.100.1/24\n')
+        self.write(self.intended_dir, 'rtx2.cfg', 'ip lan1 address 192.168.100.10/24\n')
+        self.write(self.intended_dir, 'rtx3.cfg', 'ip lan1 address 192.168.100.1/24\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, directory, name, content):
+        with open(os.path.join(directory, name), 'w') as f:
+            f.write(content)
+
+    def run_action(self, check_mode=False, **args):
+        task = MagicMock()
+        task.async_val = 0
+        task.args = dict(backup_dir=self.backup_dir, intended_dir=self.intended_dir, dest=self.dest, **args)
+        play_context = MagicMock()
+        play_context.check_mode = check_mode
+        action = ActionModule(task, MagicMock(), play_context, MagicMock(), MagicMock(), MagicMock())
+        return action.run(task_vars=dict())
+
+    def test_rtx_drift_report(self):
+        result = self.run_action(workers=1, diff_ignore_lines=['ntpdate'])
+        self.assertTrue(result['changed'])
+        self.assertEqual(result['drifted'], ['rtx2'])
+        self.assertEqual(result['summary'], {'in_sync': 1, 'drift': 1, 'no_backup': 1, 'error': 0})
+
+        with open(self.dest) as f:
+            report = json.load(f)
+        self.assertEqual(report['hosts']['rtx2']['missing'], ['ip lan1 address 192.168.100.10/24'])
+        self.assertEqual(report['hosts']['rtx2']['extra'], ['ip lan1 address 192.168.100.1/24', 'description lan1 test'])
+        self.assertEqual(report['hosts']['rtx3']['status'], 'no_backup')
+
+        result = self.run_action(workers=1, diff_ignore_lines=['ntpdate'])
+        self.assertFalse(result['changed'])
+
+    def test_rtx_drift_report_workers(self):
+        result = self.run_action(workers=2, hosts=['rtx1', 'rtx2'])
+        self.assertEqual(result['drifted'], ['rtx1', 'rtx2'])
+        self.assertEqual(result['summary']['no_backup'], 0)
+        # spawned workers could not import host_drift
+        self.assertEqual(multiprocessing_context.get_start_method(), 'fork')
+
+    def test_rtx_drift_report_as_rtx_config(self):
+        # abbreviations and defaults of the model are in sync, as rtx_config sees them
+        self.write(self.backup_dir, 'rtx4_config.2020-01-02@00:00:00',
+                   '# vRX Rev.19.00.00\nip lan1 address 192.168.100.1/24\n')
+        self.write(self.intended_dir, 'rtx4.cfg', 'ip lan1 addr 192.168.100.1/24\ntelnetd service off\n')
+        result = self.run_action(workers=1, hosts=['rtx4'])
+        self.assertEqual(result['summary']['in_sync'], 1)
+
+        result = self.run_action(workers=1, hosts=['rtx4'], diff_defaults='no')
+        self.assertEqual(result['drifted'], ['rtx4'])
+
+    def test_rtx_drift_report_ignore_intended(self):
+        # an ignored line of the intended config is not missing either
+        self.write(self.intended_dir, 'rtx1.cfg', 'ip lan1 address 192.168.100.1/24\nntpdate server 192.168.100.3\n')
+        result = self.run_action(workers=1, hosts=['rtx1'], diff_ignore_lines=['ntpdate'])
+        self.assertEqual(result['summary']['in_sync'], 1)
+
+    def test_rtx_drift_report_check_mode(self):
+        result = self.run_action(check_mode=True, workers=1)
+        self.assertTrue(result['changed'])
+        self.assertFalse(os.path.exists(self.dest))
+
+    def test_rtx_drift_report_invalid_match(self):
+        result = self.run_action(match='none')
+        self.assertTrue(result['failed'])
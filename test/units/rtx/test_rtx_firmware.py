@@ -0,0 +1,321 @@
+# Copyright (C) Yamaha Corporation.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <https://www.gnu.org/licenses/gpl-3.0.txt>.
+
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import hashlib
+import os
+import shutil
+import socket
+import tempfile
+import threading
+
+try:
+    import paramiko
+except ImportError:
+    paramiko = None
+
+from units.compat import unittest
+from units.compat.mock import patch, MagicMock
+from ansible_collections.yamaha_network.rtx.plugins.modules import rtx_firmware
+from ansible_collections.yamaha_network.rtx.plugins.action.rtx_firmware import ActionModule
+from units.modules.utils import set_module_args
+from units.modules.network.rtx.rtx_module import TestRtxModule
+
+IMAGE = b''.join(bytes(bytearray([i % 256])) * 1000 for i in range(100))
+
+
+class RemoteFile(object):
+
+    def __init__(self, path, mode):
+        self.f = open(path, mode)
+
+    def set_pipelined(self, pipelined):
+        pass
+
+    def prefetch(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self.f, name)
+
+
+class LocalSFTP(object):
+    """ SFTP client storing the files in a local directory """
+
+    def __init__(self, root):
+        self.root = root
+        self.writes = 0
+
+    def stat(self, path):
+        return os.stat(os.path.join(self.root, path.lstrip('/')))
+
+    def open(self, path, mode):
+        if 'r' not in mode:
+            self.writes += 1
+        return RemoteFile(os.path.join(self.root, path.lstrip('/')), mode)
+
+    def close(self):
+        pass
+
+
+class TestRtxFirmwareModule(TestRtxModule):
+
+    module = rtx_firmware
+
+    def setUp(self):
+        super(TestRtxFirmwareModule, self).setUp()
+
+        self.mock_run_commands = patch('ansible_collections.yamaha_network.rtx.plugins.modules.rtx_firmware.run_commands')
+        self.run_commands = self.mock_run_commands.start()
+
+        self.mock_get_capabilities = patch('ansible_collections.yamaha_network.rtx.plugins.modules.rtx_firmware.get_capabilities')
+        self.get_capabilities = self.mock_get_capabilities.start()
+        self.get_capabilities.return_value = {
+            'device_info': {'network_os_version': 'Rev.14.01.28 (Tue May 15 18:34:08 2018)'}
+        }
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.src = os.path.join(self.tmpdir, 'rtx1210.bin')
+        with open(self.src, 'wb') as f:
+            f.write(IMAGE)
+        self.sftp = LocalSFTP(self.tmpdir)
+        self.dest = os.path.join(self.tmpdir, 'sd1.bin')
+
+        self.mock_open_sftp = patch('ansible_collections.yamaha_network.rtx.plugins.modules.rtx_firmware.open_sftp')
+        self.open_sftp = self.mock_open_sftp.start()
+        self.open_sftp.return_value = (MagicMock(), self.sftp)
+
+    def tearDown(self):
+        super(TestRtxFirmwareModule, self).tearDown()
+        self.mock_run_commands.stop()
+        self.mock_get_capabilities.stop()
+        self.mock_open_sftp.stop()
+        shutil.rmtree(self.tmpdir)
+
+    def set_args(self, **kwargs):
+        args = dict(src=self.src, version='14.01.38', dest='/sd1.bin', chunk_size=4096, host='192.168.100.1')
+        args.update(kwargs)
+        set_module_args(args)
+
+    def read_dest(self):
+        with open(self.dest, 'rb') as f:
+            return f.read()
+
+    def test_rtx_firmware_upload(self):
+        self.set_args(checksum=hashlib.sha256(IMAGE).hexdigest().upper())
+        result = self.execute_module(changed=True)
+        self.assertEqual(result['version'], '14.01.28')
+        self.assertEqual(result['resumed'], 0)
+        self.assertEqual(result['transferred'], len(IMAGE))
+        self.assertEqual(result['commands'], ['copy exec /sd1.bin 0'])
+        self.assertEqual(self.read_dest(), IMAGE)
+        self.run_commands.assert_called_once_with(self.run_commands.call_args[0][0],
+                                                  [{'command': 'copy exec /sd1.bin 0', 'prompt': r'\(Y/N\)', 'answer': 'y'}])
+
+    def test_rtx_firmware_same_version(self):
+        self.set_args(version='Rev.14.01.28')
+        self.execute_module()
+        self.open_sftp.assert_not_called()
+        self.run_commands.assert_not_called()
+
+    def test_rtx_firmware_check_mode(self):
+        self.set_args(_ansible_check_mode=True)
+        self.execute_module(changed=True)
+        self.open_sftp.assert_not_called()
+
+    def test_rtx_firmware_checksum_mismatch(self):
+        self.set_args(checksum='0' * 64)
+        result = self.execute_module(failed=True)
+        self.assertIn('checksum of %s does not match' % self.src, result['msg'])
+        self.get_capabilities.assert_not_called()
+
+    def test_rtx_firmware_resume(self):
+        with open(self.dest, 'wb') as f:
+            f.write(IMAGE[:30000])
+        self.set_args()
+        result = self.execute_module(changed=True)
+        self.assertEqual(result['resumed'], 30000)
+        self.assertEqual(result['transferred'], len(IMAGE) - 30000)
+        self.assertEqual(self.read_dest(), IMAGE)
+
+    def test_rtx_firmware_resume_other_image(self):
+        with open(self.dest, 'wb') as f:
+            f.write(b'\xff' * 30000)
+        self.set_args()
+        result = self.execute_module(changed=True)
+        self.assertEqual(result['transferred'], len(IMAGE) * 2 - 30000)
+        self.assertEqual(self.sftp.writes, 2)
+        self.assertEqual(self.read_dest(), IMAGE)
+
+    def test_rtx_firmware_verify_failed(self):
+        with patch('ansible_collections.yamaha_network.rtx.plugins.modules.rtx_firmware.remote_sha256') as remote_sha256:
+            remote_sha256.return_value = '0' * 64
+            self.set_args()
+            result = self.execute_module(failed=True)
+        self.assertEqual(result['msg'], 'checksum of /sd1.bin on the device does not match %s' % self.src)
+        self.run_commands.assert_not_called()
+
+
+if paramiko:
+    class SFTPServer(paramiko.ServerInterface):
+
+        def check_auth_password(self, username, password):
+            if (username, password) == ('admin', 'secret'):
+                return paramiko.AUTH_SUCCESSFUL
+            return paramiko.AUTH_FAILED
+
+        def get_allowed_auths(self, username):
+            return 'password'
+
+        def check_channel_request(self, kind, chanid):
+            return paramiko.OPEN_SUCCEEDED
+
+    class LocalSFTPHandle(paramiko.SFTPHandle):
+
+        def stat(self):
+            return paramiko.SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+
+    class LocalSFTPServer(paramiko.SFTPServerInterface):
+        """ SFTP server storing the files in a local directory """
+
+        def __init__(self, server, root, *args, **kwargs):
+            super(LocalSFTPServer, self).__init__(server, *args, **kwargs)
+            self.root = root
+
+        def _path(self, path):
+            return os.path.join(self.root, self.canonicalize(path).lstrip('/'))
+
+        def stat(self, path):
+            try:
+                return paramiko.SFTPAttributes.from_stat(os.stat(self._path(path)))
+            except OSError as exc:
+                return paramiko.SFTPServer.convert_errno(exc.errno)
+
+        lstat = stat
+
+        def open(self, path, flags, attr):
+            mode = 'ab' if flags & os.O_APPEND else 'wb' if flags & os.O_WRONLY else 'rb'
+            try:
+                f = open(self._path(path), mode)
+            except (IOError, OSError) as exc:
+                return paramiko.SFTPServer.convert_errno(exc.errno)
+            handle = LocalSFTPHandle(flags)
+            handle.filename = path
+            handle.readfile = f
+            handle.writefile = f
+            return handle
+
+
+@unittest.skipIf(paramiko is None, 'paramiko is not installed')
+class TestRtxFirmwareSFTP(TestRtxModule):
+
+    module = rtx_firmware
+
+    def setUp(self):
+        super(TestRtxFirmwareSFTP, self).setUp()
+
+        self.mock_run_commands = patch('ansible_collections.yamaha_network.rtx.plugins.modules.rtx_firmware.run_commands')
+        self.run_commands = self.mock_run_commands.start()
+
+        self.mock_get_capabilities = patch('ansible_collections.yamaha_network.rtx.plugins.modules.rtx_firmware.get_capabilities')
+        self.get_capabilities = self.mock_get_capabilities.start()
+        self.get_capabilities.return_value = {
+            'device_info': {'network_os_version': 'Rev.14.01.28 (Tue May 15 18:34:08 2018)'}
+        }
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.src = os.path.join(self.tmpdir, 'rtx1210.bin')
+        with open(self.src, 'wb') as f:
+            f.write(IMAGE)
+        self.root = os.path.join(self.tmpdir, 'device')
+        os.mkdir(self.root)
+
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(1)
+        self.transport = None
+        self.server = threading.Thread(target=self.serve)
+        self.server.daemon = True
+        self.server.start()
+
+    def tearDown(self):
+        super(TestRtxFirmwareSFTP, self).tearDown()
+        self.mock_run_commands.stop()
+        self.mock_get_capabilities.stop()
+        self.listener.close()
+        self.server.join(10)
+        if self.transport:
+            self.transport.close()
+        shutil.rmtree(self.tmpdir)
+
+    def serve(self):
+        try:
+            sock = self.listener.accept()[0]
+        except (IOError, OSError):
+            return
+        self.transport = paramiko.Transport(sock)
+        self.transport.add_server_key(paramiko.RSAKey.generate(1024))
+        self.transport.set_subsystem_handler('sftp', paramiko.SFTPServer, LocalSFTPServer, self.root)
+        self.transport.start_server(server=SFTPServer())
+
+    def test_rtx_firmware_sftp(self):
+        with open(os.path.join(self.root, 'sd1.bin'), 'wb') as f:
+            f.write(IMAGE[:30000])
+        set_module_args(dict(src=self.src, version='14.01.38', dest='/sd1.bin', chunk_size=4096,
+                             host='127.0.0.1', port=self.listener.getsockname()[1],
+                             username='admin', password='secret', host_key_checking=False))
+        result = self.execute_module(changed=True)
+        self.assertEqual(result['resumed'], 30000)
+        self.assertEqual(result['transferred'], len(IMAGE) - 30000)
+        with open(os.path.join(self.root, 'sd1.bin'), 'rb') as f:
+            self.assertEqual(f.read(), IMAGE)
+        self.assertEqual(self.run_commands.call_count, 1)
+
+
+class TestRtxFirmwareAction(TestRtxModule):
+
+    def run_action(self, **args):
+        task = MagicMock()
+        task.args = dict(src='rtx1210.bin', **args)
+        play_context = MagicMock()
+        play_context.remote_addr = '192.168.100.1'
+        play_context.port = None
+        play_context.remote_user = 'admin'
+        play_context.password = 'secret'
+        play_context.private_key_file = None
+        action = ActionModule(task, MagicMock(), play_context, MagicMock(), MagicMock(), MagicMock())
+        action._find_needle = MagicMock(return_value='/playbook/files/rtx1210.bin')
+        with patch('ansible_collections.yamaha_network.rtx.plugins.action.rtx.ActionModule.run') as run:
+            run.side_effect = lambda task_vars=None: dict(task.args)
+            return action.run(task_vars=dict())
+
+    def test_rtx_firmware_action_defaults(self):
+        args = self.run_action()
+        self.assertEqual(args['src'], '/playbook/files/rtx1210.bin')
+        self.assertEqual(args['host'], '192.168.100.1')
+        self.assertEqual(args['username'], 'admin')
+        self.assertEqual(args['password'], 'secret')
+        self.assertNotIn('port', args)
+        self.assertNotIn('ssh_keyfile', args)
+
+    def test_rtx_firmware_action_explicit(self):
+        args = self.run_action(host='192.0.2.1', username='operator')
+        self.assertEqual(args['host'], '192.0.2.1')
+        self.assertEqual(args['username'], 'operator')
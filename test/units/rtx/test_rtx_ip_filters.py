@@ -0,0 +1,115 @@
+# Copyright (C) Yamaha Corporation.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <https://www.gnu.org/licenses/gpl-3.0.txt>.
+
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from units.compat.mock import patch
+from ansible_collections.yamaha_network.rtx.plugins.modules import rtx_ip_filters
+from units.modules.utils import set_module_args
+from units.modules.network.rtx.rtx_module import TestRtxModule, load_fixture
+
+
+class TestRtxIpFiltersModule(TestRtxModule):
+
+    module = rtx_ip_filters
+
+    def setUp(self):
+        super(TestRtxIpFiltersModule, self).setUp()
+
+        self.mock_get_config = patch('ansible_collections.yamaha_network.rtx.plugins.modules.rtx_ip_filters.get_config')
+        self.get_config = self.mock_get_config.start()
+
+        self.mock_load_config = patch('ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.resource.load_config')
+        self.load_config = self.mock_load_config.start()
+
+        self.mock_get_console_info = patch('ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.resource.get_console_info')
+        self.get_console_info = self.mock_get_console_info.start()
+
+        self.mock_set_console_info = patch('ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.resource.set_console_info')
+        self.set_console_info = self.mock_set_console_info.start()
+
+    def tearDown(self):
+        super(TestRtxIpFiltersModule, self).tearDown()
+        self.mock_get_config.stop()
+        self.mock_load_config.stop()
+        self.mock_get_console_info.stop()
+        self.mock_set_console_info.stop()
+
+    def load_fixtures(self, commands=None):
+        self.get_config.return_value = load_fixture('rtx_ip_filters_config.cfg')
+
+    def test_rtx_ip_filters_merged_idempotent(self):
+        config = [dict(filter_id=100, rule='pass  * * tcp * www'),
+                  dict(filter_id=100, dynamic=True, rule='* * www')]
+        set_module_args(dict(config=config))
+        result = self.execute_module(commands=[])
+        self.assertEqual(self.load_config.call_count, 0)
+        self.assertEqual(len(result['before']), 4)
+
+    def test_rtx_ip_filters_merged(self):
+        config = [dict(filter_id=100, rule='pass * * tcp * www'),
+                  dict(filter_id=102, rule='reject * * icmp'),
+                  dict(filter_id=200, rule='pass * * udp * domain')]
+        set_module_args(dict(config=config))
+        commands = ['ip filter 102 reject * * icmp', 'ip filter 200 pass * * udp * domain']
+        self.execute_module(changed=True, commands=commands, sort=False)
+        self.assertEqual(self.load_config.call_count, 1)
+        self.assertEqual(self.load_config.call_args[0][1], commands)
+
+    def test_rtx_ip_filters_overridden(self):
+        config = [dict(filter_id=100, rule='pass * * tcp * www'),
+                  dict(filter_id=101, dynamic=True, rule='* * ftp')]
+        set_module_args(dict(config=config, state='overridden'))
+        commands = ['no ip filter 101', 'no ip filter 102', 'no ip filter dynamic 100',
+                    'ip filter dynamic 101 * * ftp']
+        result = self.execute_module(changed=True, commands=commands, sort=False)
+        self.assertEqual(result['after'], [dict(filter_id=100, dynamic=False, rule='pass * * tcp * www'),
+                                           dict(filter_id=101, dynamic=True, rule='* * ftp')])
+
+    def test_rtx_ip_filters_deleted(self):
+        config = [dict(filter_id=101), dict(filter_id=300)]
+        set_module_args(dict(config=config, state='deleted'))
+        self.execute_module(changed=True, commands=['no ip filter 101'])
+
+    def test_rtx_ip_filters_deleted_all(self):
+        set_module_args(dict(state='deleted'))
+        commands = ['no ip filter 100', 'no ip filter 101', 'no ip filter 102', 'no ip filter dynamic 100']
+        self.execute_module(changed=True, commands=commands, sort=False)
+
+    def test_rtx_ip_filters_batch_size(self):
+        set_module_args(dict(state='deleted', batch_size=2))
+        self.execute_module(changed=True)
+        self.assertEqual(self.load_config.call_args[1]['batch_size'], 2)
+
+    def test_rtx_ip_filters_batch_size_invalid(self):
+        for batch_size in (0, -1):
+            set_module_args(dict(state='deleted', batch_size=batch_size))
+            result = self.execute_module(failed=True)
+            self.assertEqual(result['msg'], 'batch_size must be a positive number')
+        self.assertEqual(self.load_config.call_count, 0)
+
+    def test_rtx_ip_filters_check_mode(self):
+        config = [dict(filter_id=200, rule='pass * * udp * domain')]
+        set_module_args(dict(config=config, _ansible_check_mode=True))
+        self.execute_module(changed=True, commands=['ip filter 200 pass * * udp * domain'])
+        self.assertEqual(self.load_config.call_count, 0)
+
+    def test_rtx_ip_filters_rule_required(self):
+        set_module_args(dict(config=[dict(filter_id=200)]))
+        self.execute_module(failed=True)
@@ -0,0 +1,192 @@
+# Copyright (C) Yamaha Corporation.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <https://www.gnu.org/licenses/gpl-3.0.txt>.
+
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import fcntl
+import os
+import shutil
+import tempfile
+
+from units.compat import unittest
+from units.compat.mock import MagicMock, patch
+from ansible_collections.yamaha_network.rtx.plugins.action.rtx import ActionModule
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.lock import CONSOLE_STATE_ENV, LOCK_FILE_ENV, LOCK_TIMEOUT_ENV
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.lock import DeviceLock, LockTimeout, get_console_state_path, get_lock_path
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.rtx import get_console_info, set_console_info
+
+
+class TestRtxLock(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'locks', 'rtx1.lock')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def lock(self, shared):
+        return DeviceLock(self.path, shared=shared, timeout=0.2, interval=0.01)
+
+    def test_rtx_lock_path(self):
+        self.assertEqual(get_lock_path('/tmp', '192.168.100.1', 22), '/tmp/192.168.100.1_22.lock')
+        self.assertEqual(get_lock_path('/tmp', 'fe80::1'), '/tmp/fe80__1.lock')
+
+    def test_rtx_lock_shared(self):
+        with self.lock(shared=True):
+            with self.lock(shared=True):
+                pass
+            self.assertRaises(LockTimeout, self.lock(shared=False).acquire)
+
+    def test_rtx_lock_exclusive(self):
+        with self.lock(shared=False):
+            self.assertRaises(LockTimeout, self.lock(shared=True).acquire)
+        with self.lock(shared=False):
+            pass
+
+    def test_rtx_lock_waiting_writer(self):
+        # a writer waiting for the readers holds the gate, new readers queue
+        with self.lock(shared=True):
+            gate = os.open(self.path + '.gate', os.O_RDWR)
+            try:
+                fcntl.flock(gate, fcntl.LOCK_EX)
+                self.assertRaises(LockTimeout, self.lock(shared=True).acquire)
+            finally:
+                os.close(gate)
+
+    def test_rtx_lock_shared_console_settings(self):
+        os.makedirs(os.path.dirname(self.path))
+        module = MagicMock()
+        with patch.dict(os.environ, {CONSOLE_STATE_ENV: get_console_state_path(self.path)}):
+            with patch('ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.rtx.run_commands') as run_commands:
+                run_commands.side_effect = lambda module, command: ['console character sjis\n' if command == 'show config | grep console' else '']
+                first = get_console_info(module)
+                set_console_info(module)
+                # the second task takes the settings read by the first
+                second = get_console_info(module)
+                self.assertEqual(second, first)
+                self.assertEqual(first['character'], 'console character sjis')
+                self.assertEqual(run_commands.call_count, 4)
+
+                run_commands.reset_mock()
+                set_console_info(module, first)
+                run_commands.assert_not_called()
+                # the last task puts them back
+                set_console_info(module, second)
+                self.assertEqual([call[0][1]['command'] for call in run_commands.call_args_list],
+                                 ['console character sjis', 'no console lines', 'no console columns'])
+
+
+class TestRtxAction(unittest.TestCase):
+
+    def action(self, module_name, check_mode=False, **args):
+        task = MagicMock()
+        task.action = 'yamaha_network.rtx.%s' % module_name
+        task.args = args
+        play_context = MagicMock()
+        play_context.check_mode = check_mode
+        play_context.remote_addr = '192.168.100.1'
+        play_context.port = 22
+        templar = MagicMock()
+        templar.template.side_effect = lambda value: value
+        return ActionModule(task, MagicMock(), play_context, MagicMock(), templar, MagicMock())
+
+    def test_rtx_action_lock_disabled(self):
+        self.assertIsNone(self.action('rtx_config')._get_device_lock('rtx_config', dict()))
+
+    def test_rtx_action_lock(self):
+        task_vars = dict(ansible_rtx_lock_dir='/tmp/locks', ansible_rtx_lock_timeout='10')
+        lock = self.action('rtx_config')._get_device_lock('rtx_config', task_vars)
+        self.assertEqual(lock.path, '/tmp/locks/192.168.100.1_22.lock')
+        self.assertEqual(lock.timeout, 10.0)
+        self.assertFalse(lock.shared)
+
+    def test_rtx_action_lock_read_only(self):
+        self.assertTrue(self.action('rtx_stats')._is_read_only('rtx_stats'))
+        self.assertTrue(self.action('rtx_config', check_mode=True)._is_read_only('rtx_config'))
+
+        action = self.action('rtx_command', commands=['show config', {'command': 'show status lan1'}])
+        self.assertTrue(action._is_read_only('rtx_command'))
+        action = self.action('rtx_command', commands='show environment')
+        self.assertTrue(action._is_read_only('rtx_command'))
+        action = self.action('rtx_command', commands=['show config', 'clear log'])
+        self.assertFalse(action._is_read_only('rtx_command'))
+
+    def test_rtx_action_lock_timeout(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            task_vars = dict(ansible_rtx_lock_dir=tmpdir, ansible_rtx_lock_timeout=0.1)
+            action = self.action('rtx_config')
+            action._play_context.connection = 'network_cli'
+            with DeviceLock(get_lock_path(tmpdir, '192.168.100.1', 22)):
+                with patch('ansible_collections.ansible.netcommon.plugins.action.network.ActionModule.run') as run:
+                    result = action.run(task_vars=task_vars)
+            self.assertTrue(result['failed'])
+            self.assertIn('timed out', result['msg'])
+            run.assert_not_called()
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_rtx_action_profile_environment(self):
+        action = self.action('rtx_command')
+        action._task.environment = [{'LANG': 'C'}]
+        action._task.get_name.return_value = 'show the environment'
+        action._set_profile_environment(dict(inventory_hostname='rtx1'))
+        self.assertEqual(len(action._task.environment), 1)
+
+        with patch.dict(os.environ, {'ANSIBLE_RTX_PROFILE_DIR': '/tmp/profile'}):
+            action._set_profile_environment(dict(inventory_hostname='rtx1'))
+        self.assertEqual(action._task.environment, [{'LANG': 'C'}, {'ANSIBLE_RTX_PROFILE_HOST': 'rtx1',
+                                                                    'ANSIBLE_RTX_PROFILE_TASK': 'show the environment'}])
+
+    def test_rtx_action_controller_paths(self):
+        action = self.action('rtx_command', commands=['show tech-info'], output_file='outputs/rtx1.txt')
+        action._loader.path_dwim.side_effect = lambda path: os.path.join('/playbooks', path)
+        action._resolve_controller_paths('rtx_command')
+        self.assertEqual(action._task.args['output_file'], '/playbooks/outputs/rtx1.txt')
+
+        action = self.action('rtx_command', commands=['show tech-info'], output_file='/tmp/rtx1.txt')
+        action._resolve_controller_paths('rtx_command')
+        self.assertEqual(action._task.args['output_file'], '/tmp/rtx1.txt')
+
+        action = self.action('rtx_stats', interfaces=['lan1'], state_file='stats/rtx1.json')
+        action._loader.path_dwim.side_effect = lambda path: os.path.join('/playbooks', path)
+        action._resolve_controller_paths('rtx_stats')
+        self.assertEqual(action._task.args['state_file'], '/playbooks/stats/rtx1.json')
+
+    def test_rtx_action_lock_environment(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'rtx1.lock')
+            action = self.action('rtx_stats')
+            action._task.environment = None
+            action._set_lock_environment(DeviceLock(path, shared=True))
+            self.assertEqual(action._task.environment, [{LOCK_FILE_ENV: path, LOCK_TIMEOUT_ENV: '300',
+                                                         CONSOLE_STATE_ENV: path + '.console'}])
+
+            # an exclusive task drops the count left by a failed shared task
+            with open(path + '.console', 'w') as f:
+                f.write('{"count": 1}')
+            action = self.action('rtx_config')
+            action._task.environment = None
+            action._set_lock_environment(DeviceLock(path, timeout=10.0))
+            self.assertEqual(action._task.environment, [{LOCK_FILE_ENV: path, LOCK_TIMEOUT_ENV: '10.0'}])
+            self.assertFalse(os.path.exists(path + '.console'))
+        finally:
+            shutil.rmtree(tmpdir)
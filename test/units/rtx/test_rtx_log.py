@@ -0,0 +1,146 @@
+# Copyright (C) Yamaha Corporation.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <https://www.gnu.org/licenses/gpl-3.0.txt>.
+
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+import os
+import shutil
+import tempfile
+
+from units.compat.mock import patch
+from ansible_collections.yamaha_network.rtx.plugins.modules import rtx_log
+from units.modules.utils import set_module_args
+from units.modules.network.rtx.rtx_module import TestRtxModule, load_fixture
+
+
+class TestRtxLogModule(TestRtxModule):
+
+    module = rtx_log
+
+    def setUp(self):
+        super(TestRtxLogModule, self).setUp()
+
+        self.mock_run_commands = patch('ansible_collections.yamaha_network.rtx.plugins.modules.rtx_log.run_commands')
+        self.run_commands = self.mock_run_commands.start()
+
+        self.mock_get_console_info = patch('ansible_collections.yamaha_network.rtx.plugins.modules.rtx_log.get_console_info')
+        self.get_console_info = self.mock_get_console_info.start()
+
+        self.mock_set_console_info = patch('ansible_collections.yamaha_network.rtx.plugins.modules.rtx_log.set_console_info')
+        self.set_console_info = self.mock_set_console_info.start()
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.cursor_file = os.path.join(self.tmpdir, 'cursor.json')
+        self.log = None
+
+    def tearDown(self):
+        super(TestRtxLogModule, self).tearDown()
+        self.mock_run_commands.stop()
+        self.mock_get_console_info.stop()
+        self.mock_set_console_info.stop()
+        shutil.rmtree(self.tmpdir)
+
+    def load_fixtures(self, commands=None):
+        self.run_commands.return_value = [self.log or load_fixture('show_log')]
+
+    def write_cursor(self, line):
+        with open(self.cursor_file, 'w') as f:
+            json.dump(rtx_log.get_cursor([line]), f)
+
+    def test_rtx_log_all(self):
+        set_module_args(dict())
+        result = self.execute_module()
+        self.assertEqual(result['entries'], 5)
+        self.assertEqual(result['records'][0], {'timestamp': '2020/04/01 11:58:02', 'message': 'PP[01] PPPoE Connect'})
+        self.assertEqual(result['cursor'], rtx_log.get_cursor(['2020/04/01 12:00:00: Logout from TELNET: 192.168.100.2']))
+
+    def test_rtx_log_cursor(self):
+        self.write_cursor('2020/04/01 11:59:10: Login succeeded for TELNET: 192.168.100.2')
+        set_module_args(dict(cursor_file=self.cursor_file))
+        result = self.execute_module(changed=True)
+        self.assertEqual([record['message'] for record in result['records']],
+                         ['[INSPECT] LAN2[in][101099] TCP 203.0.113.5:4433 > 198.51.100.10:22 (2020/04/01 12:00:00)',
+                          'Logout from TELNET: 192.168.100.2'])
+        with open(self.cursor_file) as f:
+            self.assertEqual(json.load(f), result['cursor'])
+
+        result = self.execute_module()
+        self.assertEqual(result['entries'], 0)
+        self.assertEqual(result['records'], [])
+
+    def test_rtx_log_cursor_same_timestamp(self):
+        self.write_cursor('2020/04/01 12:00:00: [INSPECT] LAN2[in][101099] TCP 203.0.113.5:4433 > '
+                          '198.51.100.10:22 (2020/04/01 12:00:00)')
+        set_module_args(dict(cursor_file=self.cursor_file))
+        result = self.execute_module(changed=True)
+        self.assertEqual(result['records'], [{'timestamp': '2020/04/01 12:00:00', 'message': 'Logout from TELNET: 192.168.100.2'}])
+
+    def test_rtx_log_cursor_repeated_lines(self):
+        line = '2020/04/01 12:00:00: [INSPECT] LAN2[in][101099] TCP 203.0.113.5:4433 > 198.51.100.10:22'
+        log = '2020/04/01 11:59:10: Login succeeded for TELNET: 192.168.100.2\n%s\n%s\n' % (line, line)
+        self.log = log
+        set_module_args(dict(cursor_file=self.cursor_file))
+        result = self.execute_module(changed=True)
+        self.assertEqual(result['cursor']['count'], 2)
+
+        # the same entry logged again within the same second is new
+        self.log = log + line + '\n'
+        result = self.execute_module(changed=True)
+        self.assertEqual(result['entries'], 1)
+        self.assertEqual(result['cursor']['count'], 3)
+
+        result = self.execute_module()
+        self.assertEqual(result['entries'], 0)
+
+    def test_rtx_log_cursor_rotated(self):
+        # the entry of the cursor is no longer in the log buffer
+        self.write_cursor('2020/04/01 11:58:30: PP[01] PPPoE Disconnect')
+        set_module_args(dict(cursor_file=self.cursor_file))
+        result = self.execute_module(changed=True)
+        self.assertEqual(result['entries'], 3)
+
+    def test_rtx_log_cursor_check_mode(self):
+        set_module_args(dict(cursor_file=self.cursor_file, _ansible_check_mode=True))
+        result = self.execute_module(changed=True)
+        self.assertEqual(result['entries'], 5)
+        self.assertFalse(os.path.exists(self.cursor_file))
+
+    def test_rtx_log_invalid_cursor(self):
+        with open(self.cursor_file, 'w') as f:
+            f.write('{')
+        set_module_args(dict(cursor_file=self.cursor_file))
+        result = self.execute_module(changed=True)
+        self.assertEqual(result['entries'], 5)
+        self.assertIn('ignoring the invalid cursor file %s' % self.cursor_file, result['warnings'])
+
+    def test_rtx_log_dest(self):
+        dest = os.path.join(self.tmpdir, 'rtx.log')
+        self.write_cursor('2020/04/01 11:59:10: Login succeeded for TELNET: 192.168.100.2')
+        set_module_args(dict(cursor_file=self.cursor_file, dest=dest, dest_format='json'))
+        result = self.execute_module(changed=True)
+        self.assertEqual(result['entries'], 2)
+        self.assertNotIn('records', result)
+        with open(dest) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(records[1], {'timestamp': '2020/04/01 12:00:00', 'message': 'Logout from TELNET: 192.168.100.2'})
+
+        self.execute_module()
+        with open(dest) as f:
+            self.assertEqual(len(f.readlines()), 2)
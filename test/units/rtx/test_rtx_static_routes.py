@@ -0,0 +1,97 @@
+# Copyright (C) Yamaha Corporation.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <https://www.gnu.org/licenses/gpl-3.0.txt>.
+
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from units.compat.mock import patch
+from ansible_collections.yamaha_network.rtx.plugins.modules import rtx_static_routes
+from units.modules.utils import set_module_args
+from units.modules.network.rtx.rtx_module import TestRtxModule, load_fixture
+
+
+class TestRtxStaticRoutesModule(TestRtxModule):
+
+    module = rtx_static_routes
+
+    def setUp(self):
+        super(TestRtxStaticRoutesModule, self).setUp()
+
+        self.mock_get_config = patch('ansible_collections.yamaha_network.rtx.plugins.modules.rtx_static_routes.get_config')
+        self.get_config = self.mock_get_config.start()
+
+        self.mock_load_config = patch('ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.resource.load_config')
+        self.load_config = self.mock_load_config.start()
+
+        self.mock_get_console_info = patch('ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.resource.get_console_info')
+        self.get_console_info = self.mock_get_console_info.start()
+
+        self.mock_set_console_info = patch('ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.resource.set_console_info')
+        self.set_console_info = self.mock_set_console_info.start()
+
+    def tearDown(self):
+        super(TestRtxStaticRoutesModule, self).tearDown()
+        self.mock_get_config.stop()
+        self.mock_load_config.stop()
+        self.mock_get_console_info.stop()
+        self.mock_set_console_info.stop()
+
+    def load_fixtures(self, commands=None):
+        self.get_config.return_value = load_fixture('rtx_static_routes_config.cfg')
+
+    def test_rtx_static_routes_merged_idempotent(self):
+        config = [dict(dest='0.0.0.0/0', gateways=['pp 1']),
+                  dict(dest='10.0.0.0/8', gateways=['192.168.0.1  metric 2', '192.168.0.2 hide'])]
+        set_module_args(dict(config=config))
+        result = self.execute_module(commands=[])
+        self.assertEqual(self.load_config.call_count, 0)
+        self.assertEqual(len(result['before']), 3)
+
+    def test_rtx_static_routes_merged(self):
+        config = [dict(dest='default', gateways=['pp 2']),
+                  dict(dest='192.168.10.1/32', gateways=['192.168.0.254'])]
+        set_module_args(dict(config=config))
+        commands = ['ip route 192.168.10.1 gateway 192.168.0.254', 'ip route default gateway pp 2']
+        self.execute_module(changed=True, commands=commands, sort=False)
+        self.assertEqual(self.load_config.call_count, 1)
+
+    def test_rtx_static_routes_overridden(self):
+        config = [dict(dest='default', gateways=['pp 1']),
+                  dict(dest='192.168.20.0/24', gateways=['tunnel 2'])]
+        set_module_args(dict(config=config, state='overridden'))
+        commands = ['no ip route 10.0.0.0/8', 'no ip route 172.16.0.0/12',
+                    'ip route 192.168.20.0/24 gateway tunnel 2']
+        result = self.execute_module(changed=True, commands=commands, sort=False)
+        self.assertEqual(self.load_config.call_count, 2)
+        self.assertEqual(self.load_config.call_args_list[0][0][1], commands[:2])
+        self.assertEqual(result['after'], [dict(dest='192.168.20.0/24', gateways=['tunnel 2']),
+                                           dict(dest='default', gateways=['pp 1'])])
+
+    def test_rtx_static_routes_deleted(self):
+        config = [dict(dest='172.16.0.0/12'), dict(dest='192.168.30.0/24')]
+        set_module_args(dict(config=config, state='deleted'))
+        self.execute_module(changed=True, commands=['no ip route 172.16.0.0/12'])
+
+    def test_rtx_static_routes_deleted_all(self):
+        set_module_args(dict(state='deleted'))
+        commands = ['no ip route 10.0.0.0/8', 'no ip route 172.16.0.0/12', 'no ip route default']
+        self.execute_module(changed=True, commands=commands, sort=False)
+
+    def test_rtx_static_routes_gateways_required(self):
+        set_module_args(dict(config=[dict(dest='default')]))
+        self.execute_module(failed=True)
@@ -0,0 +1,125 @@
+# Copyright (C) Yamaha Corporation.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <https://www.gnu.org/licenses/gpl-3.0.txt>.
+
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+import os
+import shutil
+import tempfile
+
+from units.compat.mock import patch
+from ansible_collections.yamaha_network.rtx.plugins.modules import rtx_stats
+from units.modules.utils import set_module_args
+from units.modules.network.rtx.rtx_module import TestRtxModule, load_fixture
+
+
+class TestRtxStatsModule(TestRtxModule):
+
+    module = rtx_stats
+
+    def setUp(self):
+        super(TestRtxStatsModule, self).setUp()
+
+        self.mock_run_commands = patch('ansible_collections.yamaha_network.rtx.plugins.modules.rtx_stats.run_commands')
+        self.run_commands = self.mock_run_commands.start()
+
+        self.mock_get_console_info = patch('ansible_collections.yamaha_network.rtx.plugins.modules.rtx_stats.get_console_info')
+        self.get_console_info = self.mock_get_console_info.start()
+
+        self.mock_set_console_info = patch('ansible_collections.yamaha_network.rtx.plugins.modules.rtx_stats.set_console_info')
+        self.set_console_info = self.mock_set_console_info.start()
+
+        self.mock_time = patch('ansible_collections.yamaha_network.rtx.plugins.modules.rtx_stats.time.time')
+        self.time = self.mock_time.start()
+        self.time.return_value = 1060.0
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.state_file = os.path.join(self.tmpdir, 'stats.json')
+
+    def tearDown(self):
+        super(TestRtxStatsModule, self).tearDown()
+        self.mock_run_commands.stop()
+        self.mock_get_console_info.stop()
+        self.mock_set_console_info.stop()
+        self.mock_time.stop()
+        shutil.rmtree(self.tmpdir)
+
+    def load_fixtures(self, commands=None):
+
+        def load_from_file(module, commands):
+            return [load_fixture(item['command'].replace(' ', '_')) for item in commands]
+
+        self.run_commands.side_effect = load_from_file
+
+    def write_sample(self, counters):
+        with open(self.state_file, 'w') as f:
+            json.dump({'timestamp': 1000.0, 'counters': counters}, f)
+
+    def test_rtx_stats_batched(self):
+        set_module_args(dict(interfaces=['lan1', 'TUNNEL1', 'tunnel 1', 'LAN1']))
+        result = self.execute_module()
+        self.assertEqual(self.run_commands.call_count, 1)
+        commands = self.run_commands.call_args[0][1]
+        self.assertEqual([item['command'] for item in commands], ['show status lan1', 'show status tunnel 1'])
+        self.assertTrue(all(item['cache'] is False for item in commands))
+        self.assertEqual(result['interfaces']['lan1']['rx_octets'], 187654321)
+        self.assertEqual(result['interfaces']['tunnel 1']['tx_packets'], 2345)
+        self.assertNotIn('interval', result)
+
+    def test_rtx_stats_tunnel_ipv6(self):
+        # the IPv4 and IPv6 lines of a tunnel are added up as for a LAN
+        set_module_args(dict(interfaces=['tunnel 2']))
+        result = self.execute_module()
+        status = result['interfaces']['tunnel 2']
+        self.assertEqual((status['rx_packets'], status['rx_octets']), (2134, 213456))
+        self.assertEqual((status['tx_packets'], status['tx_octets']), (2445, 244567))
+
+    def test_rtx_stats_invalid_interface(self):
+        set_module_args(dict(interfaces=['bridge1']))
+        result = self.execute_module(failed=True)
+        self.assertEqual(result['msg'], 'unsupported interface bridge1')
+
+    def test_rtx_stats_delta(self):
+        self.write_sample({'lan1': {'tx_packets': 120000, 'tx_octets': 98000000, 'rx_packets': 230000,
+                                    'rx_octets': 187000000}})
+        set_module_args(dict(interfaces=['lan1', 'tunnel 1'], state_file=self.state_file))
+        result = self.execute_module()
+        self.assertEqual(result['interval'], 60.0)
+        self.assertEqual(result['interfaces']['lan1']['delta'],
+                         {'tx_packets': 345, 'tx_octets': 765432, 'rx_packets': 456, 'rx_octets': 654321})
+        self.assertNotIn('delta', result['interfaces']['tunnel 1'])
+
+        with open(self.state_file) as f:
+            sample = json.load(f)
+        self.assertEqual(sample['timestamp'], 1060.0)
+        self.assertEqual(sample['counters']['tunnel 1']['rx_octets'], 123456)
+
+    def test_rtx_stats_delta_reset(self):
+        self.write_sample({'tunnel 1': {'tx_packets': 5000, 'tx_octets': 500000, 'rx_packets': 1000,
+                                        'rx_octets': 100000}})
+        set_module_args(dict(interfaces=['tunnel 1'], state_file=self.state_file))
+        result = self.execute_module()
+        self.assertEqual(result['interfaces']['tunnel 1']['delta'],
+                         {'tx_packets': 2345, 'tx_octets': 234567, 'rx_packets': 234, 'rx_octets': 23456})
+
+    def test_rtx_stats_check_mode(self):
+        set_module_args(dict(interfaces=['lan1'], state_file=self.state_file, _ansible_check_mode=True))
+        self.execute_module()
+        self.assertFalse(os.path.exists(self.state_file))
@@ -0,0 +1,118 @@
+# Copyright (C) Yamaha Corporation.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <https://www.gnu.org/licenses/gpl-3.0.txt>.
+
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import functools
+import os
+import shutil
+import tempfile
+
+from units.compat import unittest
+from units.compat.mock import MagicMock, patch
+from ansible.errors import AnsibleConnectionFailure
+from ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.lock import DeviceLock
+from ansible_collections.yamaha_network.rtx.plugins.terminal.rtx import TerminalModule
+
+
+class TestRtxTerminal(unittest.TestCase):
+
+    def setUp(self):
+        self.connection = MagicMock()
+        self.connection.get_prompt.return_value = b'>'
+        self.connection.cliconf.get_option.return_value = False
+        self.connection.cliconf.has_pending_save.return_value = False
+        self.connection.cliconf.get_save_lock.return_value = None
+        self.terminal = TerminalModule(self.connection)
+
+    def test_rtx_terminal_become_once(self):
+        self.terminal.on_become(passwd='password')
+        self.connection.get_prompt.return_value = b'#'
+        self.terminal.on_become(passwd='password')
+        self.assertEqual(self.connection.exec_command.call_count, 1)
+        self.assertEqual(self.connection.get_prompt.call_count, 1)
+
+    def test_rtx_terminal_already_administrator(self):
+        self.connection.get_prompt.return_value = b'#'
+        self.terminal.on_become(passwd='password')
+        self.terminal.on_become(passwd='password')
+        self.assertEqual(self.connection.exec_command.call_count, 0)
+        self.assertEqual(self.connection.get_prompt.call_count, 1)
+
+    def test_rtx_terminal_unbecome(self):
+        self.terminal.on_become(passwd='password')
+        self.connection.get_prompt.return_value = b'#'
+        self.terminal.on_unbecome()
+        self.connection.exec_command.assert_called_with(b'exit')
+
+        self.connection.exec_command.reset_mock()
+        self.terminal.on_unbecome()
+        self.assertEqual(self.connection.exec_command.call_count, 0)
+
+    def test_rtx_terminal_keep_administrator(self):
+        self.connection.cliconf.get_option.return_value = True
+        self.terminal.on_become(passwd='password')
+        self.connection.get_prompt.return_value = b'#'
+        self.terminal.on_unbecome()
+        self.terminal.on_become(passwd='password')
+        self.assertEqual(self.connection.exec_command.call_count, 1)
+        self.connection.cliconf.get_option.assert_called_with('keep_administrator')
+
+    def test_rtx_terminal_close_resets_state(self):
+        self.terminal.on_become(passwd='password')
+        self.terminal.on_close_shell()
+        self.terminal.on_become(passwd='password')
+        self.assertEqual(self.connection.exec_command.call_count, 2)
+
+    def test_rtx_terminal_close_flushes_save(self):
+        self.connection.cliconf.has_pending_save.return_value = True
+        self.connection._play_context.become_pass = 'password'
+        self.terminal.on_close_shell()
+        self.assertEqual(self.connection.exec_command.call_count, 1)
+        self.connection.cliconf.flush_save.assert_called_once_with()
+
+    def test_rtx_terminal_close_flush_failure(self):
+        self.connection.cliconf.has_pending_save.return_value = True
+        self.connection.get_prompt.return_value = b'#'
+        self.connection.cliconf.flush_save.side_effect = AnsibleConnectionFailure('timeout')
+        self.terminal.on_close_shell()
+        self.assertIsNone(self.terminal._administrator)
+
+    def test_rtx_terminal_close_flush_locked(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'rtx1.lock')
+            self.connection.cliconf.has_pending_save.return_value = True
+            # the timeout of the task deferring the save
+            self.connection.cliconf.get_save_lock.return_value = {'path': path, 'timeout': 0.1}
+            self.connection.get_prompt.return_value = b'#'
+            with patch('ansible_collections.yamaha_network.rtx.plugins.terminal.rtx.DeviceLock',
+                       functools.partial(DeviceLock, interval=0.01)):
+                # another task holds the device
+                with DeviceLock(path, timeout=0.1):
+                    self.terminal.on_close_shell()
+                self.connection.cliconf.flush_save.assert_not_called()
+
+                self.terminal.on_close_shell()
+                self.connection.cliconf.flush_save.assert_called_once_with()
+            # the lock is released after the save
+            with DeviceLock(path, timeout=0.1):
+                pass
+        finally:
+            shutil.rmtree(tmpdir)
@@ -0,0 +1,103 @@
+# Copyright (C) Yamaha Corporation.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <https://www.gnu.org/licenses/gpl-3.0.txt>.
+
+# Make coding more python3-ish
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from units.compat.mock import patch
+from ansible_collections.yamaha_network.rtx.plugins.modules import rtx_tunnels
+from units.modules.utils import set_module_args
+from units.modules.network.rtx.rtx_module import TestRtxModule, load_fixture
+
+
+class TestRtxTunnelsModule(TestRtxModule):
+
+    module = rtx_tunnels
+
+    def setUp(self):
+        super(TestRtxTunnelsModule, self).setUp()
+
+        self.mock_get_config = patch('ansible_collections.yamaha_network.rtx.plugins.modules.rtx_tunnels.get_config')
+        self.get_config = self.mock_get_config.start()
+
+        self.mock_load_config = patch('ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.resource.load_config')
+        self.load_config = self.mock_load_config.start()
+
+        self.mock_get_console_info = patch('ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.resource.get_console_info')
+        self.get_console_info = self.mock_get_console_info.start()
+
+        self.mock_set_console_info = patch('ansible_collections.yamaha_network.rtx.plugins.module_utils.network.rtx.resource.set_console_info')
+        self.set_console_info = self.mock_set_console_info.start()
+
+    def tearDown(self):
+        super(TestRtxTunnelsModule, self).tearDown()
+        self.mock_get_config.stop()
+        self.mock_load_config.stop()
+        self.mock_get_console_info.stop()
+        self.mock_set_console_info.stop()
+
+    def load_fixtures(self, commands=None):
+        self.get_config.return_value = load_fixture('rtx_tunnels_config.cfg')
+
+    def test_rtx_tunnels_merged_idempotent(self):
+        config = [dict(tunnel_id=1, lines=['ipsec tunnel 101', 'tunnel enable 1']),
+                  dict(tunnel_id=2, lines=['tunnel  encapsulation l2tpv3'])]
+        set_module_args(dict(config=config))
+        result = self.execute_module(commands=[])
+        self.assertEqual(self.load_config.call_count, 0)
+        self.assertEqual(result['before'][0]['lines'], ['ipsec tunnel 101',
+                                                        'ipsec sa policy 101 1 esp aes-cbc sha-hmac',
+                                                        'ipsec ike remote address 1 203.0.113.1',
+                                                        'tunnel enable 1'])
+
+    def test_rtx_tunnels_merged(self):
+        config = [dict(tunnel_id=2, lines=['tunnel encapsulation l2tpv3', 'l2tp always-on on']),
+                  dict(tunnel_id=3, lines=['tunnel encapsulation l2tpv3', 'tunnel enable 3'])]
+        set_module_args(dict(config=config))
+        commands = ['tunnel select 2', 'l2tp always-on on',
+                    'tunnel select 3', 'tunnel encapsulation l2tpv3', 'tunnel enable 3',
+                    'tunnel select none']
+        self.execute_module(changed=True, commands=commands, sort=False)
+        self.assertEqual(self.load_config.call_count, 1)
+
+    def test_rtx_tunnels_replaced(self):
+        config = [dict(tunnel_id=2, lines=['tunnel encapsulation ipip', 'tunnel enable 2'])]
+        set_module_args(dict(config=config, state='replaced'))
+        commands = ['tunnel select 2', 'no tunnel encapsulation l2tpv3', 'tunnel encapsulation ipip',
+                    'tunnel select none']
+        result = self.execute_module(changed=True, commands=commands, sort=False)
+        self.assertEqual(result['after'][1], dict(tunnel_id=2, lines=['tunnel enable 2', 'tunnel encapsulation ipip']))
+
+    def test_rtx_tunnels_overridden(self):
+        config = [dict(tunnel_id=2, lines=['tunnel encapsulation l2tpv3', 'tunnel enable 2'])]
+        set_module_args(dict(config=config, state='overridden'))
+        commands = ['tunnel select 1', 'no tunnel enable 1', 'no ipsec ike remote address 1 203.0.113.1',
+                    'no ipsec sa policy 101 1 esp aes-cbc sha-hmac', 'no ipsec tunnel 101',
+                    'tunnel select none']
+        result = self.execute_module(changed=True, commands=commands, sort=False)
+        self.assertEqual([entry['tunnel_id'] for entry in result['after']], [2])
+
+    def test_rtx_tunnels_deleted(self):
+        set_module_args(dict(config=[dict(tunnel_id=2), dict(tunnel_id=5)], state='deleted'))
+        commands = ['tunnel select 2', 'no tunnel enable 2', 'no tunnel encapsulation l2tpv3',
+                    'tunnel select none']
+        self.execute_module(changed=True, commands=commands, sort=False)
+
+    def test_rtx_tunnels_lines_required(self):
+        set_module_args(dict(config=[dict(tunnel_id=1)]))
+        self.execute_module(failed=True)